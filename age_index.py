@@ -0,0 +1,125 @@
+"""
+age_index.py
+Sorted age index for repeated age-range queries.
+
+filter_cases_by_age scans every record on every call. Dashboards that ask
+for many age bands per refresh can build an AgeIndex once instead: ages
+are normalized a single time and kept in a sorted array, so each
+[min_age, max_age] query is two bisects plus the matching slice.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from helper_utils import normalize_age
+
+Band = Union[str, Tuple[int, int]]
+
+
+def _band_bounds(band: Band) -> Tuple[int, int]:
+    """Turn "20-29" or (20, 29) into inclusive integer bounds."""
+    if isinstance(band, str):
+        low, _, high = band.strip().partition("-")
+        try:
+            return int(low), int(high) if high else int(low)
+        except ValueError:
+            raise ValueError(f"Invalid age band: {band!r}") from None
+    low, high = band
+    return int(low), int(high)
+
+
+class AgeIndex:
+    """
+    Records sorted by normalized age, for bisect-based range queries.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]], field: str = "age",
+                 normalize: bool = True):
+        """
+        Args:
+            records (list[dict]): Case records. The list is referenced, not copied.
+            field (str): Record key holding the age.
+            normalize (bool): Read ages with normalize_age, so "25" and range
+                strings like "20-30" (midpoint) are indexed. With False only
+                int ages count, exactly like filter_cases_by_age.
+
+        Records whose age cannot be read are left out of the index.
+        """
+        self.records = records
+        self.field = field
+        ages = []
+        positions = []
+        for position, record in enumerate(records):
+            age = record.get(field)
+            if normalize:
+                age = normalize_age(age) if isinstance(age, (int, str)) else -1
+                if age < 0:
+                    continue
+            elif not isinstance(age, int):
+                continue
+            ages.append(age)
+            positions.append(position)
+
+        # Stable sort keeps input order among equal ages.
+        order = sorted(range(len(ages)), key=ages.__getitem__)
+        self._ages = array("q", (ages[i] for i in order))
+        self._positions = array("q", (positions[i] for i in order))
+
+    def __len__(self):
+        return len(self._ages)
+
+    def _bounds(self, min_age: Optional[int], max_age: Optional[int]) -> Tuple[int, int]:
+        lo = 0 if min_age is None else bisect_left(self._ages, min_age)
+        hi = len(self._ages) if max_age is None else bisect_right(self._ages, max_age)
+        return lo, max(lo, hi)
+
+    def count(self, min_age: Optional[int] = None, max_age: Optional[int] = None) -> int:
+        """Number of records with min_age <= age <= max_age, in O(log n)."""
+        lo, hi = self._bounds(min_age, max_age)
+        return hi - lo
+
+    def query(self, min_age: Optional[int] = None, max_age: Optional[int] = None,
+              keep_order: bool = True) -> List[Dict[str, Any]]:
+        """
+        Records with min_age <= age <= max_age (either bound may be None).
+
+        Args:
+            keep_order (bool): Return records in input order, like
+                filter_cases_by_age. False returns them by ascending age,
+                which skips a sort of the matches.
+        """
+        lo, hi = self._bounds(min_age, max_age)
+        positions = self._positions[lo:hi]
+        if keep_order:
+            positions = sorted(positions)
+        records = self.records
+        return [records[p] for p in positions]
+
+    def histogram(self, bands: Union[int, Iterable[Band]] = 10) -> Dict[str, int]:
+        """
+        Record counts per age band.
+
+        Args:
+            bands (int | list): A band width (10 gives "0-9", "10-19", ... up
+                to the oldest age), or explicit inclusive bands given as range
+                strings like "18-64" or (low, high) tuples.
+
+        Returns:
+            dict: "low-high" label -> count, in band order.
+
+        Example:
+            >>> AgeIndex([{"age": "20-30"}, {"age": 7}, {"age": 31}]).histogram(["0-17", "18-64"])
+            {'0-17': 1, '18-64': 2}
+        """
+        if isinstance(bands, int):
+            if bands < 1:
+                raise ValueError("Band width must be at least 1.")
+            top = self._ages[-1] if self._ages else -1
+            bands = [(start, start + bands - 1) for start in range(0, top + 1, bands)]
+
+        histogram = {}
+        for band in bands:
+            low, high = _band_bounds(band)
+            histogram[f"{low}-{high}"] = self.count(low, high)
+        return histogram
@@ -7,6 +7,8 @@ Refactored to work with CaseRecord objects and PipelineManager.
 from typing import List, Dict
 import datetime
 
+from case_columns import CaseColumns, as_columns
+
 class AlertReport:
     """
     Generates alerts for high-case days based on CaseRecord objects.
@@ -17,11 +19,11 @@ class AlertReport:
         Initialize with a list of CaseRecord objects.
         
         Args:
-            records (list[CaseRecord]): Data from the pipeline.
+            records (list[CaseRecord] | CaseColumns): Data from the pipeline.
             threshold (int): Case count that triggers an alert.
         """
         # Removed strict type check for list[dict] to allow CaseRecord objects
-        if not isinstance(records, list):
+        if not isinstance(records, (list, CaseColumns)):
             raise TypeError("Records must be a list.")
         if threshold < 0: 
             raise ValueError("Threshold must be non-negative.")
@@ -33,16 +35,11 @@ class AlertReport:
         """
         Scan records and return alert messages for days exceeding threshold.
         """
-        alerts = []
-        for r in self._records:
-            cases = r.cases if hasattr(r, 'cases') else r.get('cases', 0)
-            date = r.date if hasattr(r, 'date') else r.get('date', 'Unknown')
-            loc = r.location if hasattr(r, 'location') else r.get('location', 'Unknown')
-
-            if cases > self._threshold:
-                alerts.append(f"ALERT: {loc} had {cases} cases on {date} (Threshold: {self._threshold})")
-        
-        return alerts
+        columns = as_columns(self._records)
+        threshold = self._threshold
+        return [f"ALERT: {loc} had {cases} cases on {date} (Threshold: {threshold})"
+                for date, loc, cases in zip(columns.date, columns.location, columns.cases)
+                if cases > threshold]
 
     def save_report(self, filename: str = "alert_summary.txt"):
         """
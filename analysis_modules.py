@@ -1,13 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from statistics import mean
+from fractions import Fraction
+from collections import deque
+from heapq import merge
+from typing import List, Dict, Any, Iterable, Sequence
+
+from case_columns import as_columns, is_date_ordered
+
+
+def exact_mean(total, count):
+    """statistics.mean() of integers, given their sum and count (int when exact)."""
+    value = Fraction(total, count)
+    return int(value) if value.denominator == 1 else float(value)
+
 
 class AbstractAnalyzer(ABC):
     """
     Base class for all analysis modules.
     Enforces a standard interface for processing case records.
+
+    Analyzers that can run on location shards also provide
+    partial(records, positions) and combine(partials); see sharded_pipeline.
+    Analyzers that set accepts_columns = True take a CaseColumns batch in
+    place of a record list, so PipelineManager converts records only once.
+    Analyzers with analyze_stream(store) can run on a spill_store.SpillStore
+    without loading it into memory.
     """
-    
+
+    accepts_columns = False
+
     @abstractmethod
     def analyze(self, records: List[Any]) -> Dict[str, Any]:
         """
@@ -22,36 +42,92 @@ class TrendAnalyzer(AbstractAnalyzer):
     Focuses on time-series trends and moving averages.
     """
 
+    accepts_columns = True
+
     def analyze(self, records: List[Any]) -> Dict[str, Any]:
         """
         Main entry point for the pipeline to run this analyzer.
+        Takes CaseRecord objects, dicts or a CaseColumns batch.
         """
-        if not records:
+        columns = as_columns(records)
+        if not columns:
             return {"status": "No data"}
 
-        # Convert objects to dicts if needed, or access attributes directly
-        # Handling both CaseRecord objects (your code) and raw dicts (legacy)
-        clean_data = []
-        for r in records:
-            # Polymorphic handling: support objects or dicts
-            val = r.cases if hasattr(r, 'cases') else r.get('cases', 0)
-            date = r.date if hasattr(r, 'date') else r.get('date', 'Unknown')
-            clean_data.append({'cases': int(val), 'date': date})
+        cases = list(map(int, columns.cases))
+        total = sum(cases)
+        return {
+            "total_cases": total,
+            "moving_average": self._calculate_moving_average(columns.date, cases),
+            "average_daily": exact_mean(total, len(cases))
+        }
 
+    def analyze_stream(self, store) -> Dict[str, Any]:
+        """
+        analyze() for records in a SpillStore, read in date order from disk.
+        Only the moving-average result itself is held in memory.
+        """
+        if not len(store):
+            return {"status": "No data"}
+        total = 0
+
+        def counts():
+            nonlocal total
+            for row in store.sorted_rows():
+                value = int(row[3])
+                total += value
+                yield value
+
+        moving_average = self._moving_average(counts())
         return {
-            "total_cases": sum(d['cases'] for d in clean_data),
-            "moving_average": self._calculate_moving_average(clean_data),
-            "average_daily": mean(d['cases'] for d in clean_data) if clean_data else 0
+            "total_cases": total,
+            "moving_average": moving_average,
+            "average_daily": exact_mean(total, len(store))
         }
 
-    def _calculate_moving_average(self, data: List[Dict], window: int = 7) -> List[float]:
-        """Internal helper method for moving averages."""
-        sorted_cases = sorted(data, key=lambda x: x['date'])
-        daily_counts = [c['cases'] for c in sorted_cases]
-        
+    def partial(self, records: List[Any], positions: Sequence[int]) -> Dict[str, Any]:
+        """
+        Shard-side state for combine(): totals plus the (date, position, cases)
+        series sorted the same way analyze() sorts it.
+        """
+        columns = as_columns(records)
+        series = sorted(zip(columns.date, positions, map(int, columns.cases)))
+        return {"total": sum(c for _, _, c in series), "count": len(series), "series": series}
+
+    def combine(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge shard partials into exactly what analyze() returns for all records."""
+        count = sum(p["count"] for p in partials)
+        if not count:
+            return {"status": "No data"}
+        total = sum(p["total"] for p in partials)
+        # Sorting by (date, input position) reproduces analyze()'s stable sort.
+        dates, _, cases = zip(*merge(*(p["series"] for p in partials)))
+        return {
+            "total_cases": total,
+            "moving_average": self._calculate_moving_average(dates, cases),
+            "average_daily": exact_mean(total, count)
+        }
+
+    def _calculate_moving_average(self, dates: Sequence[Any], cases: Sequence[int],
+                                  window: int = 7) -> List[float]:
+        """Internal helper method for moving averages (integer daily counts)."""
+        if is_date_ordered(dates):
+            # Already in date order (one sorted dataset, or a merged stream): no sort, no copy.
+            return self._moving_average(cases, window)
+        order = sorted(range(len(cases)), key=dates.__getitem__)
+        return self._moving_average([cases[i] for i in order], window)
+
+    def _moving_average(self, daily_counts: Iterable[int], window: int = 7) -> List[float]:
+        """Moving averages of counts that are already in date order."""
         ma = []
-        for i in range(len(daily_counts)):
-            start_idx = max(0, i - window + 1)
-            window_values = daily_counts[start_idx:i+1]
-            ma.append(round(mean(window_values), 2))
+        recent = deque()
+        running = 0
+        for value in daily_counts:
+            running += value
+            recent.append(value)
+            if len(recent) > window:
+                running -= recent.popleft()
+            size = len(recent)
+            # Same value and type as statistics.mean() of the window.
+            quotient, remainder = divmod(running, size)
+            ma.append(round(running / size if remainder else quotient, 2))
         return ma
@@ -0,0 +1,255 @@
+"""
+backtesting.py
+Rolling-origin accuracy tests for the case forecasters.
+
+For every location and every origin day t, each model is trained on the
+location's daily totals up to t and asked for t+1 .. t+h. Its forecasts
+are scored against what was actually reported, giving MAE and MAPE per
+model and per location. A "day" is a reported day: each location's
+series holds one summed total per date that has records, in date order,
+which is how the forecasters read their input.
+
+Each location's series and running (prefix) sums are built once and
+shared by every origin and model, so a model reads its training window
+in O(1) instead of re-scanning the first t days. Locations are spread
+over a process pool, and per-location, per-model error sums are cached
+on the Backtester, so a second run with another model or on a subset
+only computes what is new.
+"""
+
+import datetime
+import logging
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from analysis_modules import exact_mean
+from case_columns import as_columns
+from forecasting_analyzer import ForecastingAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class _Series:
+    """One location's daily totals with prefix sums (prefix[i] = sum of counts[:i])."""
+
+    __slots__ = ("counts", "prefix")
+
+    def __init__(self, counts: Iterable[int]):
+        self.counts = array("q", counts)
+        prefix = array("q", [0])
+        running = 0
+        for value in self.counts:
+            running += value
+            prefix.append(running)
+        self.prefix = prefix
+
+    def __len__(self):
+        return len(self.counts)
+
+
+# --- Models: model(series, origin, horizon) -> forecasts for origin+1 .. origin+horizon ---
+
+def average_change(series: _Series, origin: int, horizon: int) -> List[int]:
+    """predict_future_cases: extend the mean daily change, rounding each step."""
+    counts = series.counts
+    # The mean of the consecutive changes telescopes to (last - first) / steps.
+    avg_change = (counts[origin] - counts[0]) / origin
+    predictions = []
+    last_value = counts[origin]
+    for _ in range(horizon):
+        last_value = max(0, int(round(last_value + avg_change)))
+        predictions.append(last_value)
+    return predictions
+
+
+def forecasting_analyzer(series: _Series, origin: int, horizon: int) -> List[int]:
+    """ForecastingAnalyzer: the same trend, truncating each step."""
+    counts = series.counts
+    avg_change = exact_mean(counts[origin] - counts[0], origin)
+    return ForecastingAnalyzer(horizon)._forecast(origin + 1, counts[origin],
+                                                  avg_change)["future_predictions"]
+
+
+def last_value(series: _Series, origin: int, horizon: int) -> List[int]:
+    """Naive baseline: tomorrow looks like today."""
+    return [series.counts[origin]] * horizon
+
+
+def moving_average(series: _Series, origin: int, horizon: int, window: int = 7) -> List[int]:
+    """Baseline: the mean of the last `window` days, held flat."""
+    start = max(0, origin + 1 - window)
+    level = round((series.prefix[origin + 1] - series.prefix[start]) / (origin + 1 - start))
+    return [level] * horizon
+
+
+MODELS: Dict[str, Callable[[_Series, int, int], List[int]]] = {
+    "average_change": average_change,
+    "forecasting_analyzer": forecasting_analyzer,
+    "last_value": last_value,
+    "moving_average_7": moving_average,
+}
+
+
+def _score(series: _Series, model, horizon: int, min_train: int) -> List[float]:
+    """[abs error sum, abs pct error sum, forecasts, forecasts with nonzero actual, seconds]."""
+    started = time.perf_counter()
+    counts = series.counts
+    abs_sum = pct_sum = 0.0
+    scored = nonzero = 0
+    for origin in range(min_train - 1, len(counts) - horizon):
+        for step, predicted in enumerate(model(series, origin, horizon), 1):
+            actual = counts[origin + step]
+            error = abs(predicted - actual)
+            abs_sum += error
+            scored += 1
+            if actual:
+                pct_sum += error / abs(actual)
+                nonzero += 1
+    return [abs_sum, pct_sum, scored, nonzero, time.perf_counter() - started]
+
+
+def _backtest_batch(items, models: Dict[str, Callable], horizon: int, min_train: int):
+    """Worker entry point: error sums for each (location, model) in items."""
+    return [(location, name, _score(series, models[name], horizon, min_train))
+            for location, series, names in items for name in names]
+
+
+def _summary(sums: List[float]) -> Dict[str, Any]:
+    abs_sum, pct_sum, scored, nonzero = sums[:4]
+    return {
+        "mae": round(abs_sum / scored, 4) if scored else None,
+        "mape": round(100 * pct_sum / nonzero, 2) if nonzero else None,
+        "forecasts": int(scored),
+    }
+
+
+class Backtester:
+    """
+    Rolling-origin evaluation of forecasting models across locations.
+    """
+
+    def __init__(self, records, locations=None):
+        """
+        Args:
+            records: CaseRecords, dicts or a CaseColumns batch. Rows with an
+                unreadable date or count are skipped (see self.skipped).
+            locations (LocationRegistry, optional): Merges location spellings.
+        """
+        self.series: Dict[str, _Series] = {}
+        self.skipped = 0
+        self._cache: Dict[tuple, List[float]] = {}
+
+        columns = as_columns(records)
+        normalize = locations.normalize if locations is not None else None
+        ordinals: Dict[Any, int] = {}
+        daily: Dict[str, Dict[int, int]] = {}
+        for date, location, cases in zip(columns.date, columns.location, columns.cases):
+            try:
+                day = ordinals.get(date)
+                if day is None:
+                    day = ordinals[date] = datetime.date.fromisoformat(str(date).strip()).toordinal()
+                cases = int(cases)
+            except (TypeError, ValueError):
+                self.skipped += 1
+                continue
+            key = normalize(location) if normalize is not None else location
+            days = daily.setdefault(key, {})
+            days[day] = days.get(day, 0) + cases
+        for key, days in daily.items():
+            self.series[key] = _Series(days[d] for d in sorted(days))
+
+    def run(self, models: Optional[Sequence[str]] = None, horizon: int = 7, min_train: int = 3,
+            workers: Optional[int] = None,
+            model_functions: Optional[Dict[str, Callable]] = None) -> Dict[str, Any]:
+        """
+        Score every model at every origin of every location.
+
+        Args:
+            models (list[str], optional): Model names (default: all of them).
+            horizon (int): Days h forecast from each origin.
+            min_train (int): Days of history before the first origin (at
+                least 2; predict_future_cases itself needs 3).
+            workers (int, optional): Worker processes (default: CPU count;
+                1 runs in this process).
+            model_functions (dict, optional): Extra or replacement models,
+                name -> model(series, origin, horizon). They must be
+                module-level functions to run in worker processes.
+
+        Returns:
+            dict: {'horizon', 'min_train',
+            'models': {name: {'mae', 'mape', 'forecasts', 'seconds'}},
+            'locations': {location: {name: {'mae', 'mape', 'forecasts'}}}}.
+            MAPE is in percent and leaves out days with 0 actual cases;
+            'seconds' is compute time in this run (0 for cached results).
+
+        Raises:
+            ValueError: If a model is unknown, horizon < 1, min_train < 2
+                or workers < 1.
+        """
+        available = dict(MODELS, **(model_functions or {}))
+        names = list(models) if models is not None else list(available)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown model(s): {', '.join(unknown)}")
+        if horizon < 1 or min_train < 2:
+            raise ValueError("horizon must be at least 1 and min_train at least 2")
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        # Only (location, model) pairs not cached from an earlier run are computed.
+        items = []
+        for location, series in self.series.items():
+            todo = [n for n in names
+                    if (location, available[n], horizon, min_train) not in self._cache]
+            if todo and len(series) >= min_train + horizon:
+                items.append((location, series, todo))
+        models_used = {name: available[name] for name in names}
+        seconds = dict.fromkeys(names, 0.0)
+        if workers == 1 or len(items) <= 1:
+            outputs = [_backtest_batch(items, models_used, horizon, min_train)]
+        else:
+            n_batches = min(len(items), workers * 4)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_backtest_batch, items[i::n_batches], models_used,
+                                       horizon, min_train) for i in range(n_batches)]
+                outputs = [future.result() for future in futures]
+        for output in outputs:
+            for location, name, sums in output:
+                self._cache[(location, models_used[name], horizon, min_train)] = sums
+                seconds[name] += sums[4]
+
+        totals = {name: [0.0, 0.0, 0, 0] for name in names}
+        per_location = {}
+        for location in sorted(self.series):
+            row = {}
+            for name in names:
+                sums = self._cache.get((location, available[name], horizon, min_train))
+                if sums is None:
+                    continue
+                row[name] = _summary(sums)
+                totals[name] = [a + b for a, b in zip(totals[name], sums)]
+            if row:
+                per_location[location] = row
+        logger.info("Backtested %d location(s) with %d model(s).", len(per_location), len(names))
+        return {
+            "horizon": horizon,
+            "min_train": min_train,
+            "models": {name: dict(_summary(totals[name]), seconds=round(seconds[name], 6))
+                       for name in names},
+            "locations": per_location,
+        }
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    """Plain-text MAE/MAPE/timing table for a Backtester.run() report."""
+    lines = [f"Rolling-origin backtest, horizon {report['horizon']} day(s)",
+             f"{'model':<22}{'MAE':>10}{'MAPE %':>10}{'forecasts':>12}{'seconds':>10}"]
+    for name, row in report["models"].items():
+        mae = "-" if row["mae"] is None else f"{row['mae']:.2f}"
+        mape = "-" if row["mape"] is None else f"{row['mape']:.1f}"
+        lines.append(f"{name:<22}{mae:>10}{mape:>10}{row['forecasts']:>12}{row['seconds']:>10.3f}")
+    return "\n".join(lines)
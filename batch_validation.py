@@ -0,0 +1,212 @@
+"""
+batch_validation.py
+Chunk-at-a-time record validation with a reject bitmask.
+
+validate_case_entry checks one record at a time. A BatchValidator
+compiles the required fields, null sentinels and type rules once, then
+checks a whole chunk with C-level maps: one itemgetter pulls every
+required value of a row as a tuple and frozenset.isdisjoint tests it
+against the null sentinels, and each typed field adds one isinstance
+pass over its column. The per-row outcomes are packed into a Python int
+bitmask (bit i = row i) and combined with integer bit operations. The
+rejected rows alone are then run through the rules again, in order, to
+count each one under its first failing rule.
+"""
+
+from itertools import compress, repeat
+from operator import is_not, itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+NULL_SENTINELS = (None, "", "NA")
+
+# bytes of 0/1 flags <-> ASCII '0'/'1', for int(..., 2) packing.
+_TO_BINARY = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_BINARY = bytes.maketrans(b"01", b"\x00\x01")
+_INVERT = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+# Stands in for absent keys in typed-field columns.
+_MISSING = object()
+
+
+def _pack(flags: Iterable[bool]) -> int:
+    """Pack per-row bool flags into an int whose bit i is row i."""
+    digits = bytes(flags).translate(_TO_BINARY)[::-1]
+    return int(digits, 2) if digits else 0
+
+
+def _unpack(bits: int, size: int) -> bytes:
+    """One 0/1 byte per row; the inverse of _pack."""
+    if not size:
+        return b""
+    return bin(bits)[2:].zfill(size)[::-1].encode().translate(_FROM_BINARY)
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def _get(record, field):
+    return record.get(field, _MISSING) if isinstance(record, dict) else _MISSING
+
+
+class ValidationResult:
+    """
+    Accepted-row bitmask plus reject counts for one validated chunk.
+    """
+
+    def __init__(self, size: int, accepted_bits: int, reasons: Dict[str, int]):
+        self.size = size
+        self._bits = accepted_bits
+        self.reasons = reasons
+        self.accepted = _popcount(accepted_bits)
+        self.rejected = size - self.accepted
+
+    @property
+    def mask(self) -> bytes:
+        """Little-endian bitmask: bit i of the result is set if row i passed."""
+        return self._bits.to_bytes((self.size + 7) // 8, "little")
+
+    def flags(self) -> bytes:
+        """One 0/1 byte per row, usable with itertools.compress."""
+        return _unpack(self._bits, self.size)
+
+    def is_accepted(self, index: int) -> bool:
+        return bool(self._bits >> index & 1)
+
+    def select(self, records: Sequence[Any]) -> List[Any]:
+        """The accepted records, in input order."""
+        if self.rejected == 0:
+            return list(records)
+        return list(compress(records, self.flags()))
+
+    def __repr__(self):
+        return f"ValidationResult(accepted={self.accepted}, rejected={self.rejected}, reasons={self.reasons})"
+
+
+class BatchValidator:
+    """
+    Compiled required-field, null and type rules for dict records.
+    """
+
+    def __init__(self, required: Sequence[str] = ("date", "location", "age", "cases"),
+                 nulls: Sequence[Any] = NULL_SENTINELS,
+                 types: Optional[Dict[str, Tuple[type, ...]]] = None):
+        """
+        Args:
+            required (tuple[str]): Keys that must be present and not null.
+            nulls (tuple): Hashable values that count as empty
+                (default None, "", "NA").
+            types (dict, optional): Field -> type or tuple of types its value
+                must be an instance of. Typed fields that are not required
+                may also be absent or null.
+
+        Reject reasons are 'not_a_dict', 'missing:<field>', 'null:<field>'
+        and 'type:<field>'. Each rejected row is counted once, under the
+        first rule it breaks: required fields in order, then types.
+        """
+        self.required = tuple(required)
+        self.nulls = frozenset(nulls)
+        self.types = dict(types or {})
+        # A one-field itemgetter returns the bare value (and isdisjoint would
+        # iterate a string), so fetch the field twice to always get a tuple.
+        fields = self.required * 2 if len(self.required) == 1 else self.required
+        self._get_required = itemgetter(*fields) if fields else None
+
+    def validate(self, records: Sequence[Any]) -> ValidationResult:
+        """
+        Validate a chunk of records.
+
+        Example:
+            >>> BatchValidator(("date", "cases")).validate(
+            ...     [{"date": "2025-01-01", "cases": 3}, {"date": "NA", "cases": 1}, {"cases": 2}])
+            ValidationResult(accepted=1, rejected=2, reasons={'missing:date': 1, 'null:date': 1})
+        """
+        n = len(records)
+        everyone = (1 << n) - 1
+        try:
+            if _pack(map(isinstance, records, repeat(dict))) != everyone:
+                raise TypeError("not every record is a dict")
+            passing = everyone
+            if self._get_required is not None:
+                passing = _pack(map(self.nulls.isdisjoint, map(self._get_required, records)))
+        except (KeyError, TypeError):
+            # Absent keys, non-dict rows or unhashable values: check row by row.
+            passing = _pack(map(self._passes_required, records))
+
+        for field, allowed in self.types.items():
+            if not passing:
+                break
+            column = list(map(_get, records, repeat(field)))
+            ok = _pack(map(isinstance, column, repeat(allowed)))
+            if field not in self.required:
+                ok |= _pack(map(self._is_empty, column))
+            passing &= ok
+
+        failing = everyone & ~passing
+        reasons = self._attribute(list(compress(records, _unpack(failing, n)))) if failing else {}
+        return ValidationResult(n, passing, reasons)
+
+    def _attribute(self, rows: List[Any]) -> Dict[str, int]:
+        """Count rejected rows under their first failing rule, one rule at a time."""
+        reasons: Dict[str, int] = {}
+
+        def drop(reason, keep_flags, rows, column=None):
+            # Rows that fail this rule (flag 0) are counted and left out of later checks.
+            keep_flags = bytes(keep_flags)
+            bad = len(keep_flags) - keep_flags.count(1)
+            if not bad:
+                return rows, column
+            reasons[reason] = bad
+            return (list(compress(rows, keep_flags)),
+                    None if column is None else list(compress(column, keep_flags)))
+
+        rows, _ = drop("not_a_dict", map(isinstance, rows, repeat(dict)), rows)
+        for field in self.required:
+            column = list(map(_get, rows, repeat(field)))
+            rows, column = drop(f"missing:{field}", map(is_not, column, repeat(_MISSING)), rows, column)
+            rows, _ = drop(f"null:{field}", self._not_null_flags(column), rows)
+        for field, allowed in self.types.items():
+            column = list(map(_get, rows, repeat(field)))
+            ok = _pack(map(isinstance, column, repeat(allowed)))
+            if field not in self.required:
+                ok |= _pack(map(self._is_empty, column))
+            rows, _ = drop(f"type:{field}", _unpack(ok, len(column)), rows)
+        return reasons
+
+    def _not_null_flags(self, column: List[Any]) -> bytes:
+        try:
+            nulls = bytes(map(self.nulls.__contains__, column))
+        except TypeError:
+            nulls = bytes(map(self._is_empty, column))
+        return nulls.translate(_INVERT)
+
+    def _is_empty(self, value) -> bool:
+        try:
+            return value is _MISSING or value in self.nulls
+        except TypeError:
+            return False
+
+    def _passes_required(self, record) -> bool:
+        if not isinstance(record, dict):
+            return False
+        for field in self.required:
+            if field not in record or self._is_empty(record[field]):
+                return False
+        return True
+
+    def reason(self, record) -> Optional[str]:
+        """The first rule a single record breaks, or None if it passes."""
+        if not isinstance(record, dict):
+            return "not_a_dict"
+        for field in self.required:
+            if field not in record:
+                return f"missing:{field}"
+            if self._is_empty(record[field]):
+                return f"null:{field}"
+        for field, allowed in self.types.items():
+            value = record.get(field, _MISSING)
+            if isinstance(value, allowed):
+                continue
+            if field in self.required or not self._is_empty(value):
+                return f"type:{field}"
+        return None
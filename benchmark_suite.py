@@ -0,0 +1,433 @@
+"""
+benchmark_suite.py
+Synthetic-data benchmarks for every pipeline stage.
+
+Generates seeded CSV, JSON and XML case files with realistic location and
+date distributions, times each loader, clean_case_data, age
+normalization (per record vs batch), the clean -> standardize chain vs
+the fused clean_records pass (with tracemalloc peaks), every analyzer,
+AlertReport and export_dataset, and writes the best-of-N timings to a
+JSON file. Generated rows are streamed in chunks, so even the 10m size
+never holds every raw row in memory.
+A compare mode diffs two result files and flags regressions.
+
+Usage:
+    python -m benchmark_suite run --sizes 10k 1m --out bench/HEAD.json
+    python -m benchmark_suite compare bench/main.json bench/HEAD.json --tolerance 0.15
+"""
+
+import argparse
+import datetime
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+FORMATS = ("csv", "json", "xml")
+
+DEFAULT_SEED = 326
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_REPEATS = 3
+# Rows generated and held at once for the in-memory stages.
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+_STATES = ["MD", "VA", "DC", "PA", "NY", "NJ", "DE", "WV", "NC", "OH", "FL", "TX", "CA", "IL", "MA"]
+_AGE_BANDS = ["0-9", "10-19", "20-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80-89"]
+
+
+class SyntheticCaseGenerator:
+    """
+    Seeded generator of realistic-looking case rows.
+
+    Location popularity follows a Zipf distribution (a few big counties,
+    a long tail of small ones). Case counts follow two epidemic waves with
+    a weekly reporting dip, plus gamma-distributed noise.
+    """
+
+    def __init__(self, seed: int = DEFAULT_SEED, n_locations: int = 3000,
+                 start: str = "2024-01-01", days: int = 730):
+        if n_locations < 1 or days < 1:
+            raise ValueError("n_locations and days must be at least 1")
+        self._rng = random.Random(seed)
+        self.locations = [f"County {i:04d} {_STATES[i % len(_STATES)]}" for i in range(n_locations)]
+        weights = [1.0 / (rank + 1) ** 1.1 for rank in range(n_locations)]
+        total = sum(weights)
+        self._cum_weights = []
+        running = 0.0
+        for w in weights:
+            running += w / total
+            self._cum_weights.append(running)
+
+        self._start = datetime.date.fromisoformat(start)
+        self.days = days
+        self._day_factor = [self._wave(d) for d in range(days)]
+
+    def _wave(self, day: int) -> float:
+        """Relative case intensity on a given day of the simulated period."""
+        waves = (math.exp(-((day - self.days * 0.25) / (self.days * 0.08)) ** 2)
+                 + 0.7 * math.exp(-((day - self.days * 0.7) / (self.days * 0.1)) ** 2))
+        weekend_dip = 0.6 if (self._start.toordinal() + day) % 7 in (5, 6) else 1.0
+        return (0.1 + waves) * weekend_dip
+
+    def rows(self, n: int):
+        """Yield n dict rows in date order with date, location, age and cases."""
+        rng = self._rng
+        for i in range(n):
+            day = i * self.days // n
+            loc_index = min(self._bisect(rng.random()), len(self.locations) - 1)
+            # Bigger counties report more cases.
+            scale = 40.0 * self._day_factor[day] / (1 + loc_index) ** 0.3
+            cases = int(rng.gammavariate(2.0, scale / 2.0))
+            date = self._start + datetime.timedelta(days=day)
+            yield {
+                "date": date.strftime("%m/%d/%y"),
+                "location": self.locations[loc_index].lower() if rng.random() < 0.2
+                            else self.locations[loc_index],
+                "age": rng.choice(_AGE_BANDS),
+                "cases": cases,
+            }
+
+    def _bisect(self, u: float) -> int:
+        lo, hi = 0, len(self._cum_weights)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._cum_weights[mid] < u:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def write(self, path: str, n: int, format: str = "csv") -> str:
+        """
+        Stream n rows to a CSV, JSON or XML file without holding them in memory.
+
+        Raises:
+            ValueError: If format is not csv, json or xml.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}")
+        with open(path, "w", newline="") as f:
+            if format == "csv":
+                f.write("date,location,age,cases\n")
+                for r in self.rows(n):
+                    f.write(f"{r['date']},{r['location']},{r['age']},{r['cases']}\n")
+            elif format == "json":
+                f.write("[\n")
+                for i, r in enumerate(self.rows(n)):
+                    f.write(("" if i == 0 else ",\n") + json.dumps(r))
+                f.write("\n]\n")
+            else:
+                f.write("<data>\n")
+                for r in self.rows(n):
+                    f.write(f"<record><date>{r['date']}</date><location>{r['location']}</location>"
+                            f"<age>{r['age']}</age><cases>{r['cases']}</cases></record>\n")
+                f.write("</data>\n")
+        return path
+
+
+def _time_call(func: Callable[[], Any], repeats: int = 1) -> float:
+    """Run func `repeats` times with stdout silenced; return the best elapsed seconds."""
+    best = None
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best:
+                best = elapsed
+    return best
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of at most size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _peak_allocated(func: Callable[[], Any]) -> int:
+    """Peak bytes newly allocated while func runs (tracemalloc)."""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def run_benchmarks(size_labels: List[str], data_dir: str, seed: int = DEFAULT_SEED,
+                   alert_threshold: int = 50, repeats: int = DEFAULT_REPEATS,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Generate data at each size and time every pipeline stage.
+
+    Stages that take raw generated rows (cleaning, validation, age
+    normalization, export) are fed chunk_size rows at a time as the
+    generator streams them, and their times are summed over the chunks,
+    so the 10m size never holds all of its rows at once. Every timing is
+    the best of `repeats` runs (per chunk for the chunked stages).
+
+    Args:
+        size_labels (list[str]): Keys of SIZES, e.g. ['10k', '1m'].
+        data_dir (str): Where generated files and exports are written.
+        seed (int): Generator seed, so runs on different commits compare.
+        alert_threshold (int): Threshold passed to AlertReport.
+        repeats (int): Runs per timing; the fastest is reported.
+        chunk_size (int): Generated rows per chunk for the raw-row stages.
+
+    Returns:
+        list[dict]: One row per (benchmark, size) with seconds and records/sec.
+
+    Raises:
+        ValueError: If a size is unknown, or repeats or chunk_size is below 1.
+    """
+    from case_data_manager import CSVDataset, JSONDataset
+    from xml_dataset import XMLDataset
+    from analysis_modules import TrendAnalyzer
+    from forecasting_analyzer import ForecastingAnalyzer
+    from alert_report import AlertReport
+    from batch_validation import BatchValidator
+    from case_columns import as_columns
+    from pipeline_functions import (clean_case_data, clean_records, export_dataset,
+                                    standardize_case_fields, validate_case_entry)
+    from helper_utils import normalize_age, normalize_ages
+
+    if repeats < 1 or chunk_size < 1:
+        raise ValueError("repeats and chunk_size must be at least 1")
+    loaders = {"csv": CSVDataset, "json": JSONDataset, "xml": XMLDataset}
+    results = []
+
+    def record(name, label, n, seconds, peak_bytes=None):
+        row = {
+            "benchmark": name,
+            "size": label,
+            "records": n,
+            "seconds": round(seconds, 6),
+            "records_per_sec": round(n / seconds, 1) if seconds > 0 else None,
+        }
+        if peak_bytes is not None:
+            row["peak_bytes"] = peak_bytes
+        results.append(row)
+
+    def timed(func):
+        return _time_call(func, repeats)
+
+    os.makedirs(data_dir, exist_ok=True)
+    for label in size_labels:
+        if label not in SIZES:
+            raise ValueError(f"Unknown size '{label}'; choose from {', '.join(SIZES)}")
+        n = SIZES[label]
+
+        case_records = None
+        for fmt in FORMATS:
+            path = os.path.join(data_dir, f"synthetic_{label}.{fmt}")
+            if not os.path.exists(path):
+                SyntheticCaseGenerator(seed).write(path, n, fmt)
+            ds = loaders[fmt](path)
+            record(f"load_{fmt}", label, n, timed(ds.load_data))
+            if fmt == "csv":
+                case_records = ds.get_all_records()
+            del ds
+
+        # Raw-row stages, one generated chunk at a time: benchmark -> seconds
+        # (and peak bytes), summed over the chunks.
+        seconds: Dict[str, float] = {}
+        peaks: Dict[str, int] = {}
+        exported = 0
+        for raw in _chunks(SyntheticCaseGenerator(seed).rows(n), chunk_size):
+            def add(name, func, peak=False):
+                seconds[name] = seconds.get(name, 0.0) + timed(func)
+                if peak:
+                    # tracemalloc slows the code it traces, so measure it separately.
+                    peaks[name] = max(peaks.get(name, 0), _peak_allocated(func))
+
+            add("clean_case_data", lambda: clean_case_data(raw))
+            add("clean_standardize_chain", lambda: standardize_case_fields(clean_case_data(raw)),
+                peak=True)
+            add("clean_records_fused",
+                lambda: clean_records(raw, required=("date", "location", "age", "cases")),
+                peak=True)
+            add("validate_per_record", lambda: [r for r in raw if validate_case_entry(r)])
+            add("validate_batch", lambda: BatchValidator().validate(raw).select(raw))
+            ages = [r["age"] for r in raw]
+            add("normalize_age_per_record", lambda: [normalize_age(a) for a in ages])
+            add("normalize_ages_batch", lambda: normalize_ages(ages))
+            with redirect_stdout(io.StringIO()):
+                cleaned = clean_case_data(raw)
+            exported += len(cleaned)
+            for fmt in ("csv", "json"):
+                out = os.path.join(data_dir, f"export_{label}.{fmt}")
+                add(f"export_dataset_{fmt}", lambda: export_dataset(cleaned, out, format=fmt))
+                os.remove(out)
+            del raw, ages, cleaned
+
+        for name, total in seconds.items():
+            if not name.startswith("export_dataset"):
+                record(name, label, n, total, peaks.get(name))
+
+        # Analyzer throughput on CaseRecords (converted per call) and on one
+        # shared CaseColumns batch, as PipelineManager passes it.
+        columns = as_columns(case_records)
+        record("as_columns", label, n, timed(lambda: as_columns(case_records)))
+        for analyzer in (TrendAnalyzer(), ForecastingAnalyzer()):
+            record(f"analyze_{analyzer.__class__.__name__}", label, n,
+                   timed(lambda: analyzer.analyze(case_records)))
+            record(f"analyze_{analyzer.__class__.__name__}_columns", label, n,
+                   timed(lambda: analyzer.analyze(columns)))
+
+        report = AlertReport(case_records, threshold=alert_threshold)
+        record("AlertReport.generate_alerts", label, n, timed(report.generate_alerts))
+        report = AlertReport(columns, threshold=alert_threshold)
+        record("AlertReport.generate_alerts_columns", label, n, timed(report.generate_alerts))
+        del columns, case_records
+
+        for fmt in ("csv", "json"):
+            record(f"export_dataset_{fmt}", label, exported, seconds[f"export_dataset_{fmt}"])
+
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    """Current git commit hash, or None outside a checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[Dict[str, Any]], path: str, seed: int = DEFAULT_SEED) -> str:
+    """Write results plus run metadata (commit, python, seed) as JSON."""
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    payload = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compare two saved result payloads benchmark-by-benchmark.
+
+    Args:
+        baseline (dict): Payload from save_results for the reference commit.
+        current (dict): Payload for the commit under test.
+        tolerance (float): Allowed slowdown, e.g. 0.10 for 10%.
+
+    Returns:
+        list[dict]: Rows with baseline/current seconds, ratio and a
+        'regression' flag, for every (benchmark, size) present in both.
+    """
+    old = {(r["benchmark"], r["size"]): r for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        key = (r["benchmark"], r["size"])
+        if key not in old or not old[key]["seconds"]:
+            continue
+        ratio = r["seconds"] / old[key]["seconds"]
+        rows.append({
+            "benchmark": r["benchmark"],
+            "size": r["size"],
+            "baseline_seconds": old[key]["seconds"],
+            "current_seconds": r["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def _format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'Benchmark':<32}{'Size':>6}{'Seconds':>12}{'Records/sec':>16}"]
+    for r in results:
+        rate = f"{r['records_per_sec']:,.0f}" if r["records_per_sec"] else "-"
+        lines.append(f"{r['benchmark']:<32}{r['size']:>6}{r['seconds']:>12.4f}{rate:>16}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point. Exit code 1 means compare found a regression."""
+    parser = argparse.ArgumentParser(prog="python -m benchmark_suite",
+                                     description="Pipeline stage benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Generate data and time every stage")
+    run_p.add_argument("--sizes", nargs="+", default=["10k"], choices=list(SIZES))
+    run_p.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_p.add_argument("--data-dir", help="Reuse generated files here (default: temp dir)")
+    run_p.add_argument("--out", default="bench_results.json", help="Results JSON path")
+    run_p.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                       help="Runs per timing; the fastest is reported")
+
+    cmp_p = sub.add_parser("compare", help="Flag regressions between two result files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if args.data_dir:
+            results = run_benchmarks(args.sizes, args.data_dir, args.seed,
+                                     repeats=args.repeats)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                results = run_benchmarks(args.sizes, tmp, args.seed, repeats=args.repeats)
+        save_results(results, args.out, args.seed)
+        print(_format_results(results))
+        print(f"\nResults written to {args.out}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.tolerance)
+    regressions = [r for r in rows if r["regression"]]
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else "ok"
+        print(f"{r['benchmark']:<32}{r['size']:>6}{r['ratio']:>8.2f}x  {flag}")
+    print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} "
+          f"({baseline['meta'].get('commit')} -> {current['meta'].get('commit')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
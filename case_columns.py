@@ -0,0 +1,96 @@
+"""
+case_columns.py
+One canonical, columnar form of case records for the analyzers.
+
+Records reach the analyzers as CaseRecord objects, raw dicts, CleanCase
+tuples or whole column batches. Instead of asking every record which
+kind it is (hasattr per field per record), as_columns() converts a batch
+once into a CaseColumns: parallel date, location and cases lists. The
+record type is checked once per batch, and the fields are pulled out
+with one C-level map per column (attrgetter for objects, dict.get for
+dicts). Analyzers then loop over plain lists.
+"""
+
+from itertools import islice, repeat
+from operator import attrgetter, le
+from typing import Any, Dict, List, Sequence
+
+FIELDS = ("date", "location", "cases")
+
+# Values used when a dict record has no such field (as in AbstractDataset.DEFAULTS).
+DEFAULTS = {"date": "Unknown", "location": "Unknown", "cases": 0}
+
+
+class CaseColumns:
+    """
+    Parallel date / location / cases lists for one batch of records.
+    """
+
+    __slots__ = ("date", "location", "cases")
+
+    def __init__(self, date: List[Any], location: List[Any], cases: List[Any]):
+        """
+        Raises:
+            ValueError: If the columns have different lengths.
+        """
+        if not len(date) == len(location) == len(cases):
+            raise ValueError("Columns must all have the same length.")
+        self.date = date
+        self.location = location
+        self.cases = cases
+
+    def __len__(self):
+        return len(self.cases)
+
+    def __repr__(self):
+        return f"CaseColumns(records={len(self)})"
+
+
+def _field(record, name):
+    """Read a field the way the analyzers always have: attribute first, then dict key."""
+    return getattr(record, name) if hasattr(record, name) else record.get(name, DEFAULTS[name])
+
+
+def as_columns(records: Any) -> CaseColumns:
+    """
+    Convert a batch of records to CaseColumns (a CaseColumns is returned as is).
+
+    Args:
+        records: A CaseColumns; a {'date': [...], 'location': [...],
+            'cases': [...]} column batch (absent columns take the default
+            value); or a sequence of CaseRecord objects, CleanCase tuples
+            or dicts, possibly mixed. Dicts without a field get the
+            DEFAULTS value.
+
+    Example:
+        >>> cols = as_columns([{"date": "2025-01-01", "cases": 4}])
+        >>> cols.date, cols.location, cols.cases
+        (['2025-01-01'], ['Unknown'], [4])
+    """
+    if isinstance(records, CaseColumns):
+        return records
+    if isinstance(records, dict):
+        n = max((len(records[f]) for f in FIELDS if f in records), default=0)
+        return CaseColumns(*(list(records[f]) if f in records else [DEFAULTS[f]] * n
+                             for f in FIELDS))
+
+    kinds = set(map(type, records))
+    if len(kinds) == 1:
+        kind = kinds.pop()
+        if issubclass(kind, dict):
+            return CaseColumns(*(list(map(kind.get, records, repeat(f), repeat(DEFAULTS[f])))
+                                 for f in FIELDS))
+        try:
+            return CaseColumns(*(list(map(attrgetter(f), records)) for f in FIELDS))
+        except AttributeError:
+            pass
+    # Mixed or partial record types: fall back to per-record dispatch.
+    return CaseColumns(*([_field(r, f) for r in records] for f in FIELDS))
+
+
+def is_date_ordered(dates: Sequence[Any]) -> bool:
+    """True if dates never decrease (False when they cannot be compared)."""
+    try:
+        return all(map(le, dates, islice(dates, 1, None)))
+    except TypeError:
+        return False
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
 import csv
 import json
+import logging
 import os
 
+from case_columns import is_date_ordered
+from schema_mapping import RowTransformer, ROW_ERRORS
+
+logger = logging.getLogger(__name__)
+
 class CaseRecord:
     """
     Represents a single health data record.
@@ -18,12 +24,33 @@ class CaseRecord:
 class AbstractDataset(ABC):
     """
     Abstract Base Class defining the interface for all health datasets.
+
+    Rows that fail to parse are quarantined instead of aborting the load:
+    each one is kept (with its line number and the error) in
+    rejected_rows and, if a quarantine_path is given, written there as
+    JSON Lines so it can be fixed and re-ingested with replay_quarantine().
+
+    Field names come from an optional schema_map (source field -> 'date',
+    'location' or 'cases'), compiled once per load into a RowTransformer
+    row function.
     """
-    
-    def __init__(self, source_path):
+
+    # Values used when a source has no such field (subclasses may override).
+    DEFAULTS = {'date': 'Unknown', 'location': 'Unknown', 'cases': 0}
+
+    # Class-level defaults keep datasets pickled before these features existed loadable.
+    quarantine_path = None
+    _rejected = ()
+    _schema = None
+    _order_checked = None
+
+    def __init__(self, source_path, quarantine_path=None, schema_map=None):
         self.source_path = source_path
+        self.quarantine_path = quarantine_path
         # COMPOSITION: The dataset HAS-A list of CaseRecord objects
         self._data = [] 
+        self._rejected = []
+        self._schema = RowTransformer(schema_map, self.DEFAULTS)
         
         if not os.path.exists(source_path):
             raise FileNotFoundError(f"Data file not found: {source_path}")
@@ -42,33 +69,182 @@ class AbstractDataset(ABC):
         """
         pass
 
+    @property
+    def schema(self):
+        """The RowTransformer used to map source fields onto CaseRecords."""
+        if self._schema is None:
+            self._schema = RowTransformer(None, self.DEFAULTS)
+        return self._schema
+
+    def _ingest_row(self, row, line, parse):
+        """Parse and store one row with the compiled `parse`, quarantining failures."""
+        try:
+            self._data.append(parse(row))
+        except ROW_ERRORS as e:
+            self._reject(row, line, e)
+
+    def _reject(self, row, line, error, index=None):
+        """Record a row that could not be parsed.
+
+        `index` is where the row would sit in the records (by default the
+        current record count, i.e. just after the rows loaded before it),
+        so a replay can put it back in file order.
+        """
+        self._rejected.append({
+            "source": self.source_path,
+            "line": line,
+            "index": len(self._data) if index is None else index,
+            "row": row,
+            "error": f"{type(error).__name__}: {error}",
+        })
+
+    def _read_quarantine(self, path):
+        """Entries of a quarantine file, split into (this source's, other sources')."""
+        mine, others = [], []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        (mine if entry.get("source") == self.source_path else others).append(entry)
+        return mine, others
+
+    def _write_quarantine(self, path, entries):
+        with open(path, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def _flush_quarantine(self, start=0):
+        """
+        Make this load's rejected rows (from index `start` on) this source's
+        entries in the quarantine file. Earlier entries for the source are
+        replaced, so loading the same file twice does not duplicate them;
+        other sources' entries are kept.
+        """
+        new_rows = self._rejected[start:]
+        if new_rows:
+            logger.warning("Quarantined %d bad row(s) from %s", len(new_rows), self.source_path)
+        if not self.quarantine_path:
+            return
+        mine, others = self._read_quarantine(self.quarantine_path)
+        if new_rows or mine:
+            self._write_quarantine(self.quarantine_path, others + new_rows)
+
+    @property
+    def rejected_rows(self):
+        """Rows rejected by the most recent load or replay."""
+        return list(self._rejected)
+
+    def replay_quarantine(self, quarantine_path=None):
+        """
+        Re-ingest rows from a quarantine file (usually after fixing them).
+
+        Only entries whose source matches this dataset are replayed. Rows
+        that parse are put back where they were in the file: each entry
+        records the position its row would have had in the loaded records
+        (entries without one, from older files, are appended at the end).
+        The file is rewritten to hold the entries that still fail plus any
+        from other sources.
+
+        Args:
+            quarantine_path (str, optional): Defaults to self.quarantine_path.
+
+        Returns:
+            int: Number of records recovered.
+
+        Raises:
+            ValueError: If no quarantine file is configured.
+        """
+        path = quarantine_path or self.quarantine_path
+        if not path:
+            raise ValueError("No quarantine file configured for this dataset.")
+        if not os.path.exists(path):
+            return 0
+
+        mine, others = self._read_quarantine(path)
+        self._rejected = []
+        recovered = []
+        parse = self.schema.for_mapping()
+        for entry in mine:
+            try:
+                recovered.append((entry.get("index"), parse(entry["row"])))
+            except ROW_ERRORS as e:
+                self._reject(entry["row"], entry["line"], e, entry.get("index"))
+        self._restore(recovered)
+
+        self._write_quarantine(path, others + self._rejected)
+        logger.info("Replayed %d record(s) from %s; %d still quarantined.",
+                    len(recovered), path, len(self._rejected))
+        return len(recovered)
+
+    def _restore(self, recovered):
+        """Put (index, record) pairs back into the records at their original positions."""
+        if not recovered:
+            return
+        if not isinstance(self._data, list):
+            for _, record in recovered:
+                self._data.append(record)
+            return
+        data = self._data
+        end = len(data)
+        # Stable sort: rows that shared a position keep their file order.
+        recovered.sort(key=lambda pair: end if pair[0] is None else min(pair[0], end))
+        merged = []
+        taken = 0
+        for index, record in recovered:
+            index = end if index is None else min(index, end)
+            merged.extend(data[taken:index])
+            merged.append(record)
+            taken = index
+        merged.extend(data[taken:])
+        data[:] = merged
+
     def get_all_records(self):
         """Returns the list of records."""
         return self._data
 
+    @property
+    def sorted_by_date(self):
+        """
+        True if the records are in non-decreasing date order. Checked once
+        per load (re-checked when the record count changes).
+        """
+        size = len(self._data)
+        if self._order_checked is None or self._order_checked[0] != size:
+            self._order_checked = (size, is_date_ordered([r.date for r in self._data]))
+        return self._order_checked[1]
+
 class CSVDataset(AbstractDataset):
     """
     Specialized dataset handler for CSV files.
     """
     
-    def __init__(self, source_path):
-        super().__init__(source_path)
+    def __init__(self, source_path, quarantine_path=None, schema_map=None):
+        super().__init__(source_path, quarantine_path, schema_map)
 
     def load_data(self):
         try:
+            first_bad = len(self._rejected)
             # Simplified open() without explicit encoding
-            with open(self.source_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    record = CaseRecord(
-                        row.get('date', 'Unknown'),
-                        row.get('location', 'Unknown'),
-                        int(row.get('cases', 0))
-                    )
-                    self._data.append(record)
-            print(f"Successfully loaded {len(self._data)} records from CSV.")
-        except ValueError as e:
-            print(f"Error parsing CSV data: {e}")
+            with open(self.source_path, 'r', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    logger.info("CSV file is empty: %s", self.source_path)
+                    return
+                # Header positions and converters are resolved once per file.
+                load = self.schema.header_loader(header)
+
+                def reject(row, position, error):
+                    # Pad short rows so replay sees the missing fields as empty.
+                    padded = row + [None] * (len(header) - len(row))
+                    self._reject(dict(zip(header, padded)), reader.line_num, error)
+
+                load((row for row in reader if row), self._data.append, reject)
+            self._flush_quarantine(first_bad)
+            logger.info("Successfully loaded %d records from CSV.", len(self._data))
+        except (csv.Error, ValueError) as e:
+            logger.error("Error parsing CSV data: %s", e)
 
     def validate_format(self):
         return self.source_path.lower().endswith('.csv')
@@ -77,24 +253,25 @@ class JSONDataset(AbstractDataset):
     """
     Specialized dataset handler for JSON files.
     """
+
+    # JSON entries must carry every field; a missing count is a bad row.
+    DEFAULTS = {}
     
-    def __init__(self, source_path):
-        super().__init__(source_path)
+    def __init__(self, source_path, quarantine_path=None, schema_map=None):
+        super().__init__(source_path, quarantine_path, schema_map)
 
     def load_data(self):
         try:
+            first_bad = len(self._rejected)
             with open(self.source_path, 'r') as f:
                 data = json.load(f)
-                for entry in data:
-                    record = CaseRecord(
-                        entry.get('date'),
-                        entry.get('location'),
-                        int(entry.get('cases'))
-                    )
-                    self._data.append(record)
-            print(f"Successfully loaded {len(self._data)} records from JSON.")
+                # JSON has no reliable line numbers; use the 1-based record position.
+                load = self.schema.mapping_loader()
+                load(data, self._data.append, self._reject)
+            self._flush_quarantine(first_bad)
+            logger.info("Successfully loaded %d records from JSON.", len(self._data))
         except json.JSONDecodeError:
-            print("Failed to decode JSON file.")
+            logger.error("Failed to decode JSON file.")
 
     def validate_format(self):
         return self.source_path.lower().endswith('.json')
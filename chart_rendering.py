@@ -0,0 +1,424 @@
+"""
+chart_rendering.py
+Headless chart rendering for batch jobs.
+
+plot_case_trend_line() is fine for a single interactive chart, but batch
+runs need to write thousands of per-location charts without a display.
+This module draws straight onto Agg canvases (no pyplot, no plt.show()),
+downsamples long series with Largest-Triangle-Three-Buckets so the line
+keeps its visual shape, reuses one Figure per worker process, and spreads
+locations across a process pool. It only ever writes image files.
+"""
+
+import os
+import re
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lazy_imports import lazy_import
+
+mpl_figure = lazy_import("matplotlib.figure")
+mpl_agg = lazy_import("matplotlib.backends.backend_agg")
+
+DEFAULT_MAX_POINTS = 500
+DEFAULT_FIGSIZE = (8, 4)
+DEFAULT_HEATMAP_COLUMNS = 120
+DEFAULT_TILE_ROWS = 100
+
+# One reusable Figure per (process, figsize); cleared between charts.
+_figure_cache = {}
+
+
+def lttb_indices(values: Sequence[float], threshold: int) -> List[int]:
+    """
+    Pick which points to keep using Largest-Triangle-Three-Buckets.
+
+    The x-axis is the position in the sequence, which matches a daily
+    series. The first and last points are always kept.
+
+    Args:
+        values (Sequence[float]): Y values in plotting order.
+        threshold (int): Maximum number of points to keep.
+
+    Returns:
+        list[int]: Sorted indices of the points to keep.
+
+    Raises:
+        ValueError: If threshold is less than 3.
+
+    Example:
+        >>> lttb_indices([0, 5, 0, 0, 9, 0, 0], 4)
+        [0, 1, 4, 6]
+    """
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    n = len(values)
+    if n <= threshold:
+        return list(range(n))
+
+    bucket_size = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the *next* bucket is the third triangle vertex.
+        avg_start = int((i + 1) * bucket_size) + 1
+        avg_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = (avg_start + avg_end - 1) / 2
+        avg_y = sum(values[avg_start:avg_end]) / (avg_end - avg_start)
+
+        range_start = int(i * bucket_size) + 1
+        range_end = int((i + 1) * bucket_size) + 1
+        ay = values[a]
+
+        best, best_area = range_start, -1.0
+        for j in range(range_start, range_end):
+            area = abs((a - avg_x) * (values[j] - ay) - (a - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        kept.append(best)
+        a = best
+
+    kept.append(n - 1)
+    return kept
+
+
+def downsample_series(counts_by_date: Dict[str, float],
+                      max_points: Optional[int] = DEFAULT_MAX_POINTS
+                      ) -> Tuple[List[str], List[float]]:
+    """
+    Sort a date -> count mapping and shrink it to at most max_points.
+
+    Args:
+        counts_by_date (dict): Mapping such as summarize_case_trends()['counts_by_date'].
+        max_points (int, optional): Point budget; None keeps every point.
+
+    Returns:
+        tuple: (dates, counts) lists in date order.
+    """
+    dates = sorted(counts_by_date)
+    counts = [counts_by_date[d] for d in dates]
+    if max_points is None or len(dates) <= max_points:
+        return dates, counts
+
+    keep = lttb_indices(counts, max_points)
+    return [dates[i] for i in keep], [counts[i] for i in keep]
+
+
+def safe_filename(name: str) -> str:
+    """Turn a location name into a filesystem-safe file stem."""
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "_", str(name).strip()).strip("_")
+    return stem or "unknown"
+
+
+def location_stems(locations) -> Dict[str, str]:
+    """
+    Give every location its own file stem.
+
+    safe_filename() folds names such as "St. Louis" and "St  Louis" to the
+    same stem, and case-insensitive filesystems fold "A" and "a". Stems
+    shared by more than one location get a short hash of the location
+    name appended, so no chart overwrites another.
+
+    Args:
+        locations (iterable): Location names.
+
+    Returns:
+        dict: location -> file stem, unique ignoring case.
+
+    Example:
+        >>> location_stems(["St. Louis", "St  Louis", "Boston"])["Boston"]
+        'Boston'
+    """
+    stems = {location: safe_filename(location) for location in locations}
+    shared = {}
+    for stem in stems.values():
+        shared[stem.lower()] = shared.get(stem.lower(), 0) + 1
+    taken = {stem.lower() for stem in stems.values() if shared[stem.lower()] == 1}
+    for location, stem in stems.items():
+        if shared[stem.lower()] == 1:
+            continue
+        unique = f"{stem}-{zlib.crc32(str(location).encode()):08x}"
+        suffix = 1
+        while unique.lower() in taken:
+            suffix += 1
+            unique = f"{stem}-{zlib.crc32(str(location).encode()):08x}-{suffix}"
+        taken.add(unique.lower())
+        stems[location] = unique
+    return stems
+
+
+def _get_figure(figsize):
+    """Return this process's cached Figure for figsize, cleared and ready."""
+    fig = _figure_cache.get(figsize)
+    if fig is None:
+        fig = mpl_figure.Figure(figsize=figsize)
+        mpl_agg.FigureCanvasAgg(fig)
+        _figure_cache[figsize] = fig
+    else:
+        fig.clf()
+    return fig
+
+
+def render_trend_chart(counts_by_date: Dict[str, float], out_path: str,
+                       title: str = "Case Trend Over Time",
+                       max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                       figsize=DEFAULT_FIGSIZE) -> str:
+    """
+    Draw one case-trend line chart to an image file without a display.
+
+    Args:
+        counts_by_date (dict): Mapping of date string to case count.
+        out_path (str): Destination image path (format from extension).
+        title (str): Chart title.
+        max_points (int, optional): Downsampling budget; None plots everything.
+        figsize (tuple): Figure size in inches.
+
+    Returns:
+        str: The path that was written.
+    """
+    dates, counts = downsample_series(counts_by_date, max_points)
+
+    fig = _get_figure(tuple(figsize))
+    ax = fig.add_subplot(1, 1, 1)
+    ax.plot(range(len(dates)), counts, marker='o' if len(dates) <= 60 else None)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Cases")
+    ax.set_title(title)
+
+    # Label at most ~12 evenly spaced ticks so long series stay readable.
+    if dates:
+        step = max(1, len(dates) // 12)
+        ticks = list(range(0, len(dates), step))
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([dates[i] for i in ticks], rotation=45, ha="right")
+
+    fig.tight_layout()
+    fig.savefig(out_path)
+    return out_path
+
+
+def _render_batch(batch, out_dir, max_points, figsize, fmt):
+    """Worker entry point: render a list of (location, file stem, series) triples."""
+    written = []
+    for location, stem, series in batch:
+        path = os.path.join(out_dir, f"{stem}.{fmt}")
+        render_trend_chart(series, path, title=f"Case Trend: {location}",
+                           max_points=max_points, figsize=figsize)
+        written.append((location, path))
+    return written
+
+
+def render_location_charts(series_by_location: Dict[str, Dict[str, float]],
+                           out_dir: str,
+                           max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                           workers: Optional[int] = None,
+                           figsize=DEFAULT_FIGSIZE,
+                           fmt: str = "png") -> Dict[str, str]:
+    """
+    Render one trend chart per location, in parallel, into out_dir.
+
+    Args:
+        series_by_location (dict): location -> {date: cases}.
+        out_dir (str): Directory to write images into (created if needed).
+        max_points (int, optional): Per-chart downsampling budget.
+        workers (int, optional): Process count; 1 renders in-process.
+            Defaults to os.cpu_count().
+        figsize (tuple): Figure size in inches.
+        fmt (str): Image format / file extension.
+
+    Returns:
+        dict: location -> written file path. Files are named by
+        location_stems(), so every location gets its own file.
+
+    Raises:
+        TypeError: If series_by_location is not a dictionary.
+        ValueError: If workers is less than 1.
+    """
+    if not isinstance(series_by_location, dict):
+        raise TypeError("series_by_location must be a dictionary")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    os.makedirs(out_dir, exist_ok=True)
+    stems = location_stems(series_by_location)
+    items = [(location, stems[location], series)
+             for location, series in series_by_location.items()]
+    if not items:
+        return {}
+
+    figsize = tuple(figsize)
+    if workers == 1 or len(items) == 1:
+        return dict(_render_batch(items, out_dir, max_points, figsize, fmt))
+
+    # A few batches per worker keeps the pool busy without per-chart IPC.
+    n_batches = min(len(items), workers * 4)
+    batches = [items[i::n_batches] for i in range(n_batches)]
+
+    written = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_batch, b, out_dir, max_points, figsize, fmt)
+                   for b in batches]
+        for future in futures:
+            written.update(future.result())
+    return written
+
+
+def _field(record, name):
+    """Read a field from a CaseRecord or a dict."""
+    return getattr(record, name) if hasattr(record, name) else record.get(name)
+
+
+def build_case_matrix(records) -> Tuple[List[str], List[str], List[array]]:
+    """
+    Aggregate records into a location x date matrix of summed cases.
+
+    Rows are compact integer arrays, so a 3,000-location by 2-year grid
+    takes roughly 17 MB instead of millions of Python ints in dicts.
+
+    Args:
+        records (list): CaseRecord objects or dicts with 'date', 'location', 'cases'.
+
+    Returns:
+        tuple: (locations, dates, rows) where rows[i][j] is the case total
+        for locations[i] on dates[j]. Both label lists are sorted.
+
+    Example:
+        >>> build_case_matrix([{"date": "2025-01-01", "location": "A", "cases": 3}])
+        (['A'], ['2025-01-01'], [array('q', [3])])
+    """
+    locations, dates = set(), set()
+    for r in records:
+        locations.add(_field(r, "location"))
+        dates.add(_field(r, "date"))
+    locations.discard(None)
+    dates.discard(None)
+
+    locations, dates = sorted(locations), sorted(dates)
+    loc_index = {loc: i for i, loc in enumerate(locations)}
+    date_index = {d: j for j, d in enumerate(dates)}
+    rows = [array('q', bytes(8 * len(dates))) for _ in locations]
+
+    for r in records:
+        i = loc_index.get(_field(r, "location"))
+        j = date_index.get(_field(r, "date"))
+        if i is not None and j is not None:
+            rows[i][j] += int(_field(r, "cases") or 0)
+
+    return locations, dates, rows
+
+
+def bin_date_columns(dates: List[str], rows: List[array],
+                     max_columns: int = DEFAULT_HEATMAP_COLUMNS
+                     ) -> Tuple[List[str], List[array]]:
+    """
+    Sum adjacent date columns so the matrix is at most max_columns wide.
+
+    Args:
+        dates (list[str]): Column labels in order.
+        rows (list[array]): Matrix rows from build_case_matrix.
+        max_columns (int): Column budget.
+
+    Returns:
+        tuple: (labels, binned_rows). Each label is the first date of its bin.
+
+    Raises:
+        ValueError: If max_columns is less than 1.
+    """
+    if max_columns < 1:
+        raise ValueError("max_columns must be at least 1")
+    if len(dates) <= max_columns:
+        return dates, rows
+
+    width = -(-len(dates) // max_columns)  # ceiling division
+    labels = dates[::width]
+    binned = []
+    for row in rows:
+        binned.append(array('q', (sum(row[k:k + width]) for k in range(0, len(row), width))))
+    return labels, binned
+
+
+def tile_path(output_path: str, tile_number: int, tile_count: int) -> str:
+    """Return the file path for one tile of a multi-file heatmap."""
+    if tile_count <= 1:
+        return output_path
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_part{tile_number:03d}{ext or '.png'}"
+
+
+def render_heatmap(locations: List[str], dates: List[str], rows: List[array],
+                   output_path: str,
+                   max_columns: int = DEFAULT_HEATMAP_COLUMNS,
+                   tile_rows: int = DEFAULT_TILE_ROWS,
+                   title: str = "Location and Date of Cases") -> List[str]:
+    """
+    Render a location x date case matrix as one or more heatmap images.
+
+    Wide date ranges are binned down to max_columns; more than tile_rows
+    locations are split across numbered tiles (heatmap_part001.png, ...)
+    so each image stays legible and only one tile is drawn at a time.
+
+    Args:
+        locations (list[str]): Row labels.
+        dates (list[str]): Column labels.
+        rows (list[array]): Matrix rows (see build_case_matrix).
+        output_path (str): Image path; tiles get a _partNNN suffix.
+        max_columns (int): Maximum date columns per image.
+        tile_rows (int): Maximum locations per image.
+        title (str): Chart title.
+
+    Returns:
+        list[str]: Paths of the images written.
+    """
+    if tile_rows < 1:
+        raise ValueError("tile_rows must be at least 1")
+    if not locations or not dates:
+        return []
+
+    labels, rows = bin_date_columns(dates, rows, max_columns)
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    tile_count = -(-len(locations) // tile_rows)
+    written = []
+    for t in range(tile_count):
+        start = t * tile_rows
+        tile_locs = locations[start:start + tile_rows]
+        tile = [list(r) for r in rows[start:start + tile_rows]]
+
+        height = max(3.0, min(0.15 * len(tile_locs) + 1.5, 40.0))
+        fig = _get_figure((10.0, round(height, 1)))
+        ax = fig.add_subplot(1, 1, 1)
+        image = ax.imshow(tile, aspect="auto", cmap="YlOrRd", interpolation="nearest")
+        fig.colorbar(image, ax=ax, label="Cases")
+
+        ax.set_yticks(range(len(tile_locs)))
+        ax.set_yticklabels(tile_locs, fontsize=max(4, 10 - len(tile_locs) // 20))
+        step = max(1, len(labels) // 12)
+        ax.set_xticks(range(0, len(labels), step))
+        ax.set_xticklabels(labels[::step], rotation=45, ha="right")
+
+        # Cell annotations only make sense on small grids.
+        if len(tile_locs) * len(labels) <= 400:
+            for i, row in enumerate(tile):
+                for j, value in enumerate(row):
+                    ax.text(j, i, str(value), ha="center", va="center", fontsize=7)
+
+        suffix = f" ({t + 1}/{tile_count})" if tile_count > 1 else ""
+        ax.set_title(title + suffix)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Location")
+        fig.tight_layout()
+
+        path = tile_path(output_path, t + 1, tile_count)
+        fig.savefig(path)
+        written.append(path)
+
+    return written
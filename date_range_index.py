@@ -0,0 +1,172 @@
+"""
+date_range_index.py
+Prefix-sum index for "cases in location L between d1 and d2" queries.
+
+Each location keeps its daily totals keyed by day ordinal, plus a sorted
+array of days and a running (prefix) sum over them. A range total is two
+bisects and one subtraction, instead of a scan over every record.
+In-order appends extend the arrays directly. An out-of-order append marks
+the location stale, and its arrays are rebuilt on the next query.
+"""
+
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+DateLike = Union[str, datetime.date, int]
+
+
+def _field(record, name):
+    """Read a field from a CaseRecord or a dict."""
+    return record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+
+
+class _LocationSeries:
+    """Daily totals for one location, with lazily rebuilt prefix sums."""
+
+    __slots__ = ("daily", "days", "prefix", "stale")
+
+    def __init__(self):
+        self.daily: Dict[int, int] = {}
+        self.days = array("q")
+        self.prefix = array("q", [0])
+        self.stale = False
+
+    def add(self, day: int, cases: int):
+        self.daily[day] = self.daily.get(day, 0) + cases
+        if self.stale:
+            return
+        days = self.days
+        if not days or day > days[-1]:
+            days.append(day)
+            self.prefix.append(self.prefix[-1] + cases)
+        elif day == days[-1]:
+            self.prefix[-1] += cases
+        else:
+            self.stale = True
+
+    def rebuild(self):
+        self.days = array("q", sorted(self.daily))
+        prefix = array("q", [0])
+        running = 0
+        for day in self.days:
+            running += self.daily[day]
+            prefix.append(running)
+        self.prefix = prefix
+        self.stale = False
+
+
+class DateRangeIndex:
+    """
+    Per-location cumulative daily case counts for O(log n) range totals.
+    """
+
+    def __init__(self, records: Optional[Iterable[Any]] = None, locations=None):
+        """
+        Args:
+            records (iterable, optional): CaseRecords or dicts with date,
+                location and cases, indexed right away.
+            locations (LocationRegistry, optional): Normalizes location
+                names on add and on query, so spellings share one series.
+        """
+        self._series: Dict[str, _LocationSeries] = {}
+        self._ordinals: Dict[Any, int] = {}
+        self._locations = locations
+        self.skipped = 0
+        if records is not None:
+            self.extend(records)
+
+    def __len__(self):
+        return len(self._series)
+
+    def _day(self, value: DateLike) -> int:
+        """Day ordinal for an ISO date string, a date, or an ordinal."""
+        if isinstance(value, int):
+            return value
+        day = self._ordinals.get(value)
+        if day is None:
+            if isinstance(value, datetime.date):
+                day = value.toordinal()
+            else:
+                day = datetime.date.fromisoformat(str(value).strip()).toordinal()
+            self._ordinals[value] = day
+        return day
+
+    def _key(self, location: str) -> str:
+        return self._locations.normalize(location) if self._locations is not None else location
+
+    def add(self, date: DateLike, location: str, cases: int):
+        """
+        Add one day's cases for a location. Dates may arrive in any order.
+
+        Raises:
+            ValueError: If date is not an ISO date or cases is not a number.
+        """
+        day = self._day(date)
+        cases = int(cases)
+        key = self._key(location)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _LocationSeries()
+        series.add(day, cases)
+
+    def extend(self, records: Iterable[Any]) -> int:
+        """
+        Index many records. Rows with an unreadable date or count are
+        skipped and counted in self.skipped.
+
+        Returns:
+            int: Number of records indexed.
+        """
+        added = 0
+        for record in records:
+            try:
+                self.add(_field(record, "date"), _field(record, "location"),
+                         _field(record, "cases"))
+            except (TypeError, ValueError):
+                self.skipped += 1
+                continue
+            added += 1
+        return added
+
+    def _ready(self, location: str) -> Optional[_LocationSeries]:
+        series = self._series.get(self._key(location))
+        if series is not None and series.stale:
+            series.rebuild()
+        return series
+
+    def range_total(self, location: str, start: Optional[DateLike] = None,
+                    end: Optional[DateLike] = None) -> int:
+        """
+        Total cases for a location with start <= date <= end.
+
+        Either bound may be None for an open range. Unknown locations total 0.
+
+        Example:
+            >>> index = DateRangeIndex([{"date": "2025-01-03", "location": "A", "cases": 5},
+            ...                         {"date": "2025-01-01", "location": "A", "cases": 2}])
+            >>> index.range_total("A", "2025-01-01", "2025-01-02")
+            2
+        """
+        series = self._ready(location)
+        if series is None:
+            return 0
+        days = series.days
+        lo = 0 if start is None else bisect_left(days, self._day(start))
+        hi = len(days) if end is None else bisect_right(days, self._day(end))
+        if hi <= lo:
+            return 0
+        return series.prefix[hi] - series.prefix[lo]
+
+    def locations(self) -> List[str]:
+        """Indexed location names, sorted."""
+        return sorted(self._series)
+
+    def date_span(self, location: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+        """First and last indexed date for a location, or None."""
+        series = self._ready(location)
+        if series is None or not series.days:
+            return None
+        return (datetime.date.fromordinal(series.days[0]),
+                datetime.date.fromordinal(series.days[-1]))
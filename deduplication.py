@@ -0,0 +1,197 @@
+"""
+deduplication.py
+Cross-source deduplication of (date, location) case records.
+
+Overlapping CSV/JSON/XML exports often repeat the same day for the same
+location. The Deduplicator collapses records that share a hashed
+(date, location) key using a conflict policy:
+
+    'latest' - the record from the most recently added source wins
+    'max'    - keep the record with the larger case count
+    'sum'    - add the case counts together (partial feeds)
+
+For streams too large for an exact key table, mode='bloom' keeps a
+fixed-size Bloom filter and passes only the first record for each key.
+Memory stays bounded, but a false positive can drop a genuinely new
+record at roughly the configured error_rate.
+"""
+
+import hashlib
+import math
+from typing import Any, Dict, Iterable, Iterator, List
+
+from case_data_manager import CaseRecord
+
+POLICIES = ("latest", "max", "sum")
+
+
+def _field(record, name):
+    """Read a field from a CaseRecord or a dict."""
+    return getattr(record, name) if hasattr(record, name) else record.get(name)
+
+
+def record_key(date, location) -> int:
+    """
+    Hash a (date, location) pair into a 64-bit integer key.
+
+    Location case and surrounding whitespace are ignored so 'boston ' and
+    'Boston' collide as the same place.
+
+    Example:
+        >>> record_key("2025-01-01", "Boston") == record_key("2025-01-01", " boston")
+        True
+    """
+    material = f"{date}\x1f{str(location).strip().casefold()}".encode()
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "big")
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of integer keys.
+    """
+
+    def __init__(self, expected_items: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            expected_items (int): Keys the filter is sized for.
+            error_rate (float): Target false-positive probability at that size.
+
+        Raises:
+            ValueError: If expected_items < 1 or error_rate is not in (0, 1).
+        """
+        if expected_items < 1:
+            raise ValueError("expected_items must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.expected_items = expected_items
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-expected_items * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / expected_items * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: int):
+        # Double hashing: derive k bit positions from two 64-bit halves.
+        digest = hashlib.blake2b(key.to_bytes(8, "big"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: int) -> bool:
+        """Insert key. Returns True if it was (probably) already present."""
+        present = True
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                present = False
+                self._bits[byte] |= 1 << bit
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, key: int) -> bool:
+        return all(self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_error_rate(self) -> float:
+        """False-positive probability at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class Deduplicator:
+    """
+    Collapses duplicate (date, location) records across sources.
+    """
+
+    def __init__(self, policy: str = "latest", mode: str = "exact",
+                 expected_items: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            policy (str): 'latest', 'max' or 'sum' (exact mode only).
+            mode (str): 'exact' (hash table of keys) or 'bloom' (bounded memory,
+                first record per key wins).
+            expected_items (int): Bloom filter sizing.
+            error_rate (float): Bloom filter false-positive target.
+
+        Raises:
+            ValueError: For unknown policy/mode combinations.
+        """
+        if mode not in ("exact", "bloom"):
+            raise ValueError("mode must be 'exact' or 'bloom'")
+        if mode == "exact" and policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.policy = policy if mode == "exact" else "first"
+        self.mode = mode
+        self.expected_items = expected_items
+        self.error_rate = error_rate
+        self.stats = {"input": 0, "output": 0, "duplicates": 0}
+
+    def merge(self, sources: Iterable[Iterable[Any]]) -> List[Any]:
+        """
+        Deduplicate records from several sources, given oldest first.
+
+        Args:
+            sources (iterable): One record list per source, in the order the
+                sources were added (later sources count as 'latest').
+
+        Returns:
+            list: One record per key, in first-seen key order. 'sum' results
+            are new records; inputs are never modified.
+        """
+        if self.mode == "bloom":
+            return list(self.stream(r for source in sources for r in source))
+
+        winners: Dict[int, Any] = {}
+        seen = 0
+        for source in sources:
+            for record in source:
+                seen += 1
+                key = record_key(_field(record, "date"), _field(record, "location"))
+                current = winners.get(key)
+                if current is None:
+                    winners[key] = record
+                elif self.policy == "latest":
+                    winners[key] = record
+                elif self.policy == "max":
+                    if (_field(record, "cases") or 0) > (_field(current, "cases") or 0):
+                        winners[key] = record
+                else:  # sum
+                    winners[key] = _with_cases(current, (_field(current, "cases") or 0)
+                                               + (_field(record, "cases") or 0))
+
+        self.stats = {"input": seen, "output": len(winners), "duplicates": seen - len(winners)}
+        return list(winners.values())
+
+    def stream(self, records: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yield the first record for each key from an unbounded stream.
+
+        Uses a Bloom filter in 'bloom' mode (bounded memory) and an exact
+        key set otherwise.
+        """
+        seen = BloomFilter(self.expected_items, self.error_rate) if self.mode == "bloom" else set()
+        self.stats = {"input": 0, "output": 0, "duplicates": 0}
+        for record in records:
+            self.stats["input"] += 1
+            key = record_key(_field(record, "date"), _field(record, "location"))
+            if self.mode == "bloom":
+                duplicate = seen.add(key)
+            else:
+                duplicate = key in seen
+                seen.add(key)
+            if duplicate:
+                self.stats["duplicates"] += 1
+                continue
+            self.stats["output"] += 1
+            yield record
+
+
+def _with_cases(record, cases):
+    """Copy of record with a new case count (CaseRecord or dict)."""
+    if isinstance(record, dict):
+        return {**record, "cases": cases}
+    return CaseRecord(record.date, record.location, cases)
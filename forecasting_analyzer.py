@@ -4,11 +4,15 @@ Project 3: Concrete Implementation of an Analyzer.
 Inherits from AbstractAnalyzer (defined by Kindness).
 """
 
+from itertools import repeat
 from statistics import mean
-from analysis_modules import AbstractAnalyzer
+from analysis_modules import AbstractAnalyzer, exact_mean
+from case_columns import as_columns
 
 class ForecastingAnalyzer(AbstractAnalyzer):
-    
+
+    accepts_columns = True
+
     def __init__(self, days_ahead=7):
         self.days_ahead = days_ahead
 
@@ -16,29 +20,89 @@ class ForecastingAnalyzer(AbstractAnalyzer):
         """
         Process records and predict future cases.
         """
-        # Extract numerical case data safely
-        case_counts = []
-        for r in records:
-            # Handle both CaseRecord objects and dicts
-            val = r.cases if hasattr(r, 'cases') else r.get('cases', 0)
-            if isinstance(val, (int, float)):
-                case_counts.append(val)
+        # Extract numerical case data safely (CaseRecords, dicts or a CaseColumns batch)
+        case_counts = [val for val in as_columns(records).cases if isinstance(val, (int, float))]
         
         if len(case_counts) < 2:
             return {"error": "Insufficient data for prediction"}
 
-        changes = [case_counts[i] - case_counts[i-1] for i in range(1, len(case_counts))]
-        avg_change = mean(changes) if changes else 0
+        if all(map(isinstance, case_counts, repeat(int))):
+            # Integer changes telescope exactly (see partial()).
+            avg_change = exact_mean(case_counts[-1] - case_counts[0], len(case_counts) - 1)
+        else:
+            changes = [case_counts[i] - case_counts[i-1] for i in range(1, len(case_counts))]
+            avg_change = mean(changes)
+        return self._forecast(len(case_counts), case_counts[-1], avg_change)
+
+    def analyze_stream(self, store):
+        """
+        analyze() for records in a SpillStore, read in input order from disk.
+        """
+        def values():
+            for row in store.rows():
+                if isinstance(row[3], (int, float)):
+                    yield row[3]
+
+        count = 0
+        first = last = None
+        all_int = True
+        for val in values():
+            if first is None:
+                first = val
+            last = val
+            count += 1
+            all_int = all_int and isinstance(val, int)
+        if count < 2:
+            return {"error": "Insufficient data for prediction"}
+
+        if all_int:
+            avg_change = exact_mean(last - first, count - 1)
+        else:
+            # A second pass pairs each value with the one before it.
+            following = values()
+            next(following)
+            avg_change = mean(b - a for a, b in zip(values(), following))
+        return self._forecast(count, last, avg_change)
+
+    def partial(self, records: list, positions):
+        """
+        Shard-side state for combine(). The mean of consecutive changes
+        telescopes to (last - first) / (n - 1), so each shard only needs its
+        count and its first and last counts with their input positions.
+        """
+        first = last = None
+        count = 0
+        for val, position in zip(as_columns(records).cases, positions):
+            if isinstance(val, (int, float)):
+                count += 1
+                if first is None:
+                    first = (position, val)
+                last = (position, val)
+        return {"count": count, "first": first, "last": last}
+
+    def combine(self, partials: list):
+        """Merge shard partials into what analyze() returns for all records."""
+        partials = [p for p in partials if p["count"]]
+        count = sum(p["count"] for p in partials)
+        if count < 2:
+            return {"error": "Insufficient data for prediction"}
+        first = min(p["first"] for p in partials)[1]
+        last = max(p["last"] for p in partials)[1]
+        if isinstance(first, int) and isinstance(last, int):
+            avg_change = exact_mean(last - first, count - 1)
+        else:
+            avg_change = (last - first) / (count - 1)
+        return self._forecast(count, last, avg_change)
 
+    def _forecast(self, count, last_val, avg_change):
         predictions = []
-        last_val = case_counts[-1]
         for _ in range(self.days_ahead):
             next_val = max(0, int(last_val + avg_change))
             predictions.append(next_val)
             last_val = next_val
 
         return {
-            "historical_count": len(case_counts),
+            "historical_count": count,
             "average_daily_change": round(avg_change, 2),
             "future_predictions": predictions
         }
@@ -1,3 +1,6 @@
+from array import array
+
+
 def is_valid_location(location: str) -> bool:
     """Validate that a location name is non-empty and alphabetic.
 
@@ -25,6 +28,24 @@ def is_valid_location(location: str) -> bool:
     return bool(location) and all(ch.isalpha() or ch.isspace() for ch in location)
 
 
+# Sentinel for ages that cannot be read; normalize_age has always returned -1.
+MISSING_AGE = -1
+
+
+def _parse_age_text(text: str) -> int:
+    """Parse "25" or "20-30" (midpoint, rounded down); MISSING_AGE otherwise."""
+    text = text.strip()
+    if "-" in text:
+        try:
+            start, end = map(int, text.split("-"))
+            return (start + end) // 2
+        except ValueError:
+            return MISSING_AGE
+    elif text.isdigit():
+        return int(text)
+    return MISSING_AGE
+
+
 def normalize_age(age_value) -> int:
     """Normalize different age input formats into a single integer value.
 
@@ -48,14 +69,39 @@ def normalize_age(age_value) -> int:
         return age_value
 
     if isinstance(age_value, str):
-        age_value = age_value.strip()
-        if "-" in age_value:
-            try:
-                start, end = map(int, age_value.split("-"))
-                return (start + end) // 2
-            except ValueError:
-                return -1
-        elif age_value.isdigit():
-            return int(age_value)
-
-    return -1
+        return _parse_age_text(age_value)
+
+    return MISSING_AGE
+
+
+def normalize_ages(values, sentinel: int = MISSING_AGE) -> array:
+    """Normalize a whole column of ages at once.
+
+    Same rules as normalize_age, but each distinct value is parsed only
+    once. Feeds repeat a handful of age bands, so the column becomes a
+    lookup table plus one C-level map over the values.
+
+    Args:
+        values (iterable): Ages as ints, digit strings, range strings or None.
+        sentinel (int): Stored for values that cannot be read.
+
+    Returns:
+        array('i'): One age per input value.
+
+    Examples:
+        >>> list(normalize_ages(["20-30", 40, None, "40", "n/a"]))
+        [25, 40, -1, 40, -1]
+    """
+    values = values if isinstance(values, list) else list(values)
+    try:
+        table = {value: normalize_age(value) for value in set(values)}
+    except TypeError:
+        # Unhashable entries (lists, dicts) cannot be table keys; parse one by one.
+        return array("i", (_age_or(normalize_age(value), sentinel) for value in values))
+    if sentinel != MISSING_AGE:
+        table = {value: _age_or(age, sentinel) for value, age in table.items()}
+    return array("i", map(table.__getitem__, values))
+
+
+def _age_or(age: int, sentinel: int) -> int:
+    return sentinel if age == MISSING_AGE else age
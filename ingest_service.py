@@ -0,0 +1,227 @@
+"""
+ingest_service.py
+asyncio service that ingests case files dropped into a spool directory.
+
+An upstream process drops CSV/JSON/XML files into a directory. The
+service polls it, waits until each new file has stopped growing, parses
+it in an executor through PipelineManager.add_dataset (so profiling and
+quarantine behave as usual), and pushes the parsed records through a
+bounded queue to the analyzers and any registered callbacks. When
+consumers fall behind, the bounded queues make the parser and then the
+watcher wait instead of buffering without limit.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from case_data_manager import CSVDataset, JSONDataset
+from xml_dataset import XMLDataset
+
+logger = logging.getLogger(__name__)
+
+DATASET_TYPES = {
+    ".csv": CSVDataset,
+    ".json": JSONDataset,
+    ".xml": XMLDataset,
+}
+
+# Upstream writers use these for in-progress files.
+_PARTIAL_SUFFIXES = (".tmp", ".part", ".partial")
+
+
+class DropDirectoryIngestor:
+    """
+    Watches a directory and incrementally feeds new files into a PipelineManager.
+    """
+
+    def __init__(self, manager, watch_dir: str, poll_interval: float = 1.0,
+                 queue_size: int = 8, chunk_size: int = 5000,
+                 workers: Optional[int] = None, processed_dir: Optional[str] = None,
+                 run_analyzers: bool = True):
+        """
+        Args:
+            manager (PipelineManager): Receives each parsed dataset.
+            watch_dir (str): Spool directory to watch.
+            poll_interval (float): Seconds between directory scans.
+            queue_size (int): Bound for both the file queue and the record-chunk
+                queue; this is the backpressure limit.
+            chunk_size (int): Records per chunk handed to consumers.
+            workers (int, optional): Parser threads (default: min(4, cpu count)).
+            processed_dir (str, optional): Move files here once ingested.
+                Without it, files are remembered by name, size and mtime.
+            run_analyzers (bool): Run the manager's analyzers on each new file's
+                records and pass the results to on_results callbacks.
+
+        Raises:
+            FileNotFoundError: If watch_dir does not exist.
+            ValueError: If queue_size or chunk_size is less than 1.
+        """
+        if not os.path.isdir(watch_dir):
+            raise FileNotFoundError(f"Watch directory not found: {watch_dir}")
+        if queue_size < 1 or chunk_size < 1:
+            raise ValueError("queue_size and chunk_size must be at least 1")
+
+        self.manager = manager
+        self.watch_dir = watch_dir
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.processed_dir = processed_dir
+        self.run_analyzers = run_analyzers
+
+        self._record_callbacks: List[Callable[[str, list], Any]] = []
+        self._result_callbacks: List[Callable[[str, Dict[str, Any]], Any]] = []
+        self._seen = set()
+        self._sizes = {}
+        self._stop = None
+        self.files_ingested = 0
+        self.records_ingested = 0
+
+    # --- Callbacks ---
+    def on_records(self, callback: Callable[[str, list], Any]):
+        """Call callback(path, records_chunk) for every chunk of new records."""
+        self._record_callbacks.append(callback)
+
+    def on_results(self, callback: Callable[[str, Dict[str, Any]], Any]):
+        """Call callback(path, analyzer_results) once per ingested file."""
+        self._result_callbacks.append(callback)
+
+    # --- Directory scanning ---
+    def _file_key(self, path: str):
+        st = os.stat(path)
+        return (os.path.basename(path), st.st_size, st.st_mtime_ns)
+
+    def _ready_files(self) -> List[str]:
+        """
+        New, supported files whose size has not changed since the last scan.
+        A file seen for the first time is only recorded, so half-written
+        files are not picked up.
+        """
+        ready = []
+        for name in sorted(os.listdir(self.watch_dir)):
+            path = os.path.join(self.watch_dir, name)
+            ext = os.path.splitext(name)[1].lower()
+            if name.startswith(".") or name.endswith(_PARTIAL_SUFFIXES) or ext not in DATASET_TYPES:
+                continue
+            if not os.path.isfile(path):
+                continue
+            try:
+                key = self._file_key(path)
+            except FileNotFoundError:
+                continue
+            if key in self._seen:
+                continue
+            if self._sizes.get(path) == key[1]:
+                ready.append(path)
+                self._seen.add(key)
+                self._sizes.pop(path, None)
+            else:
+                self._sizes[path] = key[1]
+        return ready
+
+    # --- Pipeline tasks ---
+    async def _watch(self, files: asyncio.Queue, once: bool):
+        while not self._stop.is_set():
+            for path in self._ready_files():
+                await files.put(path)          # waits when parsers are behind
+            if once and not self._sizes:
+                break
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _parse(self, path: str):
+        """Runs in the executor: load the file through the manager."""
+        dataset = DATASET_TYPES[os.path.splitext(path)[1].lower()](path)
+        self.manager.add_dataset(dataset)
+        return dataset.get_all_records()
+
+    async def _parse_files(self, files: asyncio.Queue, chunks: asyncio.Queue, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            path = await files.get()
+            try:
+                if path is None:
+                    return
+                records = await loop.run_in_executor(executor, self._parse, path)
+                for start in range(0, len(records), self.chunk_size):
+                    await chunks.put((path, records[start:start + self.chunk_size], False))
+                await chunks.put((path, records, True))
+            except Exception as e:
+                logger.error("Failed to ingest %s: %s", path, e)
+            finally:
+                files.task_done()
+
+    async def _consume(self, chunks: asyncio.Queue, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await chunks.get()
+            try:
+                if item is None:
+                    return
+                path, records, file_done = item
+                if not file_done:
+                    self.records_ingested += len(records)
+                    for callback in self._record_callbacks:
+                        await _maybe_await(callback(path, records))
+                    continue
+
+                if self.run_analyzers and records:
+                    results = await loop.run_in_executor(
+                        executor, self.manager.analyze_records, records)
+                    for callback in self._result_callbacks:
+                        await _maybe_await(callback(path, results))
+                self._finish_file(path)
+            except Exception as e:
+                logger.error("Consumer error: %s", e)
+            finally:
+                chunks.task_done()
+
+    def _finish_file(self, path: str):
+        self.files_ingested += 1
+        if self.processed_dir:
+            os.makedirs(self.processed_dir, exist_ok=True)
+            shutil.move(path, os.path.join(self.processed_dir, os.path.basename(path)))
+        logger.info("Ingested %s", path)
+
+    async def run(self, once: bool = False):
+        """
+        Run the watcher, parsers and consumer until stop() is called.
+
+        Args:
+            once (bool): Ingest whatever is in the directory, then return.
+                Useful for tests and as a drop-in replacement for a cron run.
+        """
+        self._stop = asyncio.Event()
+        files = asyncio.Queue(maxsize=self.queue_size)
+        chunks = asyncio.Queue(maxsize=self.queue_size)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            parsers = [asyncio.create_task(self._parse_files(files, chunks, executor))
+                       for _ in range(self.workers)]
+            consumer = asyncio.create_task(self._consume(chunks, executor))
+            try:
+                await self._watch(files, once)
+            finally:
+                for _ in parsers:
+                    await files.put(None)
+                await asyncio.gather(*parsers)
+                await chunks.put(None)
+                await consumer
+
+    def stop(self):
+        """Ask a running service to finish its queued work and return."""
+        if self._stop is not None:
+            self._stop.set()
+
+
+async def _maybe_await(value):
+    """Let callbacks be plain functions or coroutines."""
+    if asyncio.iscoroutine(value):
+        await value
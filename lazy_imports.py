@@ -0,0 +1,88 @@
+"""
+lazy_imports.py
+Deferred loading for heavy optional dependencies.
+
+Plotting and dataframe libraries (matplotlib, pandas, seaborn) take far
+longer to import than the rest of the pipeline put together. Modules that
+need them call lazy_import() at the top of the file instead of importing
+directly, so the real import only happens the first time an attribute is
+used. Ingest-and-alert runs that never plot never pay for it.
+"""
+
+import importlib
+from typing import Dict
+
+# Friendly install hints for the optional dependencies we know about.
+_INSTALL_HINTS = {
+    "matplotlib": "pip install matplotlib",
+    "pandas": "pip install pandas",
+    "seaborn": "pip install seaborn",
+    "numpy": "pip install numpy",
+}
+
+_registry: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    """
+
+    def __init__(self, module_name: str):
+        """
+        Args:
+            module_name (str): Dotted module path, e.g. 'matplotlib.pyplot'.
+        """
+        if not isinstance(module_name, str) or not module_name:
+            raise ValueError("module_name must be a non-empty string.")
+        self._module_name = module_name
+        self._module = None
+
+    def _load(self):
+        """Import the real module (once) and return it."""
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._module_name)
+            except ImportError as e:
+                root = self._module_name.split(".")[0]
+                hint = _INSTALL_HINTS.get(root, f"pip install {root}")
+                raise ImportError(
+                    f"'{self._module_name}' is required for this feature ({hint})."
+                ) from e
+        return self._module
+
+    def __getattr__(self, attr):
+        # Only called for names not found on the proxy itself. Dunder lookups
+        # (copy, pickle, inspect and doctest probe for these) must not import.
+        if attr.startswith("__") and attr.endswith("__"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the underlying module has actually been imported."""
+        return self._module is not None
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"LazyModule('{self._module_name}', {state})"
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    """
+    Return a shared LazyModule proxy for module_name.
+
+    Args:
+        module_name (str): Dotted module path to defer.
+
+    Returns:
+        LazyModule: Proxy that imports the module on first use.
+
+    Example:
+        >>> plt = lazy_import("matplotlib.pyplot")
+        >>> plt.is_loaded
+        False
+    """
+    if module_name not in _registry:
+        _registry[module_name] = LazyModule(module_name)
+    return _registry[module_name]
@@ -0,0 +1,144 @@
+"""
+location_registry.py
+Cached location normalization with interned names and integer IDs.
+
+Feeds repeat a few thousand distinct location strings across millions
+of rows. A LocationRegistry normalizes each raw spelling once
+(strip + title case, then an optional gazetteer alias lookup) and
+remembers the result. Every later row costs one dict lookup. Canonical
+names are interned, and each one gets a small stable integer ID for
+compact integer-keyed storage.
+
+Gazetteer files map aliases to canonical names:
+    CSV:  alias,canonical        (header row required)
+    JSON: {"alias": "canonical", ...}
+"""
+
+import csv
+import json
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from helper_utils import is_valid_location
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def load_gazetteer(path: str) -> Dict[str, str]:
+    """
+    Read an alias -> canonical location map from a CSV or JSON file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: For an unsupported extension or a CSV without
+            'alias' and 'canonical' columns.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Gazetteer not found: {path}")
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path) as f:
+            return {str(k): str(v) for k, v in json.load(f).items()}
+    if ext == ".csv":
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            if not {"alias", "canonical"} <= set(reader.fieldnames or ()):
+                raise ValueError("Gazetteer CSV needs 'alias' and 'canonical' columns.")
+            return {row["alias"]: row["canonical"] for row in reader if row["alias"]}
+    raise ValueError(f"Unsupported gazetteer format: {ext}")
+
+
+class LocationRegistry:
+    """
+    Raw location string -> canonical interned name and integer ID.
+    """
+
+    def __init__(self, gazetteer: Optional[object] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            gazetteer (dict | str, optional): Alias map, or a path for
+                load_gazetteer(). Aliases match case- and space-insensitively.
+            max_entries (int): Bound on cached raw spellings. When it is
+                reached the spelling cache is cleared; IDs are kept.
+        """
+        if isinstance(gazetteer, str):
+            gazetteer = load_gazetteer(gazetteer)
+        self._aliases = {alias.strip().casefold(): sys.intern(canonical.strip())
+                         for alias, canonical in (gazetteer or {}).items()}
+        self.max_entries = max_entries
+        self._cache: Dict[str, tuple] = {}
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Number of distinct canonical locations seen."""
+        return len(self._names)
+
+    def _resolve(self, raw: str) -> tuple:
+        entry = self._cache.get(raw)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        text = raw.strip()
+        canonical = self._aliases.get(text.casefold())
+        valid = canonical is not None or is_valid_location(text)
+        canonical = sys.intern(canonical if canonical is not None else text.title())
+        location_id = self._ids.get(canonical)
+        if location_id is None:
+            location_id = self._ids[canonical] = len(self._names)
+            self._names.append(canonical)
+
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        entry = self._cache[raw] = (canonical, location_id, valid)
+        return entry
+
+    def normalize(self, raw: str) -> str:
+        """
+        Canonical (interned) name for a raw location string.
+
+        Example:
+            >>> LocationRegistry({"NYC": "New York"}).normalize(" nyc ")
+            'New York'
+        """
+        return self._resolve(raw)[0]
+
+    def id_of(self, raw: str) -> int:
+        """Stable integer ID of the raw string's canonical location."""
+        return self._resolve(raw)[1]
+
+    def name_of(self, location_id: int) -> str:
+        """Canonical name for an ID returned by id_of()."""
+        return self._names[location_id]
+
+    def is_valid(self, raw: str) -> bool:
+        """is_valid_location() for the raw string, or True for a gazetteer alias."""
+        return self._resolve(raw)[2]
+
+    def encode(self, values: Iterable[str]) -> array:
+        """Location IDs for a column of raw strings, as a compact array."""
+        resolve = self._resolve
+        return array("l", (resolve(v)[1] for v in values))
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """Canonical names for a column of IDs."""
+        names = self._names
+        return [names[i] for i in ids]
+
+
+_shared = None
+
+
+def shared_registry() -> LocationRegistry:
+    """Process-wide registry used when callers do not pass their own."""
+    global _shared
+    if _shared is None:
+        _shared = LocationRegistry()
+    return _shared
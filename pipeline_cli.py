@@ -0,0 +1,323 @@
+"""
+pipeline_cli.py
+Command-line batch runner for the Health Data Pipeline.
+
+Runs ingest -> clean -> analyze -> alert -> export as a chain of chunked
+stages and prints per-stage throughput at the end.
+
+Usage:
+    python -m pipeline_cli data/jan.csv data/feb.json --analyzers trend forecast \\
+        --threshold 100 --export outputs/cleaned.csv --workers 4 --chunk-size 50000
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from case_data_manager import CSVDataset, JSONDataset
+from xml_dataset import XMLDataset
+from analysis_modules import TrendAnalyzer
+from forecasting_analyzer import ForecastingAnalyzer
+from alert_report import AlertReport
+from pipeline_manager import PipelineManager
+from pipeline_functions import clean_case_data
+
+STAGES = ("ingest", "clean", "analyze", "alert", "export")
+
+DATASET_TYPES = {
+    ".csv": CSVDataset,
+    ".json": JSONDataset,
+    ".xml": XMLDataset,
+}
+
+ANALYZERS = {
+    "trend": TrendAnalyzer,
+    "forecast": ForecastingAnalyzer,
+}
+
+# The feeds carry no age column, so cleaning only requires these fields.
+CLEAN_REQUIRED = ("date", "location", "cases")
+
+
+class StageStats:
+    """
+    Accumulates record counts and busy time for each pipeline stage.
+    """
+
+    def __init__(self, stages=STAGES):
+        self._records = {name: 0 for name in stages}
+        self._seconds = {name: 0.0 for name in stages}
+
+    def add(self, stage: str, records: int, seconds: float):
+        """Record that a stage handled `records` rows in `seconds`."""
+        self._records[stage] += records
+        self._seconds[stage] += seconds
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return {stage: {'records', 'seconds', 'records_per_sec'}}."""
+        report = {}
+        for stage, count in self._records.items():
+            seconds = self._seconds[stage]
+            report[stage] = {
+                "records": count,
+                "seconds": round(seconds, 4),
+                "records_per_sec": round(count / seconds, 1) if seconds > 0 else 0.0,
+            }
+        return report
+
+    def format_table(self) -> str:
+        """Render the stats as a fixed-width text table."""
+        lines = [f"{'Stage':<10}{'Records':>12}{'Seconds':>12}{'Records/sec':>16}"]
+        for stage, row in self.as_dict().items():
+            lines.append(f"{stage:<10}{row['records']:>12}{row['seconds']:>12.3f}"
+                         f"{row['records_per_sec']:>16,.1f}")
+        return "\n".join(lines)
+
+
+def dataset_for(path: str, quarantine_dir: Optional[str] = None):
+    """Create the dataset handler matching a file's extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in DATASET_TYPES:
+        raise ValueError(f"Unsupported input type '{ext}' for {path}")
+    quarantine_path = None
+    if quarantine_dir:
+        os.makedirs(quarantine_dir, exist_ok=True)
+        quarantine_path = os.path.join(quarantine_dir, os.path.basename(path) + ".quarantine.jsonl")
+    return DATASET_TYPES[ext](path, quarantine_path=quarantine_path)
+
+
+def _load_file(path: str, quarantine_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load one input file and return its rows as plain dicts."""
+    ds = dataset_for(path, quarantine_dir)
+    ds.load_data()
+    return [{"date": r.date, "location": r.location, "cases": r.cases}
+            for r in ds.get_all_records()]
+
+
+def ingest(paths: List[str], chunk_size: int, workers: int, stats: StageStats,
+           quarantine_dir: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Stage 1: load input files (in parallel threads) and yield row chunks."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        started = time.perf_counter()
+        for rows in pool.map(partial(_load_file, quarantine_dir=quarantine_dir), paths):
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                stats.add("ingest", len(chunk), time.perf_counter() - started)
+                yield chunk
+                started = time.perf_counter()
+
+
+def _clean_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker-safe wrapper around clean_case_data."""
+    return clean_case_data(chunk, required=CLEAN_REQUIRED)
+
+
+def clean(chunks: Iterable[List[Dict[str, Any]]], workers: int,
+          stats: StageStats) -> Iterator[List[Dict[str, Any]]]:
+    """Stage 2: clean each chunk, fanning out to worker processes if asked."""
+    if workers <= 1:
+        for chunk in chunks:
+            started = time.perf_counter()
+            cleaned = _clean_chunk(chunk)
+            stats.add("clean", len(chunk), time.perf_counter() - started)
+            yield cleaned
+        return
+
+    # Keep a bounded window of chunks in flight so memory stays flat.
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append((len(chunk), time.perf_counter(), pool.submit(_clean_chunk, chunk)))
+            if len(pending) >= window:
+                size, started, future = pending.pop(0)
+                cleaned = future.result()
+                stats.add("clean", size, time.perf_counter() - started)
+                yield cleaned
+        for size, started, future in pending:
+            cleaned = future.result()
+            stats.add("clean", size, time.perf_counter() - started)
+            yield cleaned
+
+
+class ChunkWriter:
+    """
+    Appends cleaned chunks to a CSV or JSON file as they arrive.
+    """
+
+    def __init__(self, path: str, format: str = "csv"):
+        if format not in ("csv", "json"):
+            raise ValueError("Format must be 'csv' or 'json'.")
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self.path = path
+        self.format = format
+        self._file = open(path, "w", newline="")
+        self._writer = None
+        self._count = 0
+
+    def write(self, chunk: List[Dict[str, Any]]):
+        """Write one chunk of records."""
+        if self.format == "csv":
+            if chunk and self._writer is None:
+                self._writer = csv.DictWriter(self._file, fieldnames=list(chunk[0].keys()))
+                self._writer.writeheader()
+            if chunk:
+                self._writer.writerows(chunk)
+        else:
+            for record in chunk:
+                self._file.write("[\n  " if self._count == 0 else ",\n  ")
+                self._file.write(json.dumps(record))
+                self._count += 1
+
+    def close(self):
+        """Finish the file (closing the JSON array if needed)."""
+        if self.format == "json":
+            self._file.write("\n]\n" if self._count else "[]\n")
+        self._file.close()
+
+
+def run_pipeline(paths: List[str], analyzers: List[str], threshold: int = 50,
+                 export: Optional[str] = None, workers: int = 1,
+                 chunk_size: int = 10000, forecast_days: int = 7,
+                 quarantine_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the staged pipeline and return results, alerts and stage stats.
+
+    Args:
+        paths (list[str]): Input CSV/JSON/XML files.
+        analyzers (list[str]): Names from ANALYZERS to run.
+        threshold (int): AlertReport case threshold.
+        export (str, optional): Destination for cleaned records (.json or .csv).
+        workers (int): Threads for loading and processes for cleaning.
+        chunk_size (int): Records per chunk passed between stages.
+        forecast_days (int): days_ahead for the forecast analyzer.
+        quarantine_dir (str, optional): Write unparseable rows for each input
+            to <quarantine_dir>/<file>.quarantine.jsonl.
+
+    Returns:
+        dict: {'results', 'alerts', 'records', 'stats'}.
+
+    Raises:
+        ValueError: For unknown analyzers, bad chunk size or worker count.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    unknown = [a for a in analyzers if a not in ANALYZERS]
+    if unknown:
+        raise ValueError(f"Unknown analyzer(s): {', '.join(unknown)}")
+
+    manager = PipelineManager()
+    for name in analyzers:
+        tool = ForecastingAnalyzer(days_ahead=forecast_days) if name == "forecast" else ANALYZERS[name]()
+        manager.register_analyzer(tool)
+
+    stats = StageStats()
+    writer = None
+    if export:
+        fmt = "json" if export.lower().endswith(".json") else "csv"
+        writer = ChunkWriter(export, fmt)
+
+    cleaned_records = []
+    alerts = []
+    try:
+        for chunk in clean(ingest(paths, chunk_size, workers, stats, quarantine_dir), workers, stats):
+            started = time.perf_counter()
+            cleaned_records.extend(chunk)
+            stats.add("analyze", len(chunk), time.perf_counter() - started)
+
+            started = time.perf_counter()
+            alerts.extend(AlertReport(chunk, threshold=threshold).generate_alerts())
+            stats.add("alert", len(chunk), time.perf_counter() - started)
+
+            if writer:
+                started = time.perf_counter()
+                writer.write(chunk)
+                stats.add("export", len(chunk), time.perf_counter() - started)
+    finally:
+        if writer:
+            writer.close()
+
+    # Analyzers need the whole series (moving averages, forecasts).
+    started = time.perf_counter()
+    results = manager.analyze_records(cleaned_records) if analyzers else {}
+    stats.add("analyze", 0, time.perf_counter() - started)
+
+    return {
+        "results": results,
+        "alerts": alerts,
+        "records": len(cleaned_records),
+        "stats": stats,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define the command-line interface."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pipeline_cli",
+        description="Run the health data pipeline over CSV/JSON/XML case files.")
+    parser.add_argument("inputs", nargs="+", help="Input files (.csv, .json, .xml)")
+    parser.add_argument("--analyzers", nargs="*", default=["trend"],
+                        choices=sorted(ANALYZERS), help="Analyzers to run (default: trend)")
+    parser.add_argument("--threshold", type=int, default=50,
+                        help="Alert when a record exceeds this many cases (default: 50)")
+    parser.add_argument("--export", help="Write cleaned records to this .csv or .json file")
+    parser.add_argument("--alert-output", help="Also write alert lines to this text file")
+    parser.add_argument("--quarantine-dir",
+                        help="Write rows that fail to parse here instead of dropping them")
+    parser.add_argument("--forecast-days", type=int, default=7,
+                        help="Days ahead for the forecast analyzer (default: 7)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel loaders / cleaning processes (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Records per chunk between stages (default: 10000)")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Logging verbosity for loaders and the manager (default: WARNING)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point. Returns a process exit code."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    missing = [p for p in args.inputs if not os.path.exists(p)]
+    if missing:
+        print(f"Input file(s) not found: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    try:
+        outcome = run_pipeline(args.inputs, args.analyzers, threshold=args.threshold,
+                               export=args.export, workers=args.workers,
+                               chunk_size=args.chunk_size, forecast_days=args.forecast_days,
+                               quarantine_dir=args.quarantine_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(outcome["results"], indent=2, default=str))
+    print(f"\n{len(outcome['alerts'])} alert(s) at threshold {args.threshold}.")
+    if args.alert_output:
+        with open(args.alert_output, "w") as f:
+            for alert in outcome["alerts"]:
+                f.write(alert + "\n")
+    if args.export:
+        print(f"Exported {outcome['records']} cleaned records to {args.export}")
+
+    print("\n" + outcome["stats"].format_table())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
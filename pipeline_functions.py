@@ -1,9 +1,30 @@
-def validate_case_entry(case):
+from lazy_imports import lazy_import
+from age_index import AgeIndex
+from batch_validation import BatchValidator
+from location_registry import shared_registry
+from helper_utils import MISSING_AGE, normalize_ages
+from chart_rendering import (
+    DEFAULT_HEATMAP_COLUMNS, DEFAULT_TILE_ROWS,
+    build_case_matrix, downsample_series, render_heatmap, render_trend_chart
+)
+
+# Heavy plotting libraries are only imported the first time a chart is drawn.
+plt = lazy_import("matplotlib.pyplot")
+
+from collections import namedtuple
+from functools import partial
+from itertools import compress, count, repeat
+from operator import is_, is_not
+
+
+def validate_case_entry(case, required=("date", "location", "age", "cases")):
     """Validate a single disease case record.
 
     Args:
         case (dict): A dictionary representing a case record with keys 
                      like 'date', 'location', 'age', and 'cases'.
+        required (tuple[str]): Keys that must be present and non-empty
+                     (default: date, location, age, cases).
 
     Returns:
         bool: True if valid, False otherwise.
@@ -18,7 +39,6 @@ def validate_case_entry(case):
     if not isinstance(case, dict):
         raise TypeError("Case entry must be a dictionary.")
 
-    required = ["date", "location", "age", "cases"]
     for key in required:
         if key not in case:
             return False
@@ -26,6 +46,14 @@ def validate_case_entry(case):
             return False
     return True
 
+
+def _valid_entries(cases, required):
+    """The records that pass validate_case_entry, checked as one batch."""
+    result = BatchValidator(required).validate(cases)
+    if "not_a_dict" in result.reasons:
+        raise TypeError("Case entry must be a dictionary.")
+    return result.select(cases)
+
 def format_date(date_str):
     """Convert a date string into standard 'YYYY-MM-DD' format.
 
@@ -51,11 +79,16 @@ def format_date(date_str):
             return f"20{parts[2]}-{parts[0].zfill(2)}-{parts[1].zfill(2)}"
     return "INVALID"
 
-def clean_case_data(cases: list[dict]) -> list[dict]:
+def clean_case_data(cases: list[dict], required=("date", "location", "age", "cases"),
+                    locations=None) -> list[dict]:
     """Clean and standardize a list of disease case records.
 
     Args:
         cases (list[dict]): A list of case dictionaries containing 'date', 'location', and 'cases'.
+        required (tuple[str]): Fields checked as in validate_case_entry. Feeds
+            without an 'age' column can use ("date", "location", "cases").
+        locations (LocationRegistry, optional): Location normalizer (and
+            gazetteer). Defaults to the shared per-process registry.
 
     Returns:
         list[dict]: A cleaned list of valid, standardized case dictionaries.
@@ -70,11 +103,9 @@ def clean_case_data(cases: list[dict]) -> list[dict]:
     if not isinstance(cases, list):
         raise TypeError("Input must be a list of dictionaries.")
 
+    normalize_location = (locations if locations is not None else shared_registry()).normalize
     cleaned_data = []
-    for record in cases:
-        if not validate_case_entry(record):
-            continue
-
+    for record in _valid_entries(cases, required):
         formatted_date = format_date(record["date"])
         if formatted_date == "INVALID":
             continue
@@ -86,7 +117,7 @@ def clean_case_data(cases: list[dict]) -> list[dict]:
 
         cleaned_record = {
             "date": formatted_date,
-            "location": record["location"].strip().title(),
+            "location": normalize_location(record["location"]),
             "cases": case_count
         }
         cleaned_data.append(cleaned_record)
@@ -170,7 +201,9 @@ def integrate_data_sources(sources, schema_map=None):
 
     Args:
         sources (list[str]): List of file paths to data sources.
-        schema_map (dict, optional): Mapping of source field names to canonical names.
+        schema_map (dict, optional): Mapping of source field names to canonical names,
+            e.g. {'report_date': 'date', 'county': 'location', 'new_cases': 'cases'}.
+            To map each file differently, pass {path: mapping, ...} instead.
 
     Returns:
         list[dict]: Combined list of case dictionaries with unified fields.
@@ -178,27 +211,41 @@ def integrate_data_sources(sources, schema_map=None):
     Raises:
         FileNotFoundError: If any source file cannot be found.
         TypeError: If sources is not a list of strings.
+        ValueError: If a source has an unsupported file extension.
 
     Example:
         >>> integrate_data_sources(["data/jan.csv", "data/feb.json"])
-        [{'date': '2025-01-01', 'location': 'Boston', 'age': 25, 'cases': 5}, ...]
+        [{'date': '2025-01-01', 'location': 'Boston', 'cases': 5}, ...]
     """
     if not isinstance(sources, list) or not all(isinstance(s, str) for s in sources):
         raise TypeError("Sources must be a list of file paths.")
 
+    from case_data_manager import CSVDataset, JSONDataset
+    from xml_dataset import XMLDataset
+    loaders = {'.csv': CSVDataset, '.json': JSONDataset, '.xml': XMLDataset}
+
+    per_source = bool(schema_map) and any(path in schema_map for path in sources)
+
     combined = []
     for path in sources:
-        # Simplified: real implementation would detect type and parse CSV/JSON/XML
-        # Here we simulate loading data
-        combined.extend([])  # placeholder for loaded records
+        ext = path[path.rfind('.'):].lower() if '.' in path else ''
+        if ext not in loaders:
+            raise ValueError(f"Unsupported source type: {path}")
+        mapping = schema_map.get(path) if per_source else schema_map
+        dataset = loaders[ext](path, schema_map=mapping)
+        dataset.load_data()
+        combined.extend({"date": r.date, "location": r.location, "cases": r.cases}
+                        for r in dataset.get_all_records())
     return combined
 
 
-def standardize_case_fields(df):
+def standardize_case_fields(df, locations=None):
     """Normalize key fields such as dates, locations, and age values.
 
     Args:
         df (list[dict]): List of case dictionaries.
+        locations (LocationRegistry, optional): Location normalizer (and
+            gazetteer). Defaults to the shared per-process registry.
 
     Returns:
         list[dict]: List of case dictionaries with standardized fields.
@@ -213,24 +260,97 @@ def standardize_case_fields(df):
     if not isinstance(df, list) or not all(isinstance(r, dict) for r in df):
         raise TypeError("Input must be a list of dictionaries.")
 
+    normalize_location = (locations if locations is not None else shared_registry()).normalize
+    # Age normalization (range midpoint) for the whole column at once, with
+    # the same rules as helper_utils.normalize_age; unreadable ages become None.
+    ages = normalize_ages([record.get("age") for record in df])
     standardized = []
-    for record in df:
+    for record, age in zip(df, ages):
         rec = record.copy()
-        # Example normalization logic
-        rec["location"] = rec.get("location", "").strip().title()
-        # Age normalization: range midpoint
-        age = rec.get("age")
-        if isinstance(age, str) and "-" in age:
-            parts = age.split("-")
-            rec["age"] = int((int(parts[0]) + int(parts[1])) / 2)
-        elif isinstance(age, int):
-            rec["age"] = age
-        else:
-            rec["age"] = None
+        # One cached lookup per row; each raw spelling is normalized once.
+        rec["location"] = normalize_location(rec.get("location", ""))
+        rec["age"] = None if age == MISSING_AGE else age
         standardized.append(rec)
     return standardized
 
 
+# Compact record produced by clean_records(); about a third the size of a dict.
+CleanCase = namedtuple("CleanCase", ["date", "location", "age", "cases"])
+
+
+def clean_records(cases, required=("date", "location", "cases"), locations=None,
+                  inplace=False):
+    """Validate, clean and standardize records in one fused pass.
+
+    Does the work of clean_case_data followed by standardize_case_fields
+    without building a new dict per record per stage. Dates and ages are
+    parsed once per distinct raw value, and locations go through the
+    LocationRegistry cache. Unlike that chain, the input's age is kept
+    (normalized) rather than dropped by the clean step.
+
+    Args:
+        cases (list[dict]): Raw case dictionaries.
+        required (tuple[str]): Fields that must be present and non-empty.
+        locations (LocationRegistry, optional): Location normalizer.
+            Defaults to the shared per-process registry.
+        inplace (bool): Rewrite the input dicts and compact the input list
+            in place (invalid records are removed, other keys are kept).
+            Otherwise return new CleanCase tuples and leave the input alone.
+
+    Returns:
+        list: CleanCase tuples, or the input list itself when inplace=True.
+
+    Raises:
+        TypeError: If input is not a list of dictionaries.
+
+    Example:
+        >>> clean_records([{"date": "03/01/25", "location": "boston", "age": "20-29", "cases": "10"}])
+        [CleanCase(date='2025-03-01', location='Boston', age=24, cases=10)]
+    """
+    if not isinstance(cases, list):
+        raise TypeError("Input must be a list of dictionaries.")
+
+    normalize_location = (locations if locations is not None else shared_registry()).normalize
+    dates = {}
+    ages = {}
+    out = cases if inplace else []
+    keep = 0
+    for record in _valid_entries(cases, required):
+        raw_date = record["date"]
+        date = dates.get(raw_date) if isinstance(raw_date, str) else "INVALID"
+        if date is None:
+            date = dates[raw_date] = format_date(raw_date)
+        if date == "INVALID":
+            continue
+        try:
+            count = int(record["cases"])
+        except (TypeError, ValueError):
+            continue
+
+        raw_age = record.get("age")
+        try:
+            age = ages[raw_age]
+        except KeyError:
+            age = ages[raw_age] = normalize_ages([raw_age])[0]
+        except TypeError:
+            age = normalize_ages([raw_age])[0]
+        age = None if age == MISSING_AGE else age
+        location = normalize_location(record["location"])
+
+        if inplace:
+            record["date"] = date
+            record["location"] = location
+            record["age"] = age
+            record["cases"] = count
+            out[keep] = record
+            keep += 1
+        else:
+            out.append(CleanCase(date, location, age, count))
+    if inplace:
+        del out[keep:]
+    return out
+
+
 def summarize_case_trends(df, by='date'):
     """Aggregate case counts and produce a summary by a specified field.
 
@@ -265,12 +385,17 @@ def summarize_case_trends(df, by='date'):
     return summary
 
 
-def plot_case_trend_line(trend_df, out_path=None):
+def plot_case_trend_line(trend_df, out_path=None, max_points=None, show=True):
     """Plot a line chart of case counts over time.
 
     Args:
         trend_df (dict): Dictionary returned by summarize_case_trends.
         out_path (str, optional): File path to save the chart image.
+        max_points (int, optional): Downsample long series to this many points
+            (LTTB, keeps peaks and the overall shape). None plots every point.
+        show (bool): Display the chart interactively. With show=False the chart
+            is rendered headlessly on the Agg backend and only written to
+            out_path, so batch jobs never block.
 
     Returns:
         None
@@ -279,10 +404,18 @@ def plot_case_trend_line(trend_df, out_path=None):
         >>> plot_case_trend_line({'counts_by_date': {'2025-03-01': 15, '2025-03-02': 20}})
         # Displays a line chart
     """
-    import matplotlib.pyplot as plt
-
-    x = list(trend_df.get("counts_by_date", {}).keys())
-    y = list(trend_df.get("counts_by_date", {}).values())
+    counts_by_date = trend_df.get("counts_by_date", {})
+
+    if not show:
+        if out_path:
+            render_trend_chart(counts_by_date, out_path, max_points=max_points)
+        return
+
+    if max_points is not None:
+        x, y = downsample_series(counts_by_date, max_points)
+    else:
+        x = list(counts_by_date.keys())
+        y = list(counts_by_date.values())
     plt.figure(figsize=(8,4))
     plt.plot(x, y, marker='o')
     plt.xlabel("Date")
@@ -328,56 +461,182 @@ def export_dataset(df, path, format='csv'):
     else:  # JSON
         with open(path, 'w') as f:
             json.dump(df, f, indent=2)
-            
 
-    - Chioma Agoh: Contributor
 
-def fill_missing_values(df, method = 'zero'):
+# Chioma Agoh: Contributor
+
+FILL_METHODS = ('zero', 'mean', 'ffill', 'interpolate')
+_NUMERIC_OR_MISSING = {int, float, bool, type(None)}
 
-Args: 
-    df(list[dict]): List of cases
-    method (str): Filling method - 'zero' or 'mean'. 
 
-Returns: 
-    list [dict]: New list with fill_missing_values
+def fill_missing_values(df, method='zero', fields=None, inplace=False,
+                        group_by='location', order_by='date'):
+    """Fill missing (None) numeric values in case records.
 
-import copy
+    Each field is scanned once to find its type, its gaps and (for 'mean')
+    its average. Only records that actually have a gap are touched: with
+    inplace=False they are shallow-copied, everything else is shared with
+    the input list. Nothing is deep-copied.
 
-if method not in ['zero', 'mean']:
-    raise ValueError("Method is unsupported. use 'zero' or 'mean'.")
-df_filled = copy.deepcopy(df)
+    Args: 
+        df(list[dict]): List of cases
+        method (str): 'zero', 'mean', 'ffill' (carry the previous value
+            forward within each location, in date order) or 'interpolate'
+            (linear in days between the neighbouring known values of the
+            same location; edges take the nearest known value).
+            Gaps with no known value in their location fall back to 0.
+        fields (iterable, optional): Fields to fill. Default: every field
+            that holds a number or None in some record.
+        inplace (bool): Modify the input records instead of copying them.
+        group_by (str): Series key for 'ffill'/'interpolate'.
+        order_by (str): Ordering key for 'ffill'/'interpolate' (ISO dates
+            are spaced by day; other values are spaced evenly).
 
-#Getting the numeric fields
-numeric_fields = set()
-for record in df:
-    for key, value in record.items():
-        if isinstance(value, (int, float)) or value is None:
-            numeric_fields.add(key)
+    Returns: 
+        list [dict]: List with missing values filled (the input list itself
+        when inplace=True).
 
-#Calculating means if needed
-means = {}
-if method =='mean':
-    for field in numeric_fields:
-        values = [r[field] for r in df if ininstance (r.get(field), (int, float))]
-        means[field] = sum(values)/len(values) if values else 0
+    Raises:
+        ValueError: For an unsupported method.
 
-#For filling in the missing values
-for record in dr_filled:
-    for field in numeric_fields:
-        if record.get(field) is None:
-            record[field] = 0 if method == 'zero' else means.get(field,0)
-            return df_filled
+    Example:
+        >>> fill_missing_values([{"location": "A", "date": "2025-01-01", "cases": 2},
+        ...                      {"location": "A", "date": "2025-01-03", "cases": None},
+        ...                      {"location": "A", "date": "2025-01-05", "cases": 6}],
+        ...                     method='interpolate')[1]["cases"]
+        4.0
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"Method is unsupported. use one of {FILL_METHODS}.")
+
+    # Column scans run in C (map/compress/sum), so each field costs one fast
+    # pass: its type set, its gap positions and, for 'mean', its sum.
+    if fields is None:
+        fields = set().union(*set(map(tuple, df)))
+        if method in ('ffill', 'interpolate'):
+            fields -= {group_by, order_by}
+    numeric_fields, gaps, defaults = [], set(), {}
+    for field in fields:
+        column = list(map(dict.get, df, repeat(field)))
+        types = set(map(type, column))
+        if not types & _NUMERIC_OR_MISSING:
+            continue
+        field_gaps = list(compress(count(), map(is_, column, repeat(None))))
+        if not field_gaps:
+            continue
+        numeric_fields.append(field)
+        gaps.update(field_gaps)
+        defaults[field] = 0
+        if method == 'mean':
+            values = column if types <= _NUMERIC_OR_MISSING else [
+                v for v in column if isinstance(v, (int, float))]
+            values = list(filter(partial(is_not, None), values))
+            defaults[field] = sum(values) / len(values) if values else 0
+
+    if not gaps:
+        return df if inplace else list(df)
+    gaps = sorted(gaps)
+
+    filled = df if inplace else list(df)
+    if not inplace:
+        for index in gaps:
+            filled[index] = dict(df[index])
+
+    if method in ('zero', 'mean'):
+        for index in gaps:
+            record = filled[index]
+            for field in numeric_fields:
+                if record.get(field) is None:
+                    record[field] = defaults[field]
+        return filled
+
+    _fill_series(filled, gaps, numeric_fields, method, group_by, order_by)
+    return filled
+
+
+def _fill_series(records, gaps, fields, method, group_by, order_by):
+    """ffill/interpolate gaps within each group, walking only the groups that have gaps."""
+    keys = list(map(dict.get, records, repeat(group_by)))
+    gap_groups = {keys[i] for i in gaps}
+    series = {}
+    for index, key in enumerate(keys):
+        if key in gap_groups:
+            series.setdefault(key, []).append(index)
+
+    ordinals = {}
+    for indices in series.values():
+        indices.sort(key=lambda i: _order_key(records[i].get(order_by)))
+        axis = None
+        for field in fields:
+            values = [records[i].get(field) for i in indices]
+            known = [n for n, v in enumerate(values) if v is not None]
+            if len(known) == len(values):
+                continue
+            if method == 'ffill' or not known:
+                last = 0
+                for i, value in zip(indices, values):
+                    if value is None:
+                        records[i][field] = last
+                    elif method == 'ffill':
+                        last = value
+                continue
+
+            if axis is None:
+                axis = _date_axis([records[i].get(order_by) for i in indices], ordinals)
+            k = 0
+            for n, value in enumerate(values):
+                if value is not None:
+                    continue
+                while k < len(known) and known[k] < n:
+                    k += 1
+                if k == 0 or k == len(known):
+                    # Edges take the nearest known value.
+                    records[indices[n]][field] = values[known[0] if k == 0 else known[-1]]
+                    continue
+                n0, n1 = known[k - 1], known[k]
+                x0, x1 = axis[n0], axis[n1]
+                v0, v1 = values[n0], values[n1]
+                records[indices[n]][field] = (v0 + (v1 - v0) * (axis[n] - x0) / (x1 - x0)
+                                              if x1 != x0 else float(v0))
+
+
+def _order_key(value):
+    # None sorts first; other values compare by their string form (ISO dates sort correctly).
+    return (value is not None, str(value) if value is not None else "")
+
+
+def _date_axis(values, cache):
+    """Day numbers for ISO date strings, or evenly spaced positions if any value is not one."""
+    axis = []
+    for value in values:
+        day = cache.get(value)
+        if day is None:
+            try:
+                day = cache[value] = datetime.strptime(value, "%Y-%m-%d").toordinal()
+            except (TypeError, ValueError):
+                return list(range(len(values)))
+        axis.append(day)
+    return axis
 
 #Simple
 
-def count_unique_locations(df):
+def count_unique_locations(df, error_rate=None):
+    """Count distinct location values.
 
     Args: 
-        df(list[dict]): List of dictionaries.
+        df(list[dict]): List of dictionaries (any iterable, including a stream).
+        error_rate (float, optional): Estimate with a HyperLogLog sketch of
+            this relative standard error instead of building an exact set.
+            Memory stays fixed (16 KiB at 0.01) however many rows stream by.
 
     Returns: 
-        Int: Number of unique location values.
-
+        Int: Number of unique location values (rounded estimate with error_rate).
+    """
+    if error_rate is not None:
+        from sketches import HyperLogLog
+        sketch = HyperLogLog(error_rate)
+        sketch.update(record["location"] for record in df if "location" in record)
+        return round(sketch.estimate().value)
     return len(set(record.get("location")for record in df if "location" in record))
 
 
@@ -386,13 +645,16 @@ def count_unique_locations(df):
 def filter_cases_by_age(df, min_age=None, max_age=None):
     """Filter case records by age range
     Args: 
-        df (list[dict]): List of case dictionaries with 'age'
+        df (list[dict] | AgeIndex): List of case dictionaries with 'age', or
+            a prebuilt AgeIndex for repeated queries (answered with bisect).
         min_age (int, optional): Minimum age to include.
         max_age (int, optional): Maximum age to include.
 
     Returns:
         list [dict]: Filtered lists of record within age range.
     """
+    if isinstance(df, AgeIndex):
+        return df.query(min_age, max_age)
 
     filtered = []
     for record in df:
@@ -403,41 +665,44 @@ def filter_cases_by_age(df, min_age=None, max_age=None):
 
     return filtered
 
-    def generate_case_heatmap(df, output_path)='outputs/heatmap.png'):
-        """Generate a heatmap of case counts by date and location.
+def generate_case_heatmap(df, output_path='outputs/heatmap.png',
+                          max_columns=DEFAULT_HEATMAP_COLUMNS, tile_rows=DEFAULT_TILE_ROWS):
+    """Generate a heatmap of case counts by date and location.
 
-        Args: 
-            df(lisy[dict]): Lists of case dictionaires with 'date', 'location', and 'cases'.
-            output_patg (str): Path to save the heatmap image.
+    Works from a location x date count matrix, so no pandas or seaborn is
+    needed. Wide date ranges are binned to max_columns and large location
+    sets are split into numbered tiles. Rendering is headless (Agg).
 
-        Returns:
-            None
-        """
+    Args: 
+        df (list[dict] | tuple): Case dictionaries (or CaseRecords) with 'date',
+            'location', and 'cases', or a precomputed (locations, dates, rows)
+            matrix from chart_rendering.build_case_matrix.
+        output_path (str): Path to save the heatmap image.
+        max_columns (int): Maximum date columns per image.
+        tile_rows (int): Maximum locations per image.
 
-        import pandas as peak_date
-        import seaborn as standardize_case_fields
-        import matplotlib.pylot as plt
+    Returns:
+        list[str]: Paths of the images written (empty if there was no data).
 
-        if not dr: 
-            print("No data available.")
-            return
+    Example:
+        >>> generate_case_heatmap([{'date': '2025-03-01', 'location': 'Boston', 'cases': 5}])
+        ['outputs/heatmap.png']
+    """
+    if not df:
+        print("No data available.")
+        return []
 
-#Converting to DataFrame
-data = pd.DataFrame(df)
-if data.empty or not {'date', 'location', 'case'}.issubset(data.columns):
-    print("Missing required.")
-    return
+    if isinstance(df, tuple):
+        locations, dates, rows = df
+    else:
+        locations, dates, rows = build_case_matrix(df)
 
-    pivot = data.privot_table(index = 'location', columns='date', values='cases', aggfunc='sum', fill_values=0)
+    if not locations or not dates:
+        print("Missing required fields.")
+        return []
 
-    plt.figure(figsize=(10,6))
-    sns.heatmap(pivot, annot=True, fmt='d', cmap='YLOrRD')
-    plt.title("Location and Date of Cases")
-    plt.xlabel("Date")
-    plt.ylabel("Location")
-    plt.tight_layout()
-    plt.savefig(output_path)
-    plt.show() 
+    return render_heatmap(locations, dates, rows, output_path,
+                          max_columns=max_columns, tile_rows=tile_rows)
 
 """
 pipeline_functions.py
@@ -1,6 +1,68 @@
+import logging
 import pickle
 import os
-from typing import Dict, Any
+from contextlib import nullcontext
+from functools import partial
+from heapq import merge
+from itertools import count
+from operator import attrgetter
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from case_columns import as_columns
+from pipeline_metrics import StageProfiler
+from stage_graph import StageGraph
+
+logger = logging.getLogger(__name__)
+
+# Shared no-op context used when profiling is off.
+_NOT_PROFILED = nullcontext()
+
+
+# --- Stage helpers (module-level so the stage graph stays picklable) ---
+def _file_signature(path):
+    """Cheap change token for a source file."""
+    st = os.stat(path)
+    return [path, st.st_size, st.st_mtime_ns]
+
+
+def _dataset_rows(dataset, loaded_signature):
+    """
+    Return a dataset's records as plain dicts, re-reading the file if it
+    changed since the dataset was loaded. The re-read uses the dataset's
+    own schema (map and converters) and quarantine file.
+    """
+    records = dataset.get_all_records()
+    if _file_signature(dataset.source_path) != loaded_signature:
+        fresh = type(dataset)(dataset.source_path, quarantine_path=dataset.quarantine_path,
+                              schema_map=dataset.schema.schema_map)
+        fresh._schema = dataset.schema
+        fresh.load_data()
+        records = fresh.get_all_records()
+    return [{"date": r.date, "location": r.location, "cases": r.cases} for r in records]
+
+
+def _concat(*parts):
+    combined = []
+    for part in parts:
+        combined.extend(part)
+    return combined
+
+
+def _dedupe(*parts, policy="latest", mode="exact"):
+    from deduplication import Deduplicator
+    return Deduplicator(policy, mode).merge(parts)
+
+
+def _alert_lines(records, threshold=50):
+    from alert_report import AlertReport
+    return AlertReport(records, threshold=threshold).generate_alerts()
+
+
+def _export(records, path, format='csv'):
+    from pipeline_functions import export_dataset
+    export_dataset(records, path, format=format)
+    return path
+
 
 class PipelineManager:
     """
@@ -8,18 +70,51 @@ class PipelineManager:
     Manages Datasets, Analyzers, and Data Persistence.
     """
 
-    def __init__(self):
-        """Initialize empty registries."""
-        self._datasets = [] 
+    # Class-level defaults keep pipelines pickled before these features existed loadable.
+    _profiler = None
+    _graph = None
+    _deduplicator = None
+    _spill = None
+
+    def __init__(self, profile: bool = False, trace_memory: bool = True):
+        """
+        Initialize empty registries.
+
+        Args:
+            profile (bool): Record per-stage wall/CPU time and throughput.
+            trace_memory (bool): When profiling, also track peak memory
+                with tracemalloc.
+        """
+        self._datasets = []
         self._analyzers = []
+        self._profiler = StageProfiler(trace_memory) if profile else None
+
+    def _measure(self, kind: str, name: str):
+        """Context manager for one stage; a shared no-op when profiling is off."""
+        if self._profiler is None:
+            return _NOT_PROFILED
+        return self._profiler.measure(kind, name)
 
     def add_dataset(self, dataset):
         """Register a new dataset (CSV, JSON, or XML)."""
         if not hasattr(dataset, 'load_data'):
             raise TypeError("Invalid dataset: Must implement load_data interface.")
-        
-        print(f"Manager: Loading data from '{dataset.source_path}'...")
-        dataset.load_data()
+
+        logger.info("Manager: Loading data from '%s'...", dataset.source_path)
+        spilled = None
+        if self._spill is not None and isinstance(getattr(dataset, "_data", None), list):
+            # Load straight into the spill store instead of the dataset's own list.
+            from spill_store import StoreSlice
+            spilled = StoreSlice(self._spill)
+            for record in dataset._data:
+                spilled.append(record)
+            dataset._data = spilled
+        with self._measure("load", dataset.source_path) as stage:
+            dataset.load_data()
+        if spilled is not None:
+            spilled.freeze()
+        if stage is not None:
+            stage.records = len(dataset.get_all_records())
         self._datasets.append(dataset)
 
     def register_analyzer(self, analyzer):
@@ -28,42 +123,254 @@ class PipelineManager:
             raise TypeError("Invalid tool: Must implement analyze interface.")
         self._analyzers.append(analyzer)
 
-    def run_full_analysis(self) -> Dict[str, Any]:
-        """Run all analyzers on all loaded data."""
+    def set_deduplication(self, policy: Optional[str] = "latest", mode: str = "exact", **options):
+        """
+        Collapse duplicate (date, location) records across datasets before analysis.
+
+        Args:
+            policy (str | None): 'latest', 'max' or 'sum'; None turns dedupe off.
+            mode (str): 'exact' or 'bloom' (bounded memory, first record wins).
+            **options: expected_items / error_rate for bloom mode.
+        """
+        if policy is None:
+            self._deduplicator = None
+            return
+        from deduplication import Deduplicator
+        self._deduplicator = Deduplicator(policy, mode, **options)
+
+    def set_memory_budget(self, max_memory: Optional[int], spill_dir: Optional[str] = None,
+                          partition_by: str = "date"):
+        """
+        Keep ingested records within a memory budget, spilling to disk.
+
+        Datasets added afterwards load into a spill_store.SpillStore: once
+        the buffered records pass max_memory they are written to partition
+        files, and run_full_analysis() sorts and aggregates them out of
+        core (analyzers without analyze_stream, and deduplication, still
+        read the records into memory). Results match the in-memory path.
+
+        Args:
+            max_memory (int | None): Budget in bytes; None turns it off.
+            spill_dir (str, optional): Where to write spill files (default:
+                a temporary directory).
+            partition_by (str): 'date' (date ranges) or 'location'.
+
+        Raises:
+            ValueError: If datasets were already added, or the settings are
+                invalid (see SpillStore).
+        """
+        if self._datasets:
+            raise ValueError("Set the memory budget before adding datasets.")
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if max_memory is not None:
+            from spill_store import SpillStore
+            self._spill = SpillStore(max_memory, spill_dir, partition_by)
+
+    def combined_records(self) -> list:
+        """All records from every dataset, deduplicated if configured."""
+        if self._deduplicator is not None:
+            records = self._deduplicator.merge(ds.get_all_records() for ds in self._datasets)
+            logger.info("Dedupe removed %d duplicate record(s).",
+                        self._deduplicator.stats["duplicates"])
+            return records
+
         all_records = []
         for ds in self._datasets:
             all_records.extend(ds.get_all_records())
+        return all_records
+
+    def date_ordered_records(self) -> Iterator[Any]:
+        """
+        All records in date order, as a lazy k-way heap merge of the datasets.
+
+        Datasets whose records are already sorted (sorted_by_date) stream
+        as they are; only unsorted ones get a sorted copy. Equal dates keep
+        combined_records() order. With deduplication on, the deduplicated
+        records are sorted instead.
+        """
+        if self._deduplicator is not None:
+            yield from sorted(self.combined_records(), key=attrgetter("date"))
+            return
+        streams = []
+        offset = 0
+        for ds in self._datasets:
+            records = ds.get_all_records()
+            # (date, position, record): positions are unique, so records are never compared.
+            keyed = zip(map(attrgetter("date"), records), count(offset), records)
+            if not getattr(ds, "sorted_by_date", False):
+                keyed = sorted(keyed)
+            streams.append(keyed)
+            offset += len(records)
+        for _, _, record in merge(*streams):
+            yield record
 
-        if not all_records:
+    def run_full_analysis(self) -> Dict[str, Any]:
+        """Run all analyzers on all loaded data."""
+        if self._spill is not None and self._spill.spilled and self._deduplicator is None:
+            return self._analyze_spilled()
+        return self.analyze_records(self.combined_records())
+
+    def _analyze_spilled(self) -> Dict[str, Any]:
+        """run_full_analysis() over the spill store, streaming where analyzers can."""
+        store = self._spill
+        results = {}
+        for analyzer in self._analyzers:
+            tool_name = analyzer.__class__.__name__
+            logger.info("Running %s out of core...", tool_name)
+            with self._measure("analyze", tool_name) as stage:
+                if hasattr(analyzer, "analyze_stream"):
+                    results[tool_name] = analyzer.analyze_stream(store)
+                else:
+                    logger.warning("%s has no analyze_stream; reading %d records into memory.",
+                                   tool_name, len(store))
+                    results[tool_name] = analyzer.analyze(list(store))
+            if stage is not None:
+                stage.records = len(store)
+        return results
+
+    def analyze_records(self, records) -> Dict[str, Any]:
+        """Run all registered analyzers on an already-assembled record list."""
+        if not records:
             return {"error": "No data loaded"}
 
+        # Analyzers that take a CaseColumns batch share one conversion.
+        columns = None
         results = {}
         for analyzer in self._analyzers:
             tool_name = analyzer.__class__.__name__
-            print(f"Running {tool_name}...")
-            results[tool_name] = analyzer.analyze(all_records)
-            
+            logger.info("Running %s...", tool_name)
+            with self._measure("analyze", tool_name) as stage:
+                if getattr(analyzer, "accepts_columns", False):
+                    if columns is None:
+                        columns = as_columns(records)
+                    results[tool_name] = analyzer.analyze(columns)
+                else:
+                    results[tool_name] = analyzer.analyze(records)
+            if stage is not None:
+                stage.records = len(records)
+
         return results
 
+    def run_sharded_analysis(self, shards: Optional[int] = None,
+                             spill_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        run_full_analysis() across worker processes, one location shard each.
+        Results have the same shape; see sharded_pipeline for alerts and
+        per-shard stats.
+        """
+        from sharded_pipeline import ShardedPipeline
+        return ShardedPipeline(self, shards, spill_dir=spill_dir).run()["results"]
+
+    def run_backtest(self, models=None, horizon: int = 7, workers: Optional[int] = None,
+                     **options) -> Dict[str, Any]:
+        """
+        Rolling-origin forecast accuracy on all loaded data; see
+        backtesting.Backtester.run for the arguments and report.
+        """
+        from backtesting import Backtester
+        return Backtester(self.combined_records()).run(models, horizon, workers=workers,
+                                                       **options)
+
+    # --- STAGE GRAPH ---
+    @property
+    def stages(self) -> StageGraph:
+        """The declarative stage graph (created on first use)."""
+        if self._graph is None:
+            self._graph = StageGraph()
+        return self._graph
+
+    def add_stage(self, name: str, func, inputs: Iterable[str] = (), **params):
+        """Declare a processing stage; see StageGraph.add_stage."""
+        return self.stages.add_stage(name, func, inputs, params)
+
+    def build_default_stages(self, threshold: int = 50, fill_method: str = 'zero',
+                             export_path: Optional[str] = None, export_format: str = 'csv'):
+        """
+        Wire the standard flow as a stage graph over the registered datasets
+        and analyzers:
+
+            load:<path>... -> records -> clean -> standardize -> fill
+            fill -> analyze:<Analyzer>..., alerts, export
+
+        Returns:
+            StageGraph: The graph, ready for run_stages().
+        """
+        from pipeline_functions import clean_case_data, standardize_case_fields, fill_missing_values
+
+        graph = self.stages
+        sources = []
+        for ds in self._datasets:
+            name = f"load:{ds.source_path}"
+            graph.add_stage(name, partial(_dataset_rows, ds, _file_signature(ds.source_path)),
+                            signature=partial(_file_signature, ds.source_path))
+            sources.append(name)
+
+        if self._deduplicator is not None:
+            graph.add_stage("records", _dedupe, sources, {"policy": self._deduplicator.policy,
+                                                          "mode": self._deduplicator.mode})
+        else:
+            graph.add_stage("records", _concat, sources)
+        graph.add_stage("clean", clean_case_data, ["records"],
+                        {"required": ("date", "location", "cases")})
+        graph.add_stage("standardize", standardize_case_fields, ["clean"])
+        graph.add_stage("fill", fill_missing_values, ["standardize"], {"method": fill_method})
+        for analyzer in self._analyzers:
+            graph.add_stage(f"analyze:{analyzer.__class__.__name__}", analyzer.analyze, ["fill"])
+        graph.add_stage("alerts", _alert_lines, ["fill"], {"threshold": threshold})
+        if export_path:
+            graph.add_stage("export", _export, ["fill"],
+                            {"path": export_path, "format": export_format})
+        return graph
+
+    def run_stages(self, *targets: str) -> Dict[str, Any]:
+        """
+        Run the stage graph, recomputing only stages whose inputs,
+        parameters or source files changed since the last run.
+        """
+        results = self.stages.run(targets or None)
+        logger.info("Stages computed: %s; cached: %s",
+                    self.stages.last_run["computed"], self.stages.last_run["cached"])
+        return results
+
+    # --- INSTRUMENTATION ---
+    @property
+    def profiling(self) -> bool:
+        """True if this manager records stage metrics."""
+        return self._profiler is not None
+
+    def metrics_report(self) -> Dict[str, Any]:
+        """Structured per-stage metrics (empty dict when profiling is off)."""
+        if self._profiler is None:
+            return {}
+        return self._profiler.report()
+
+    def dump_metrics(self, filename: str = "pipeline_metrics.json") -> str:
+        """Write metrics_report() to a JSON file."""
+        if self._profiler is None:
+            raise RuntimeError("Profiling is off; create PipelineManager(profile=True).")
+        return self._profiler.to_json(filename)
+
     # --- PROJECT 4: DATA PERSISTENCE ---
     def save_state(self, filename: str = "pipeline_state.pkl"):
         """Save the entire pipeline (datasets + analyzers) to a file."""
         try:
             with open(filename, 'wb') as f:
                 pickle.dump(self, f)
-            print(f"State saved to {filename}")
+            logger.info("State saved to %s", filename)
         except Exception as e:
-            print(f"Error saving state: {e}")
+            logger.error("Error saving state: %s", e)
 
     @staticmethod
     def load_state(filename: str = "pipeline_state.pkl"):
         """Load a pipeline from a file."""
         if not os.path.exists(filename):
-            print("Save file not found.")
+            logger.warning("Save file not found.")
             return None
         try:
             with open(filename, 'rb') as f:
                 return pickle.load(f)
         except Exception as e:
-            print(f"Error loading state: {e}")
+            logger.error("Error loading state: %s", e)
             return None
@@ -0,0 +1,215 @@
+"""
+schema_mapping.py
+Compiled row transformers for dataset loaders.
+
+A RowTransformer resolves a schema map (source field -> canonical field)
+once per source. It then compiles a small specialised function that
+turns a raw row into a CaseRecord. For CSV the function works on plain
+row lists, with header positions resolved up front and fetched in one
+itemgetter call. For JSON/XML it works on dicts, with the source key
+names baked in. Per-row cost is a few index lookups plus the type
+conversion, instead of repeated dict.get() calls with defaults.
+
+The *_loader() variants compile the whole row loop as well, so the
+common path makes no extra Python call per row.
+
+The transformer itself only holds plain data, so datasets that own one
+still pickle; the compiled closures are built inside each load.
+"""
+
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+CANONICAL_FIELDS = ("date", "location", "cases")
+
+# Rows that fail with any of these are quarantined by the datasets.
+ROW_ERRORS = (ValueError, TypeError, IndexError, AttributeError)
+
+
+class RowTransformer:
+    """
+    Schema map + defaults + converters, compiled into per-source row functions.
+    """
+
+    def __init__(self, schema_map: Optional[Dict[str, str]] = None,
+                 defaults: Optional[Dict[str, Any]] = None,
+                 converters: Optional[Dict[str, Callable]] = None):
+        """
+        Args:
+            schema_map (dict, optional): Source field name -> canonical name
+                ('date', 'location' or 'cases'). Unmapped canonical fields are
+                read from a source field of the same name.
+            defaults (dict, optional): Canonical field -> value used when the
+                source has no such field (before conversion).
+            converters (dict, optional): Canonical field -> callable applied to
+                the raw value. 'cases' defaults to int.
+
+        Raises:
+            ValueError: If the map targets an unknown canonical field or maps
+                two source fields onto the same one.
+        """
+        schema_map = dict(schema_map or {})
+        targets = list(schema_map.values())
+        unknown = [t for t in targets if t not in CANONICAL_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown canonical field(s) in schema map: {unknown}")
+        if len(set(targets)) != len(targets):
+            raise ValueError("Schema map assigns more than one source field to a canonical field.")
+
+        self.schema_map = schema_map
+        self.defaults = dict(defaults or {})
+        self.converters = {"cases": int}
+        self.converters.update(converters or {})
+        # canonical -> source name
+        self.sources = {field: field for field in CANONICAL_FIELDS}
+        self.sources.update({canonical: source for source, canonical in schema_map.items()})
+
+    def __repr__(self):
+        return f"RowTransformer({self.schema_map})"
+
+    def for_header(self, header: Sequence[str], make: Optional[Callable] = None
+                   ) -> Callable[[List[str]], Any]:
+        """
+        Compile a function for list rows laid out like `header`.
+
+        Missing source columns become constants from `defaults`; a missing
+        column with no default is an error for every row, so it raises here.
+
+        Args:
+            header (list[str]): Column names in row order.
+            make (callable, optional): Record constructor taking
+                (date, location, cases). Defaults to CaseRecord.
+        """
+        make = make or _case_record()
+        positions = {name: i for i, name in enumerate(header)}
+        present = [f for f in CANONICAL_FIELDS if self.sources[f] in positions]
+        constants = {}
+        for field in CANONICAL_FIELDS:
+            if field not in present:
+                if field not in self.defaults:
+                    raise ValueError(f"Source has no '{self.sources[field]}' column for '{field}'.")
+                constants[field] = self._convert(field, self.defaults[field])
+
+        convert_date = self.converters.get("date")
+        convert_loc = self.converters.get("location")
+        convert_cases = self.converters.get("cases")
+
+        if len(present) == 3 and not (convert_date or convert_loc):
+            # Common case: every column present, only cases converted.
+            get = itemgetter(*(positions[self.sources[f]] for f in CANONICAL_FIELDS))
+
+            def transform(row):
+                date, location, cases = get(row)
+                return make(date, location, convert_cases(cases) if convert_cases else cases)
+            return transform
+
+        getters = {f: itemgetter(positions[self.sources[f]]) for f in present}
+        return self._general(getters, constants, make)
+
+    def for_mapping(self, make: Optional[Callable] = None) -> Callable[[Dict[str, Any]], Any]:
+        """Compile a function for dict rows (JSON objects, XML records)."""
+        make = make or _case_record()
+        defaults = {f: self.defaults.get(f, None) for f in CANONICAL_FIELDS}
+        d_key, l_key, c_key = (self.sources[f] for f in CANONICAL_FIELDS)
+        d_def, l_def, c_def = (defaults[f] for f in CANONICAL_FIELDS)
+        convert_date = self.converters.get("date")
+        convert_loc = self.converters.get("location")
+        convert_cases = self.converters.get("cases")
+
+        if convert_cases and not (convert_date or convert_loc):
+            # Common case: only the count is converted.
+            def transform(row):
+                get = row.get
+                return make(get(d_key, d_def), get(l_key, l_def), convert_cases(get(c_key, c_def)))
+            return transform
+
+        def transform(row):
+            get = row.get
+            date = get(d_key, d_def)
+            location = get(l_key, l_def)
+            cases = get(c_key, c_def)
+            if convert_date:
+                date = convert_date(date)
+            if convert_loc:
+                location = convert_loc(location)
+            if convert_cases:
+                cases = convert_cases(cases)
+            return make(date, location, cases)
+        return transform
+
+    def header_loader(self, header: Sequence[str], make: Optional[Callable] = None):
+        """
+        Compile a batch loop for list rows: load(rows, append, reject).
+
+        Each parsed record goes to append(record). A failing row goes to
+        reject(row, index, error), where index is the 1-based row position.
+        Callers that track physical line numbers can look them up in reject.
+        """
+        transform = self.for_header(header, make)
+        return _batch_loop(transform)
+
+    def mapping_loader(self, make: Optional[Callable] = None):
+        """
+        Compile a batch loop for dict rows: load(rows, append, reject).
+
+        When every canonical field is present in a row (the normal case),
+        all three are fetched with one itemgetter call. Rows with missing
+        fields fall back to the defaults-aware transformer.
+        """
+        make = make or _case_record()
+        transform = self.for_mapping(make)
+        convert_cases = self.converters.get("cases")
+        if not convert_cases or self.converters.get("date") or self.converters.get("location"):
+            return _batch_loop(transform)
+
+        get_all = itemgetter(*(self.sources[f] for f in CANONICAL_FIELDS))
+
+        def load(rows, append, reject, start=1):
+            for position, row in enumerate(rows, start):
+                try:
+                    try:
+                        date, location, cases = get_all(row)
+                    except KeyError:
+                        append(transform(row))
+                        continue
+                    append(make(date, location, convert_cases(cases)))
+                except ROW_ERRORS as e:
+                    reject(row, position, e)
+        return load
+
+    def _convert(self, field, value):
+        converter = self.converters.get(field)
+        return converter(value) if converter else value
+
+    def _general(self, getters, constants, make):
+        """Fallback for partial headers or extra converters."""
+        converters = self.converters
+        fields = [(f, getters.get(f), converters.get(f)) for f in CANONICAL_FIELDS]
+
+        def transform(row):
+            values = []
+            for field, getter, converter in fields:
+                if getter is None:
+                    values.append(constants[field])
+                else:
+                    value = getter(row)
+                    values.append(converter(value) if converter else value)
+            return make(*values)
+        return transform
+
+
+def _batch_loop(transform):
+    """Wrap a per-row transform in the standard load(rows, append, reject) loop."""
+    def load(rows, append, reject, start=1):
+        for position, row in enumerate(rows, start):
+            try:
+                append(transform(row))
+            except ROW_ERRORS as e:
+                reject(row, position, e)
+    return load
+
+
+def _case_record():
+    # Imported on use: case_data_manager imports this module.
+    from case_data_manager import CaseRecord
+    return CaseRecord
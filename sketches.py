@@ -0,0 +1,307 @@
+"""
+sketches.py
+Approximate streaming statistics in bounded memory.
+
+    HyperLogLog     - distinct count (e.g. unique locations)
+    CountMinSketch  - per-key totals (e.g. cases for one location)
+    SpaceSaving     - top-k keys by weight (e.g. heaviest locations)
+
+Each sketch takes its error target up front, can merge with another
+sketch built with the same settings (one per shard or worker), and
+returns an Estimate with an explicit error bound.
+"""
+
+import hashlib
+import heapq
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+
+class Estimate(NamedTuple):
+    """An approximate value with its error bound.
+
+    For HyperLogLog, `error` is one standard error (about 68% of estimates
+    fall within it, 95% within twice it). For CountMinSketch and
+    SpaceSaving it is a guaranteed bound on the overestimate, holding with
+    the sketch's configured confidence.
+    """
+    value: float
+    error: float
+
+    @property
+    def low(self) -> float:
+        return max(0.0, self.value - self.error)
+
+    @property
+    def high(self) -> float:
+        return self.value + self.error
+
+
+def _hash64(key: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), "big")
+
+
+def _field(record, name):
+    """Read a field from a CaseRecord or a dict."""
+    return record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+
+
+def _check_compatible(a, b, *attrs):
+    if type(a) is not type(b) or any(getattr(a, n) != getattr(b, n) for n in attrs):
+        raise ValueError(f"Cannot merge sketches with different settings ({', '.join(attrs)}).")
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch using 2**precision one-byte registers.
+    """
+
+    def __init__(self, error_rate: float = 0.01):
+        """
+        Args:
+            error_rate (float): Target relative standard error. The register
+                count m is chosen so that 1.04 / sqrt(m) <= error_rate
+                (0.01 -> 16 KiB, 0.02 -> 4 KiB).
+
+        Raises:
+            ValueError: If error_rate is not in (0, 1).
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.precision = min(18, max(4, math.ceil(math.log2((1.04 / error_rate) ** 2))))
+        self.num_registers = 1 << self.precision
+        self._registers = bytearray(self.num_registers)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.num_registers)
+
+    def add(self, key: Any):
+        h = _hash64(key)
+        index = h >> (64 - self.precision)
+        rest = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update(self, keys: Iterable[Any]):
+        for key in keys:
+            self.add(key)
+
+    def estimate(self) -> Estimate:
+        """Estimated number of distinct keys added."""
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        raw = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            raw = m * math.log(m / zeros)      # small-range (linear counting) correction
+        return Estimate(raw, raw * self.relative_error)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another shard's sketch into this one (register-wise max)."""
+        _check_compatible(self, other, "precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._registers)
+
+
+class CountMinSketch:
+    """
+    Per-key weight totals that never underestimate.
+    """
+
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01):
+        """
+        Args:
+            epsilon (float): Overestimate is at most epsilon * total weight...
+            delta (float): ...with probability at least 1 - delta.
+
+        Raises:
+            ValueError: If epsilon or delta is not in (0, 1).
+        """
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError("epsilon and delta must be between 0 and 1")
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self._rows = [array("q", bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+    def _columns(self, key: Any):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: Any, weight: int = 1):
+        for row, column in zip(self._rows, self._columns(key)):
+            row[column] += weight
+        self.total += weight
+
+    def estimate(self, key: Any) -> Estimate:
+        """Estimated total weight for key, with its epsilon * total bound."""
+        value = min(row[column] for row, column in zip(self._rows, self._columns(key)))
+        return Estimate(value, self.epsilon * self.total)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        _check_compatible(self, other, "width", "depth")
+        for mine, theirs in zip(self._rows, other._rows):
+            for i, value in enumerate(theirs):
+                if value:
+                    mine[i] += value
+        self.total += other.total
+        return self
+
+    @property
+    def memory_bytes(self) -> int:
+        return 8 * self.width * self.depth
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary for the top-k heaviest keys.
+    """
+
+    def __init__(self, epsilon: float = 0.001):
+        """
+        Args:
+            epsilon (float): Every key whose true weight exceeds
+                epsilon * total is kept, and each kept count overestimates by
+                at most epsilon * total. Uses ceil(1 / epsilon) counters.
+
+        Raises:
+            ValueError: If epsilon is not in (0, 1).
+        """
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        self.epsilon = epsilon
+        self.capacity = math.ceil(1 / epsilon)
+        self._counts: Dict[Any, int] = {}
+        self._errors: Dict[Any, int] = {}
+        # One (count, tiebreak, key) entry per kept key. Counts only grow, so an
+        # entry is at most stale-low and is refreshed when it reaches the top.
+        self._heap: List[tuple] = []
+        self._tiebreak = 0
+        self.total = 0
+
+    def _push(self, key):
+        self._tiebreak += 1
+        heapq.heappush(self._heap, (self._counts[key], self._tiebreak, key))
+
+    def _pop_smallest(self):
+        heap, counts = self._heap, self._counts
+        while True:
+            count, _, key = heapq.heappop(heap)
+            if counts[key] == count:
+                return key
+            self._push(key)
+
+    def add(self, key: Any, weight: int = 1):
+        counts = self._counts
+        self.total += weight
+        if key in counts:
+            counts[key] += weight
+            return
+        if len(counts) < self.capacity:
+            counts[key] = weight
+            self._errors[key] = 0
+        else:
+            # Replace the smallest counter; the new key inherits its count as error.
+            victim = self._pop_smallest()
+            floor = counts.pop(victim)
+            del self._errors[victim]
+            counts[key] = floor + weight
+            self._errors[key] = floor
+        self._push(key)
+
+    def top(self, k: int = 10) -> List[tuple]:
+        """
+        The k heaviest keys as (key, Estimate) pairs, heaviest first.
+        Each Estimate's error is that key's own overestimate bound.
+        """
+        ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(key, Estimate(count, self._errors[key])) for key, count in ranked]
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Combine two summaries (mergeable Space-Saving), keeping `capacity` counters."""
+        _check_compatible(self, other, "capacity")
+        # A key missing from a full summary may still have up to its minimum count there.
+        floor_a = min(self._counts.values()) if len(self._counts) >= self.capacity else 0
+        floor_b = min(other._counts.values()) if len(other._counts) >= other.capacity else 0
+        counts, errors = {}, {}
+        for key in self._counts.keys() | other._counts.keys():
+            a = self._counts.get(key)
+            b = other._counts.get(key)
+            counts[key] = (floor_a if a is None else a) + (floor_b if b is None else b)
+            errors[key] = ((floor_a if a is None else self._errors[key])
+                           + (floor_b if b is None else other._errors[key]))
+        keep = sorted(counts, key=counts.__getitem__, reverse=True)[:self.capacity]
+        self._counts = {key: counts[key] for key in keep}
+        self._errors = {key: errors[key] for key in keep}
+        self._heap = []
+        for key in keep:
+            self._push(key)
+        self.total += other.total
+        return self
+
+
+class LocationSketch:
+    """
+    Streaming location statistics: distinct locations (HyperLogLog) and
+    heaviest locations by cases (SpaceSaving).
+    """
+
+    def __init__(self, distinct_error: float = 0.01, top_epsilon: float = 0.001):
+        """
+        Args:
+            distinct_error (float): HyperLogLog relative standard error.
+            top_epsilon (float): SpaceSaving error as a fraction of total cases.
+        """
+        self.distinct = HyperLogLog(distinct_error)
+        self.heavy = SpaceSaving(top_epsilon)
+        self.records = 0
+
+    def update(self, records: Iterable[Any]) -> "LocationSketch":
+        """Add CaseRecords or dicts; rows with a non-numeric count add 0 cases."""
+        add_distinct = self.distinct.add
+        add_heavy = self.heavy.add
+        for record in records:
+            location = _field(record, "location")
+            if location is None:
+                continue
+            cases = _field(record, "cases")
+            add_distinct(location)
+            add_heavy(location, cases if isinstance(cases, int) else 0)
+            self.records += 1
+        return self
+
+    def merge(self, other: "LocationSketch") -> "LocationSketch":
+        self.distinct.merge(other.distinct)
+        self.heavy.merge(other.heavy)
+        self.records += other.records
+        return self
+
+    def unique_locations(self) -> Estimate:
+        return self.distinct.estimate()
+
+    def top_locations(self, k: int = 10) -> List[tuple]:
+        return self.heavy.top(k)
+
+    def report(self, k: int = 10) -> Dict[str, Any]:
+        """Estimates and their error bounds as plain data."""
+        unique = self.unique_locations()
+        return {
+            "records": self.records,
+            "unique_locations": {"estimate": round(unique.value),
+                                 "std_error": round(unique.error, 1),
+                                 "relative_error": self.distinct.relative_error},
+            "top_locations": [{"location": key, "cases": est.value, "max_overcount": est.error}
+                              for key, est in self.top_locations(k)],
+            "top_error_bound": self.heavy.epsilon * self.heavy.total,
+        }
@@ -0,0 +1,265 @@
+"""
+spill_store.py
+Memory-budgeted record storage that spills partitions to local disk.
+
+PipelineManager.run_full_analysis normally concatenates every dataset
+into one list. With a memory budget set, datasets load straight into a
+SpillStore instead. Records are buffered as compact (position, date,
+location, cases) rows, and once the buffer's estimated size passes
+max_memory it is written out to partition files, by date range (date
+prefix, e.g. the month of an ISO date) or by location hash.
+
+Reads never need everything in memory at once:
+
+    rows()         - input order: a k-way merge of the partitions by position
+    sorted_rows()  - date order, ties kept in input order (what a stable
+                     sort by date gives): each partition is sorted with an
+                     external merge sort (sorted runs of at most max_memory,
+                     then a heap merge). Date partitions are already in
+                     range order and are simply chained; location partitions
+                     are heap-merged.
+
+Nothing touches the disk while the data fits in the budget.
+"""
+
+import heapq
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from case_data_manager import CaseRecord
+from sharded_pipeline import shard_of
+
+logger = logging.getLogger(__name__)
+
+PARTITION_BY = ("date", "location")
+
+# (position, date, location, cases)
+Row = Tuple[int, Any, Any, Any]
+
+# Stable date order: by date, then by input position.
+_date_order = itemgetter(1, 0)
+
+
+def _row_bytes(row: Row) -> int:
+    """Rough in-memory size of one buffered row."""
+    return (sys.getsizeof(row) + sys.getsizeof(row[1]) + sys.getsizeof(row[2])
+            + sys.getsizeof(row[3]))
+
+
+def _read(path: str) -> Iterator[Row]:
+    """Rows from a spill file, written as consecutive pickled lists."""
+    with open(path, "rb") as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def _fields(record) -> Tuple[Any, Any, Any]:
+    if isinstance(record, dict):
+        return record.get("date"), record.get("location"), record.get("cases")
+    return record.date, record.location, record.cases
+
+
+class SpillStore:
+    """
+    Append-only record store bounded by an (estimated) memory budget.
+    """
+
+    def __init__(self, max_memory: int, spill_dir: Optional[str] = None,
+                 partition_by: str = "date", partitions: int = 16, date_prefix: int = 7):
+        """
+        Args:
+            max_memory (int): Budget in bytes for buffered rows, and for
+                each sorted run of the external sort.
+            spill_dir (str, optional): Directory for spill files (default:
+                a temporary directory, removed by close()).
+            partition_by (str): 'date' (date-range partitions) or 'location'
+                (hash partitions).
+            partitions (int): Number of location partitions.
+            date_prefix (int): Leading characters of the date that name a
+                date partition (7 = 'YYYY-MM' for ISO dates).
+
+        Raises:
+            ValueError: If max_memory or partitions is below 1, or
+                partition_by is unknown.
+        """
+        if max_memory < 1 or partitions < 1:
+            raise ValueError("max_memory and partitions must be at least 1")
+        if partition_by not in PARTITION_BY:
+            raise ValueError(f"partition_by must be one of {PARTITION_BY}")
+        self.max_memory = max_memory
+        self.partition_by = partition_by
+        self.partitions = partitions
+        self.date_prefix = date_prefix
+        self._spill_dir = spill_dir
+        self._owns_dir = spill_dir is None
+        self._files: Dict[Any, str] = {}
+        self._buffer: List[Row] = []
+        self._buffer_bytes = 0
+        self._size = 0
+        self._runs = 0
+        self.spills = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """True once any records have been written to disk."""
+        return bool(self._files)
+
+    def append(self, record):
+        """Add a CaseRecord (or date/location/cases dict)."""
+        row = (self._size, *_fields(record))
+        self._buffer.append(row)
+        self._buffer_bytes += _row_bytes(row)
+        self._size += 1
+        if self._buffer_bytes > self.max_memory:
+            self.spill()
+
+    def extend(self, records: Iterable[Any]):
+        for record in records:
+            self.append(record)
+
+    def _partition(self, row: Row):
+        if self.partition_by == "date":
+            return str(row[1])[:self.date_prefix]
+        return shard_of(row[2], self.partitions)
+
+    def _path(self, name: str) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="spill-")
+        os.makedirs(self._spill_dir, exist_ok=True)
+        return os.path.join(self._spill_dir, name)
+
+    def spill(self):
+        """Write the buffered rows to their partition files and empty the buffer."""
+        if not self._buffer:
+            return
+        groups: Dict[Any, List[Row]] = {}
+        for row in self._buffer:
+            key = self._partition(row)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = []
+            group.append(row)
+        for key, rows in groups.items():
+            path = self._files.get(key)
+            if path is None:
+                path = self._files[key] = self._path(f"part-{len(self._files):05d}.pkl")
+            with open(path, "ab") as f:
+                pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+        logger.info("Spilled %d record(s) to %d partition(s).", len(self._buffer), len(groups))
+        self.spills += 1
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def rows(self) -> Iterator[Row]:
+        """All rows in input order."""
+        # Each partition file is in position order, and the buffer holds the newest rows.
+        return heapq.merge(*map(_read, self._files.values()), iter(list(self._buffer)))
+
+    def __iter__(self) -> Iterator[CaseRecord]:
+        for _, date, location, cases in self.rows():
+            yield CaseRecord(date, location, cases)
+
+    def sorted_rows(self) -> Iterator[Row]:
+        """All rows by date; equal dates keep input order."""
+        if not self._files:
+            return iter(sorted(self._buffer, key=_date_order))
+        self.spill()
+        if self.partition_by == "date":
+            # A date prefix orders partitions the way the full dates sort.
+            return chain.from_iterable(self._sorted_partition(self._files[key])
+                                       for key in sorted(self._files))
+        return heapq.merge(*(self._sorted_partition(path) for path in self._files.values()),
+                           key=_date_order)
+
+    def _sorted_partition(self, path: str) -> Iterator[Row]:
+        """External merge sort of one partition file."""
+        runs = []
+        chunk: List[Row] = []
+        chunk_bytes = 0
+        for row in _read(path):
+            chunk.append(row)
+            chunk_bytes += _row_bytes(row)
+            if chunk_bytes > self.max_memory:
+                runs.append(self._write_run(chunk))
+                chunk = []
+                chunk_bytes = 0
+        if not runs:
+            yield from sorted(chunk, key=_date_order)
+            return
+        if chunk:
+            runs.append(self._write_run(chunk))
+        try:
+            yield from heapq.merge(*map(_read, runs), key=_date_order)
+        finally:
+            for run in runs:
+                os.remove(run)
+
+    def _write_run(self, rows: List[Row]) -> str:
+        rows.sort(key=_date_order)
+        self._runs += 1
+        path = self._path(f"run-{self._runs:06d}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+        return path
+
+    def close(self):
+        """Drop every record and delete the spill files."""
+        for path in self._files.values():
+            if os.path.exists(path):
+                os.remove(path)
+        if self._owns_dir and self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        self._files = {}
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._size = 0
+
+
+class StoreSlice:
+    """
+    One dataset's records inside a shared SpillStore.
+
+    Used as the dataset's record list: the loader's appends go to the
+    store, and reads see only the positions appended through this slice.
+    """
+
+    def __init__(self, store: SpillStore):
+        self.store = store
+        self.start = len(store)
+        self.end: Optional[int] = None
+
+    def append(self, record):
+        if self.end is not None:
+            raise TypeError("This dataset's records were handed to a spill store and are read-only.")
+        self.store.append(record)
+
+    def freeze(self):
+        """Close the slice once its dataset has finished loading."""
+        self.end = len(self.store)
+
+    def __len__(self):
+        end = len(self.store) if self.end is None else self.end
+        return end - self.start
+
+    def __iter__(self) -> Iterator[CaseRecord]:
+        end = len(self.store) if self.end is None else self.end
+        for position, date, location, cases in self.store.rows():
+            if position >= end:
+                return
+            if position >= self.start:
+                yield CaseRecord(date, location, cases)
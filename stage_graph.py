@@ -0,0 +1,218 @@
+"""
+stage_graph.py
+Declarative, dependency-tracked processing stages.
+
+Each Stage names the stages it reads from. A stage's fingerprint hashes
+its function, its parameters and the fingerprints of its inputs (source
+stages hash a cheap signature such as file size + mtime instead). Results
+are cached under that fingerprint, so after a source file or a parameter
+changes only the stages downstream of the change are recomputed.
+
+Stage functions receive their inputs positionally (in declared order)
+followed by their params as keyword arguments. They must not mutate
+their inputs, because those are cached results shared with other stages.
+"""
+
+import hashlib
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def _token(value, _seen=frozenset()) -> str:
+    """Stable text form of a value for hashing (no memory addresses)."""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_token(v, _seen) for v in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{_token(k, _seen)}:{_token(v, _seen)}"
+                              for k, v in sorted(value.items(), key=lambda kv: repr(kv[0]))) + "}"
+    if callable(value):
+        return _func_token(value, _seen)
+    if hasattr(value, "__dict__"):
+        return f"{type(value).__qualname__}({_token(vars(value), _seen)})"
+    return repr(value)
+
+
+def _code_token(code) -> str:
+    """Hash of a code object's bytecode, constants (nested code included) and names."""
+    consts = ",".join(_code_token(c) if hasattr(c, "co_code") else repr(c)
+                      for c in code.co_consts)
+    material = f"{code.co_code.hex()}|{consts}|{code.co_names}"
+    return hashlib.blake2b(material.encode(), digest_size=8).hexdigest()
+
+
+def _func_token(func, _seen=frozenset()) -> str:
+    """
+    Identify a stage function by what it computes, not just its name.
+
+    A partial includes its function, args and keywords; a bound method
+    the settings of its object; a plain function or lambda its bytecode,
+    constants, defaults and closure values, so two lambdas (or one edited
+    in place) never share a token. Module globals a function reads are not
+    included.
+    """
+    if id(func) in _seen:
+        return "<recursive>"
+    _seen = _seen | {id(func)}
+    if isinstance(func, partial):
+        return (f"partial({_func_token(func.func, _seen)},{_token(func.args, _seen)},"
+                f"{_token(func.keywords, _seen)})")
+    owner = getattr(func, "__self__", None)
+    if owner is not None and hasattr(owner, "__dict__"):
+        return f"{type(owner).__qualname__}.{func.__name__}({_token(vars(owner), _seen)})"
+    name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', None)}"
+    code = getattr(func, "__code__", None)
+    if code is None:
+        if not hasattr(func, "__qualname__") and hasattr(func, "__dict__"):
+            # A callable object: its class and settings.
+            return f"{type(func).__qualname__}({_token(vars(func), _seen)})"
+        return name if hasattr(func, "__qualname__") else repr(func)
+    cells = []
+    for cell in func.__closure__ or ():
+        try:
+            cells.append(_token(cell.cell_contents, _seen))
+        except ValueError:
+            cells.append("<empty>")
+    return (f"{name}#{_code_token(code)}({_token(func.__defaults__, _seen)},"
+            f"{_token(func.__kwdefaults__, _seen)},[{','.join(cells)}])")
+
+
+class Stage:
+    """
+    One node of the processing graph.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                 params: Optional[Dict[str, Any]] = None,
+                 signature: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            name (str): Unique stage name.
+            func (callable): Called as func(*input_values, **params).
+            inputs (iterable[str]): Names of upstream stages.
+            params (dict, optional): Keyword arguments; part of the fingerprint.
+            signature (callable, optional): For source stages, returns a cheap
+                token that changes when the underlying data changes. When
+                given it replaces the function/params part of the fingerprint.
+        """
+        if not isinstance(name, str) or not name:
+            raise ValueError("Stage name must be a non-empty string.")
+        if not callable(func):
+            raise TypeError("Stage func must be callable.")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.signature = signature
+
+    def __repr__(self):
+        return f"Stage('{self.name}', inputs={self.inputs})"
+
+
+class StageGraph:
+    """
+    Runs stages in dependency order and caches results by fingerprint.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Stage] = {}
+        self._cache: Dict[str, tuple] = {}   # name -> (fingerprint, value)
+        self.last_run = {"computed": [], "cached": []}
+
+    def add_stage(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                  params: Optional[Dict[str, Any]] = None,
+                  signature: Optional[Callable[[], Any]] = None) -> Stage:
+        """Register (or replace) a stage. See Stage for the arguments."""
+        stage = Stage(name, func, inputs, params, signature)
+        self._stages[name] = stage
+        return stage
+
+    def remove_stage(self, name: str):
+        """Drop a stage and its cached result."""
+        self._stages.pop(name, None)
+        self._cache.pop(name, None)
+
+    def set_params(self, name: str, **params):
+        """Update a stage's parameters; downstream stages rerun on next run()."""
+        if name not in self._stages:
+            raise KeyError(f"Unknown stage: {name}")
+        self._stages[name].params.update(params)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Forget cached results for one stage, or for all when name is None."""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+    @property
+    def stage_names(self) -> List[str]:
+        return list(self._stages)
+
+    def _order(self, targets: Iterable[str]) -> List[str]:
+        """Topologically sort the targets and everything they depend on."""
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in stage graph: {' -> '.join(path + [name])}")
+            if name not in self._stages:
+                raise KeyError(f"Unknown stage: {name}")
+            state[name] = "visiting"
+            for dep in self._stages[name].inputs:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for target in targets:
+            visit(target, [])
+        return order
+
+    def fingerprints(self, targets: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Compute current fingerprints without running anything."""
+        names = self._order(list(targets) if targets is not None else list(self._stages))
+        prints = {}
+        for name in names:
+            stage = self._stages[name]
+            if stage.signature is not None:
+                own = "source:" + _token(stage.signature())
+            else:
+                own = _func_token(stage.func) + _token(stage.params)
+            material = "|".join([name, own] + [prints[dep] for dep in stage.inputs])
+            prints[name] = hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+        return prints
+
+    def is_dirty(self, name: str) -> bool:
+        """True if the stage would be recomputed by the next run."""
+        cached = self._cache.get(name)
+        return cached is None or cached[0] != self.fingerprints([name])[name]
+
+    def run(self, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Bring the target stages (default: all) up to date.
+
+        Returns:
+            dict: Stage name -> result for the targets and their dependencies.
+            self.last_run lists which stages were computed vs. served from cache.
+        """
+        targets = list(targets) if targets is not None else list(self._stages)
+        prints = self.fingerprints(targets)
+        results, computed, cached = {}, [], []
+
+        for name in self._order(targets):
+            stage = self._stages[name]
+            hit = self._cache.get(name)
+            if hit is not None and hit[0] == prints[name]:
+                results[name] = hit[1]
+                cached.append(name)
+                continue
+            value = stage.func(*(results[dep] for dep in stage.inputs), **stage.params)
+            self._cache[name] = (prints[name], value)
+            results[name] = value
+            computed.append(name)
+
+        self.last_run = {"computed": computed, "cached": cached}
+        return results
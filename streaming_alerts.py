@@ -0,0 +1,218 @@
+"""
+streaming_alerts.py
+Real-time outbreak alerts over per-location sliding windows.
+
+AlertReport and generate_outbreak_alert_report look at a finished list.
+StreamingAlertEngine instead updates each location's rolling totals as
+records arrive and raises alerts as soon as a window crosses a
+threshold or grows too fast. Each location keeps a ring buffer covering
+two windows of daily counts (the current N days and the N days before),
+plus running sums for both. Adding a record is O(1), and moving to a
+new day is amortized O(1). Alerts are delivered to registered callbacks
+and debounced per location and alert kind.
+
+Hooking into the drop-directory service:
+    engine = StreamingAlertEngine(window_days=7, threshold=500, growth_rate=0.5)
+    engine.on_alert(page_on_call)
+    ingestor.on_records(lambda path, chunk: engine.process_many(chunk))
+"""
+
+import datetime
+import logging
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD = "threshold"
+GROWTH = "growth"
+
+
+class StreamAlert(NamedTuple):
+    """One alert raised by the engine."""
+    kind: str                 # THRESHOLD or GROWTH
+    location: str
+    date: datetime.date       # last day of the window that triggered it
+    window_total: int
+    previous_total: int
+    message: str
+
+
+def _field(record, name):
+    """Read a field from a CaseRecord or a dict."""
+    return record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+
+
+class _Window:
+    """Ring buffer of 2 * window_days daily counts for one location."""
+
+    __slots__ = ("head", "counts", "current", "previous", "last_alert")
+
+    def __init__(self, span: int, day: int):
+        self.head = day
+        self.counts = array("q", bytes(8 * span))
+        self.current = 0
+        self.previous = 0
+        self.last_alert: Dict[str, int] = {}
+
+
+class StreamingAlertEngine:
+    """
+    Incremental threshold and growth-rate alerts per location.
+    """
+
+    def __init__(self, window_days: int = 7, threshold: Optional[int] = 50,
+                 growth_rate: Optional[float] = None, min_baseline: int = 10,
+                 cooldown_days: Optional[int] = None, locations=None):
+        """
+        Args:
+            window_days (int): Length N of the rolling window, in days.
+            threshold (int, optional): Alert when the N-day total reaches this.
+                None disables threshold alerts.
+            growth_rate (float, optional): Alert when the N-day total exceeds
+                the previous N days by this fraction (0.5 = +50%). None
+                disables growth alerts.
+            min_baseline (int): Growth alerts need at least this many cases
+                in the previous window, so 1 -> 3 cases is not a +200% alert.
+            cooldown_days (int, optional): After an alert, the same location
+                and kind stays quiet for this many days (default: window_days).
+            locations (LocationRegistry, optional): Merges location spellings.
+
+        Raises:
+            ValueError: If window_days < 1, threshold < 0 or growth_rate <= 0.
+        """
+        if window_days < 1:
+            raise ValueError("window_days must be at least 1")
+        if threshold is not None and threshold < 0:
+            raise ValueError("Threshold must be non-negative.")
+        if growth_rate is not None and growth_rate <= 0:
+            raise ValueError("growth_rate must be positive")
+        self.window_days = window_days
+        self.threshold = threshold
+        self.growth_rate = growth_rate
+        self.min_baseline = min_baseline
+        self.cooldown_days = window_days if cooldown_days is None else cooldown_days
+        self._locations = locations
+        self._windows: Dict[str, _Window] = {}
+        self._ordinals: Dict[Any, int] = {}
+        self._callbacks: List[Callable[[StreamAlert], Any]] = []
+        self.records_processed = 0
+        self.late_dropped = 0
+        self.alerts_suppressed = 0
+
+    def on_alert(self, callback: Callable[[StreamAlert], Any]):
+        """Call callback(alert) for every alert, as soon as it is raised."""
+        self._callbacks.append(callback)
+
+    def _day(self, value) -> int:
+        day = self._ordinals.get(value)
+        if day is None:
+            if isinstance(value, datetime.date):
+                day = value.toordinal()
+            else:
+                day = datetime.date.fromisoformat(str(value).strip()).toordinal()
+            self._ordinals[value] = day
+        return day
+
+    def _advance(self, window: _Window, day: int):
+        """Move the window head forward to `day`, evicting old days."""
+        span = 2 * self.window_days
+        counts = window.counts
+        if day - window.head >= span:
+            for i in range(span):
+                counts[i] = 0
+            window.current = window.previous = 0
+            window.head = day
+            return
+        n = self.window_days
+        for head in range(window.head + 1, day + 1):
+            slot = head % span
+            window.previous -= counts[slot]      # day head - 2N leaves both windows
+            counts[slot] = 0
+            moved = counts[(head - n) % span]    # day head - N leaves the current window
+            window.current -= moved
+            window.previous += moved
+        window.head = day
+
+    def process(self, date, location: str, cases: int) -> List[StreamAlert]:
+        """
+        Add one record and return (and deliver) any alerts it triggers.
+
+        Records older than two windows behind the location's latest day are
+        dropped and counted in late_dropped.
+
+        Raises:
+            ValueError: If date is not an ISO date or cases is not a number.
+        """
+        day = self._day(date)
+        cases = int(cases)
+        key = self._locations.normalize(location) if self._locations is not None else location
+        self.records_processed += 1
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(2 * self.window_days, day)
+        elif day > window.head:
+            self._advance(window, day)
+        elif day <= window.head - 2 * self.window_days:
+            self.late_dropped += 1
+            return []
+
+        window.counts[day % (2 * self.window_days)] += cases
+        if day > window.head - self.window_days:
+            window.current += cases
+        else:
+            window.previous += cases
+        return self._check(key, window)
+
+    def process_many(self, records: Iterable[Any]) -> List[StreamAlert]:
+        """Process CaseRecords or dicts in arrival order; bad rows are skipped."""
+        alerts = []
+        for record in records:
+            try:
+                alerts.extend(self.process(_field(record, "date"), _field(record, "location"),
+                                           _field(record, "cases")))
+            except (TypeError, ValueError) as e:
+                logger.debug("Skipping unreadable record %r: %s", record, e)
+        return alerts
+
+    def _check(self, key: str, window: _Window) -> List[StreamAlert]:
+        alerts = []
+        date = datetime.date.fromordinal(window.head)
+        if self.threshold is not None and window.current >= self.threshold:
+            alerts.append(self._raise(THRESHOLD, key, window, date,
+                                      f"ALERT: {key} had {window.current} cases in the "
+                                      f"{self.window_days} days to {date} "
+                                      f"(Threshold: {self.threshold})"))
+        if (self.growth_rate is not None and window.previous >= self.min_baseline
+                and window.current > window.previous * (1 + self.growth_rate)):
+            growth = (window.current - window.previous) / window.previous * 100
+            alerts.append(self._raise(GROWTH, key, window, date,
+                                      f"ALERT: {key} cases up {growth:.1f}% over the previous "
+                                      f"{self.window_days} days ({window.previous} -> "
+                                      f"{window.current}) as of {date}"))
+        return [a for a in alerts if a is not None]
+
+    def _raise(self, kind, key, window, date, message) -> Optional[StreamAlert]:
+        last = window.last_alert.get(kind)
+        if last is not None and window.head - last < self.cooldown_days:
+            self.alerts_suppressed += 1
+            return None
+        window.last_alert[kind] = window.head
+        alert = StreamAlert(kind, key, date, window.current, window.previous, message)
+        for callback in self._callbacks:
+            try:
+                callback(alert)
+            except Exception as e:
+                # A failing pager must not stop the stream.
+                logger.error("Alert callback failed: %s", e)
+        return alert
+
+    def window_totals(self, location: str) -> Optional[Dict[str, int]]:
+        """Current and previous window totals for a location, or None."""
+        key = self._locations.normalize(location) if self._locations is not None else location
+        window = self._windows.get(key)
+        if window is None:
+            return None
+        return {"current": window.current, "previous": window.previous,
+                "as_of": datetime.date.fromordinal(window.head).isoformat()}
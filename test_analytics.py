@@ -0,0 +1,349 @@
+import unittest
+import random
+
+import datetime
+
+from statistics import mean
+
+from age_index import AgeIndex
+from alert_report import AlertReport
+from analysis_modules import TrendAnalyzer
+from backtesting import MODELS, Backtester, format_table
+from case_columns import CaseColumns, as_columns
+from case_data_manager import CaseRecord
+from forecasting_analyzer import ForecastingAnalyzer
+from pipeline_manager import PipelineManager
+from date_range_index import DateRangeIndex
+from location_registry import LocationRegistry
+from pipeline_functions import count_unique_locations
+from sketches import CountMinSketch, HyperLogLog, LocationSketch, SpaceSaving
+from streaming_alerts import GROWTH, THRESHOLD, StreamingAlertEngine
+from pipeline_functions import filter_cases_by_age, predict_future_cases
+
+
+class TestAgeIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(38)
+        self.records = [{"id": i, "age": rng.randint(0, 99)} for i in range(500)]
+        self.records += [{"id": 500, "age": None}, {"id": 501, "age": "unknown"}]
+        self.index = AgeIndex(self.records, normalize=False)
+
+    def test_queries_match_linear_scan(self):
+        """Unit: bisect queries return the same records, in the same order."""
+        for low, high in [(None, None), (0, 17), (18, 64), (65, None), (None, 5), (50, 40)]:
+            self.assertEqual(self.index.query(low, high),
+                             filter_cases_by_age(self.records, low, high))
+            self.assertEqual(self.index.count(low, high),
+                             len(filter_cases_by_age(self.records, low, high)))
+        self.assertEqual(filter_cases_by_age(self.index, 18, 64),
+                         filter_cases_by_age(self.records, 18, 64))
+
+    def test_normalized_ages(self):
+        """Unit: range strings index at their midpoint; unreadable ages are skipped."""
+        index = AgeIndex([{"age": "20-30"}, {"age": "41"}, {"age": "n/a"}, {"age": 8}])
+        self.assertEqual(len(index), 3)
+        self.assertEqual([r["age"] for r in index.query(20, 45)], ["20-30", "41"])
+        self.assertEqual([r["age"] for r in index.query(keep_order=False)], [8, "20-30", "41"])
+
+    def test_histogram(self):
+        """Unit: bands by width or explicit ranges cover every indexed record."""
+        by_width = self.index.histogram(25)
+        self.assertEqual(list(by_width), ["0-24", "25-49", "50-74", "75-99"])
+        self.assertEqual(sum(by_width.values()), len(self.index))
+        bands = self.index.histogram(["0-17", (18, 64), "65-120"])
+        self.assertEqual(bands["18-64"], self.index.count(18, 64))
+        with self.assertRaises(ValueError):
+            self.index.histogram(["adults"])
+
+
+class TestDateRangeIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(41)
+        start = datetime.date(2025, 1, 1)
+        self.records = [CaseRecord((start + datetime.timedelta(days=rng.randint(0, 59))).isoformat(),
+                                   rng.choice(["A", "B", "C"]), rng.randint(0, 20))
+                        for _ in range(400)]
+
+    def _scan(self, location, start, end):
+        return sum(r.cases for r in self.records
+                   if r.location == location and (start is None or r.date >= start)
+                   and (end is None or r.date <= end))
+
+    def test_range_totals_match_scan(self):
+        """Unit: prefix-sum totals equal a full scan for arbitrary ranges."""
+        index = DateRangeIndex(self.records)
+        for location in ("A", "B", "C", "Z"):
+            for start, end in [(None, None), ("2025-01-10", "2025-02-05"),
+                               ("2025-01-15", "2025-01-15"), ("2025-02-20", "2025-01-01"),
+                               (None, "2025-01-20"), ("2025-02-01", None)]:
+                self.assertEqual(index.range_total(location, start, end),
+                                 self._scan(location, start, end), (location, start, end))
+
+    def test_out_of_order_appends(self):
+        """Unit: late rows are merged into the prefix sums before the next query."""
+        index = DateRangeIndex()
+        index.add("2025-01-05", "A", 5)
+        index.add("2025-01-05", "A", 1)
+        self.assertEqual(index.range_total("A"), 6)
+        index.add("2025-01-02", "A", 3)
+        index.add(datetime.date(2025, 1, 9), "A", 4)
+        self.assertEqual(index.range_total("A", "2025-01-01", "2025-01-05"), 9)
+        self.assertEqual(index.date_span("A"), (datetime.date(2025, 1, 2), datetime.date(2025, 1, 9)))
+
+    def test_skips_bad_rows_and_normalizes_locations(self):
+        """Unit: unreadable rows are counted; a registry merges spellings."""
+        index = DateRangeIndex([{"date": "2025-01-01", "location": "boston ", "cases": 2},
+                                {"date": "2025-01-01", "location": "Boston", "cases": "3"},
+                                {"date": "01/02/25", "location": "Boston", "cases": 9},
+                                {"date": "2025-01-02", "location": "Boston", "cases": "n/a"}],
+                               locations=LocationRegistry())
+        self.assertEqual(index.skipped, 2)
+        self.assertEqual(index.locations(), ["Boston"])
+        self.assertEqual(index.range_total("BOSTON"), 5)
+
+
+class TestSketches(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        # Zipf-like: location i appears about 1/(i+1) as often as location 0.
+        names = [f"L{i}" for i in range(2000)]
+        weights = [1 / (i + 1) for i in range(2000)]
+        self.rows = [{"location": loc, "cases": rng.randint(1, 10)}
+                     for loc in rng.choices(names, weights, k=20000)]
+        self.exact = {}
+        for r in self.rows:
+            self.exact[r["location"]] = self.exact.get(r["location"], 0) + r["cases"]
+
+    def test_hyperloglog_within_error_bound(self):
+        """Unit: distinct estimate is within 3 standard errors; shards merge."""
+        a, b = HyperLogLog(0.02), HyperLogLog(0.02)
+        a.update(r["location"] for r in self.rows[:10000])
+        b.update(r["location"] for r in self.rows[10000:])
+        estimate = a.merge(b).estimate()
+        self.assertLessEqual(abs(estimate.value - len(self.exact)), 3 * estimate.error)
+        self.assertAlmostEqual(count_unique_locations(self.rows, error_rate=0.01),
+                               count_unique_locations(self.rows), delta=len(self.exact) * 0.03)
+        with self.assertRaises(ValueError):
+            a.merge(HyperLogLog(0.1))
+
+    def test_count_min_never_underestimates(self):
+        """Unit: point estimates are >= truth and within epsilon * total."""
+        sketch = CountMinSketch(epsilon=0.01, delta=0.01)
+        for r in self.rows:
+            sketch.add(r["location"], r["cases"])
+        for location in ("L0", "L5", "L1999"):
+            est = sketch.estimate(location)
+            truth = self.exact.get(location, 0)
+            self.assertGreaterEqual(est.value, truth)
+            self.assertLessEqual(est.value - truth, est.error)
+
+    def test_space_saving_finds_heavy_hitters_across_shards(self):
+        """Unit: the true top locations are reported, counts within their error."""
+        shards = [LocationSketch(top_epsilon=0.01).update(self.rows[i::4]) for i in range(4)]
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        top = merged.top_locations(3)
+        truth = sorted(self.exact, key=self.exact.get, reverse=True)[:3]
+        self.assertEqual([key for key, _ in top], truth)
+        for key, est in top:
+            self.assertLessEqual(self.exact[key], est.value)
+            self.assertLessEqual(est.value - self.exact[key], est.error)
+
+        report = merged.report(3)
+        self.assertEqual(report["records"], len(self.rows))
+        self.assertIn("std_error", report["unique_locations"])
+
+    def test_space_saving_bounded(self):
+        """Unit: the summary never holds more than its capacity."""
+        summary = SpaceSaving(epsilon=0.1)
+        for r in self.rows:
+            summary.add(r["location"], r["cases"])
+        self.assertLessEqual(len(summary.top(100)), summary.capacity)
+
+
+class TestStreamingAlerts(unittest.TestCase):
+
+    @staticmethod
+    def day(n):
+        return (datetime.date(2025, 1, 1) + datetime.timedelta(days=n)).isoformat()
+
+    def test_rolling_sums_match_recomputation(self):
+        """Unit: incremental window totals equal a from-scratch sum, even with late rows."""
+        rng = random.Random(43)
+        engine = StreamingAlertEngine(window_days=5, threshold=None)
+        seen = []
+        clock = latest = 0
+        for _ in range(600):
+            clock += rng.choice([0, 0, 1, 1, 2, 9])
+            day = clock - rng.choice([0, 0, 0, 1, 3, 6])      # some records arrive late
+            cases = rng.randint(0, 9)
+            engine.process(self.day(day), "A", cases)
+            latest = max(latest, day) if seen else day
+            if day > latest - 10:
+                seen.append((day, cases))
+            totals = engine.window_totals("A")
+            self.assertEqual(totals["current"], sum(c for d, c in seen if latest - 5 < d <= latest))
+            self.assertEqual(totals["previous"],
+                             sum(c for d, c in seen if latest - 10 < d <= latest - 5))
+
+    def test_threshold_alerts_are_debounced_and_delivered(self):
+        """Unit: crossing alerts reach callbacks once per cooldown; a bad callback is ignored."""
+        engine = StreamingAlertEngine(window_days=3, threshold=30, cooldown_days=3)
+        delivered = []
+        engine.on_alert(lambda alert: 1 / 0)
+        engine.on_alert(delivered.append)
+        for n in range(10):
+            engine.process(self.day(n), "Boston", 20)
+        self.assertEqual([a.date.day for a in delivered], [2, 5, 8])
+        self.assertEqual([a.window_total for a in delivered], [40, 60, 60])
+        self.assertTrue(all(a.kind == THRESHOLD for a in delivered))
+        self.assertEqual(engine.alerts_suppressed, 6)
+
+    def test_growth_alert_needs_baseline(self):
+        """Unit: growth is measured against the previous window above min_baseline."""
+        engine = StreamingAlertEngine(window_days=2, threshold=None, growth_rate=1.0,
+                                      min_baseline=10)
+        records = [{"date": self.day(0), "location": "A", "cases": 1},
+                   {"date": self.day(2), "location": "A", "cases": 9},      # baseline too small
+                   {"date": self.day(3), "location": "A", "cases": 5},
+                   {"date": self.day(4), "location": "A", "cases": 5},
+                   {"date": self.day(6), "location": "A", "cases": 25},
+                   {"date": "not a date", "location": "A", "cases": 1}]
+        alerts = engine.process_many(records)
+        self.assertEqual([(a.kind, a.window_total, a.previous_total) for a in alerts],
+                         [(GROWTH, 25, 10)])
+
+    def test_very_late_records_are_dropped(self):
+        """Unit: records older than two windows do not change the totals."""
+        engine = StreamingAlertEngine(window_days=2, threshold=None)
+        engine.process(self.day(10), "A", 1)
+        engine.process(self.day(2), "A", 100)
+        self.assertEqual(engine.late_dropped, 1)
+        self.assertEqual(engine.window_totals("A")["current"], 1)
+        self.assertIsNone(engine.window_totals("B"))
+
+class _RecordListAnalyzer:
+    """Analyzer without accepts_columns; must keep receiving the record list."""
+
+    def analyze(self, records):
+        return type(records).__name__
+
+
+class TestCaseColumns(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(47)
+        self.records = [CaseRecord(f"2025-01-{rng.randint(1, 28):02d}", rng.choice("ABC"),
+                                   rng.randint(0, 90))
+                        for _ in range(300)]
+        self.dicts = [{"date": r.date, "location": r.location, "cases": r.cases}
+                      for r in self.records]
+
+    def test_every_input_form_gives_the_same_columns(self):
+        """Unit: CaseRecords, dicts, mixed lists and column batches convert alike."""
+        expected = as_columns(self.records)
+        mixed = self.records[:150] + self.dicts[150:]
+        batch = {"date": expected.date, "location": expected.location, "cases": expected.cases}
+        for form in (self.dicts, mixed, batch):
+            columns = as_columns(form)
+            self.assertEqual((columns.date, columns.location, columns.cases),
+                             (expected.date, expected.location, expected.cases))
+        self.assertIs(as_columns(expected), expected)
+        partial = as_columns([{"cases": 3}, {"date": "2025-01-01"}])
+        self.assertEqual((partial.date, partial.location, partial.cases),
+                         (["Unknown", "2025-01-01"], ["Unknown", "Unknown"], [3, 0]))
+        with self.assertRaises(ValueError):
+            CaseColumns([1], [], [])
+
+    def test_analyzers_agree_across_forms(self):
+        """Unit: analyzer results do not depend on the record representation."""
+        columns = as_columns(self.records)
+        for analyzer in (TrendAnalyzer(), ForecastingAnalyzer()):
+            expected = analyzer.analyze(self.records)
+            self.assertEqual(analyzer.analyze(self.dicts), expected)
+            self.assertEqual(analyzer.analyze(columns), expected)
+        self.assertEqual(AlertReport(columns, threshold=80).generate_alerts(),
+                         AlertReport(self.dicts, threshold=80).generate_alerts())
+
+    def test_moving_average_matches_window_means(self):
+        """Unit: the running-sum moving average equals statistics.mean per window."""
+        ordered = sorted(self.dicts, key=lambda d: d["date"])
+        counts = [d["cases"] for d in ordered]
+        expected = [round(mean(counts[max(0, i - 6):i + 1]), 2) for i in range(len(counts))]
+        result = TrendAnalyzer().analyze(self.records)["moving_average"]
+        self.assertEqual(result, expected)
+        self.assertEqual([type(v) for v in result], [type(v) for v in expected])
+
+    def test_manager_converts_once_for_opted_in_analyzers(self):
+        """Integration: column-aware analyzers share a batch; others get the list."""
+        manager = PipelineManager()
+        manager.register_analyzer(TrendAnalyzer())
+        manager.register_analyzer(_RecordListAnalyzer())
+        results = manager.analyze_records(self.records)
+        self.assertEqual(results["TrendAnalyzer"], TrendAnalyzer().analyze(self.records))
+        self.assertEqual(results["_RecordListAnalyzer"], "list")
+
+
+def _flat_ten(series, origin, horizon):
+    """Backtest model for the tests (module-level so workers can import it)."""
+    return [10] * horizon
+
+
+class TestBacktesting(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(48)
+        start = datetime.date(2025, 1, 1)
+        self.records = [{"date": (start + datetime.timedelta(days=d)).isoformat(),
+                         "location": location, "cases": max(0, 20 + d // 3 + rng.randint(-8, 8))}
+                        for location in ("A", "B", "C") for d in range(40)]
+        self.records.append({"date": "not a date", "location": "A", "cases": 1})
+        self.backtester = Backtester(self.records)
+
+    def test_models_match_the_forecasters(self):
+        """Unit: the O(1) model forms agree with predict_future_cases and ForecastingAnalyzer."""
+        series = self.backtester.series["B"]
+        for origin in (2, 10, 35):
+            history = list(series.counts[:origin + 1])
+            self.assertEqual(MODELS["average_change"](series, origin, 5),
+                             predict_future_cases(history, 5))
+            self.assertEqual(MODELS["forecasting_analyzer"](series, origin, 5),
+                             ForecastingAnalyzer(5).analyze({"cases": history})["future_predictions"])
+        self.assertEqual(self.backtester.skipped, 1)
+
+    def test_errors_match_brute_force(self):
+        """Unit: MAE/MAPE equal a direct loop over origins and steps."""
+        report = self.backtester.run(["last_value"], horizon=3, workers=1)
+        counts = list(self.backtester.series["A"].counts)
+        errors = [(abs(counts[t] - counts[t + k]), counts[t + k])
+                  for t in range(2, len(counts) - 3) for k in (1, 2, 3)]
+        row = report["locations"]["A"]["last_value"]
+        self.assertEqual(row["forecasts"], len(errors))
+        self.assertAlmostEqual(row["mae"], sum(e for e, _ in errors) / len(errors), places=4)
+        pct = [e / a for e, a in errors if a]
+        self.assertAlmostEqual(row["mape"], 100 * sum(pct) / len(pct), places=2)
+
+    def test_process_pool_and_cache(self):
+        """Integration: worker processes give the in-process result; reruns hit the cache."""
+        serial = Backtester(self.records).run(horizon=4, workers=1)
+        parallel = self.backtester.run(horizon=4, workers=2)
+        self.assertEqual(parallel["locations"], serial["locations"])
+        again = self.backtester.run(horizon=4, workers=2)
+        self.assertEqual(again["locations"], serial["locations"])
+        self.assertTrue(all(row["seconds"] == 0 for row in again["models"].values()))
+        custom = self.backtester.run(["flat"], horizon=4, workers=2,
+                                     model_functions={"flat": _flat_ten})
+        self.assertEqual(custom["models"]["flat"]["forecasts"],
+                         serial["models"]["last_value"]["forecasts"])
+        self.assertIn("moving_average_7", format_table(serial))
+        with self.assertRaises(ValueError):
+            self.backtester.run(["prophet"])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -181,5 +181,93 @@ class TestHealthDataPipeline(unittest.TestCase):
         self.assertEqual(len(alerts), 1)
         self.assertIn("150 cases", alerts[0])
 
+class TestBadRowQuarantine(unittest.TestCase):
+
+    def setUp(self):
+        """Create feeds with one malformed row in the middle."""
+        self.csv_file = "test_bad.csv"
+        self.json_file = "test_bad.json"
+        self.quarantine = "test_bad.quarantine.jsonl"
+
+        with open(self.csv_file, 'w', newline='') as f:
+            f.write("date,location,cases\n")
+            f.write("2025-01-01,Florida,100\n")
+            f.write("2025-01-02,Florida,lots\n")
+            f.write("2025-01-03,Florida,120\n")
+
+        with open(self.json_file, 'w') as f:
+            json.dump([
+                {"date": "2025-02-01", "location": "Ohio", "cases": 5},
+                {"date": "2025-02-02", "location": "Ohio", "cases": None},
+                {"date": "2025-02-03", "location": "Ohio", "cases": 7},
+            ], f)
+
+    def tearDown(self):
+        for f in [self.csv_file, self.json_file, self.quarantine]:
+            if os.path.exists(f):
+                os.remove(f)
+
+    def test_csv_bad_row_does_not_stop_load(self):
+        """Unit: the rows after a bad one still load; the bad one is quarantined."""
+        ds = CSVDataset(self.csv_file, quarantine_path=self.quarantine)
+        ds.load_data()
+        self.assertEqual([r.cases for r in ds.get_all_records()], [100, 120])
+
+        with open(self.quarantine) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["line"], 3)
+        self.assertEqual(entries[0]["row"]["cases"], "lots")
+        self.assertIn("ValueError", entries[0]["error"])
+
+    def test_json_bad_entry_is_quarantined(self):
+        """Unit: a null case count is rejected by position, not fatal."""
+        ds = JSONDataset(self.json_file)
+        ds.load_data()
+        self.assertEqual(len(ds.get_all_records()), 2)
+        self.assertEqual(ds.rejected_rows[0]["line"], 2)
+
+    def test_replay_recovers_fixed_rows(self):
+        """Integration: fixing the quarantine file and replaying ingests only those rows."""
+        ds = CSVDataset(self.csv_file, quarantine_path=self.quarantine)
+        ds.load_data()
+
+        with open(self.quarantine) as f:
+            entry = json.loads(f.readline())
+        entry["row"]["cases"] = "110"
+        with open(self.quarantine, 'w') as f:
+            f.write(json.dumps(entry) + "\n")
+
+        self.assertEqual(ds.replay_quarantine(), 1)
+        self.assertEqual(sorted(r.cases for r in ds.get_all_records()), [100, 110, 120])
+        self.assertEqual(os.path.getsize(self.quarantine), 0)
+
+    def test_reloading_does_not_duplicate_quarantine_entries(self):
+        """Unit: each load replaces its source's entries; other sources' stay."""
+        json_ds = JSONDataset(self.json_file, quarantine_path=self.quarantine)
+        json_ds.load_data()
+        ds = CSVDataset(self.csv_file, quarantine_path=self.quarantine)
+        ds.load_data()
+        ds.load_data()
+        with open(self.quarantine) as f:
+            sources = [json.loads(line)["source"] for line in f]
+        self.assertEqual(sorted(sources), sorted([self.csv_file, self.json_file]))
+
+    def test_replayed_rows_return_to_file_order(self):
+        """Unit: a recovered row is inserted where it was in the file, not appended."""
+        ds = CSVDataset(self.csv_file, quarantine_path=self.quarantine)
+        ds.load_data()
+        with open(self.quarantine) as f:
+            entry = json.loads(f.readline())
+        entry["row"]["cases"] = "110"
+        with open(self.quarantine, 'w') as f:
+            f.write(json.dumps(entry) + "\n")
+
+        ds.replay_quarantine()
+        self.assertEqual([r.date for r in ds.get_all_records()],
+                         ["2025-01-01", "2025-01-02", "2025-01-03"])
+        self.assertTrue(ds.sorted_by_date)
+
+
 if __name__ == '__main__':
     unittest.main()
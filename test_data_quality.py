@@ -0,0 +1,360 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from case_data_manager import CaseRecord, CSVDataset, JSONDataset
+from analysis_modules import TrendAnalyzer
+from pipeline_manager import PipelineManager
+from deduplication import BloomFilter, Deduplicator, record_key
+from schema_mapping import RowTransformer
+from pipeline_functions import (integrate_data_sources, fill_missing_values,
+                                clean_case_data, standardize_case_fields, clean_records,
+                                validate_case_entry)
+from benchmark_suite import SyntheticCaseGenerator, _peak_allocated
+from location_registry import LocationRegistry, load_gazetteer
+from helper_utils import MISSING_AGE, normalize_age, normalize_ages
+from batch_validation import BatchValidator
+
+
+class TestDeduplication(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_source = [CaseRecord("2025-01-01", "Boston", 10),
+                           CaseRecord("2025-01-02", "Boston", 20)]
+        self.json_source = [CaseRecord("2025-01-02", "boston ", 25),
+                            CaseRecord("2025-01-03", "Boston", 30)]
+
+    def test_keys_ignore_location_case(self):
+        """Unit: the composite key normalizes location spelling."""
+        self.assertEqual(record_key("2025-01-01", "Boston"), record_key("2025-01-01", " BOSTON"))
+        self.assertNotEqual(record_key("2025-01-01", "Boston"), record_key("2025-01-02", "Boston"))
+
+    def test_policies(self):
+        """Unit: latest/max/sum resolve the overlapping day differently."""
+        expected = {"latest": 25, "max": 25, "sum": 45}
+        for policy, overlap in expected.items():
+            dedup = Deduplicator(policy)
+            merged = dedup.merge([self.csv_source, self.json_source])
+            self.assertEqual([r.cases for r in merged], [10, overlap, 30], policy)
+            self.assertEqual(dedup.stats["duplicates"], 1)
+
+        # 'max' keeps the older record when it is larger.
+        merged = Deduplicator("max").merge([[CaseRecord("d", "A", 9)], [CaseRecord("d", "A", 3)]])
+        self.assertEqual(merged[0].cases, 9)
+
+    def test_sum_does_not_modify_inputs(self):
+        """Unit: summing builds new records instead of editing source data."""
+        Deduplicator("sum").merge([self.csv_source, self.json_source])
+        self.assertEqual(self.csv_source[1].cases, 20)
+
+    def test_bloom_mode_drops_repeats_in_bounded_memory(self):
+        """Unit: the Bloom filter passes the first record for each key."""
+        dedup = Deduplicator(mode="bloom", expected_items=1000, error_rate=0.001)
+        stream = [{"date": f"2025-01-{d % 10:02d}", "location": "A", "cases": d} for d in range(100)]
+        kept = list(dedup.stream(stream))
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(dedup.stats["duplicates"], 90)
+
+    def test_bloom_filter_error_rate(self):
+        """Unit: false positives stay near the configured rate."""
+        bloom = BloomFilter(expected_items=5000, error_rate=0.01)
+        for key in range(5000):
+            bloom.add(key)
+        false_hits = sum(1 for key in range(10**6, 10**6 + 5000) if key in bloom)
+        self.assertLess(false_hits / 5000, 0.03)
+        self.assertTrue(all(key in bloom for key in range(0, 5000, 97)))
+
+    def test_manager_dedupes_overlapping_feeds(self):
+        """Integration: overlapping CSV + JSON exports are not double counted."""
+        tmp = tempfile.mkdtemp()
+        try:
+            csv_file = os.path.join(tmp, "feed.csv")
+            json_file = os.path.join(tmp, "feed.json")
+            with open(csv_file, "w") as f:
+                f.write("date,location,cases\n2025-01-01,Boston,10\n2025-01-02,Boston,20\n")
+            with open(json_file, "w") as f:
+                json.dump([{"date": "2025-01-02", "location": "Boston", "cases": 20}], f)
+
+            manager = PipelineManager()
+            manager.add_dataset(CSVDataset(csv_file))
+            manager.add_dataset(JSONDataset(json_file))
+            manager.register_analyzer(TrendAnalyzer())
+            self.assertEqual(manager.run_full_analysis()["TrendAnalyzer"]["total_cases"], 50)
+
+            manager.set_deduplication("latest")
+            self.assertEqual(manager.run_full_analysis()["TrendAnalyzer"]["total_cases"], 30)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class TestSchemaMapping(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp, "county.csv")
+        self.json_file = os.path.join(self.tmp, "state.json")
+        with open(self.csv_file, "w") as f:
+            f.write("county,report_date,new_cases,notes\n")
+            f.write("Howard,2025-01-01,7,ok\n")
+            f.write("Howard,2025-01-02,n/a,late\n")
+        with open(self.json_file, "w") as f:
+            json.dump([{"day": "2025-01-01", "region": "MD", "count": "12"}], f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_header_transformer_resolves_positions_once(self):
+        """Unit: list rows map through precomputed header positions."""
+        parse = RowTransformer({"county": "location", "report_date": "date",
+                                "new_cases": "cases"}).for_header(
+            ["county", "report_date", "new_cases"])
+        record = parse(["Howard", "2025-01-01", "7"])
+        self.assertEqual((record.date, record.location, record.cases), ("2025-01-01", "Howard", 7))
+
+    def test_missing_column_uses_default_or_fails_fast(self):
+        """Unit: absent columns become constants, or raise once if no default exists."""
+        parse = RowTransformer(defaults={"cases": 0}).for_header(["date", "location"])
+        self.assertEqual(parse(["2025-01-01", "Howard"]).cases, 0)
+        with self.assertRaises(ValueError):
+            RowTransformer().for_header(["date", "location"])
+
+    def test_invalid_schema_map(self):
+        """Unit: unknown targets and duplicate targets are rejected."""
+        with self.assertRaises(ValueError):
+            RowTransformer({"county": "region"})
+        with self.assertRaises(ValueError):
+            RowTransformer({"a": "cases", "b": "cases"})
+
+    def test_dataset_uses_schema_map_and_quarantines_bad_rows(self):
+        """Integration: CSVDataset reads renamed columns; bad counts still quarantine."""
+        ds = CSVDataset(self.csv_file, schema_map={"county": "location", "report_date": "date",
+                                                   "new_cases": "cases"})
+        ds.load_data()
+        self.assertEqual(len(ds.get_all_records()), 1)
+        self.assertEqual(ds.get_all_records()[0].location, "Howard")
+        self.assertEqual(ds.rejected_rows[0]["row"]["new_cases"], "n/a")
+
+    def test_integrate_data_sources_with_per_source_maps(self):
+        """Integration: schema_map is honoured per source file."""
+        combined = integrate_data_sources(
+            [self.csv_file, self.json_file],
+            {self.csv_file: {"county": "location", "report_date": "date", "new_cases": "cases"},
+             self.json_file: {"day": "date", "region": "location", "count": "cases"}})
+        self.assertEqual(combined, [
+            {"date": "2025-01-01", "location": "Howard", "cases": 7},
+            {"date": "2025-01-01", "location": "MD", "cases": 12},
+        ])
+
+
+class TestFillMissingValues(unittest.TestCase):
+
+    def setUp(self):
+        # Out of date order on purpose; B has no known counts at all.
+        self.rows = [
+            {"date": "2025-01-05", "location": "A", "cases": 9},
+            {"date": "2025-01-01", "location": "A", "cases": 1},
+            {"date": "2025-01-04", "location": "A", "cases": None},
+            {"date": "2025-01-02", "location": "A", "cases": None},
+            {"date": "2025-01-01", "location": "B", "cases": None},
+        ]
+
+    def test_zero_and_mean(self):
+        """Unit: constant fills use 0 or the field mean over known values."""
+        self.assertEqual([r["cases"] for r in fill_missing_values(self.rows)], [9, 1, 0, 0, 0])
+        self.assertEqual([r["cases"] for r in fill_missing_values(self.rows, "mean")],
+                         [9, 1, 5, 5, 5])
+
+    def test_ffill_follows_dates_within_location(self):
+        """Unit: forward fill walks each location in date order."""
+        filled = fill_missing_values(self.rows, "ffill")
+        self.assertEqual([r["cases"] for r in filled], [9, 1, 1, 1, 0])
+
+    def test_interpolate_by_day_distance(self):
+        """Unit: interpolation is linear in days between known values."""
+        filled = fill_missing_values(self.rows, "interpolate")
+        self.assertEqual([r["cases"] for r in filled], [9, 1, 7.0, 3.0, 0])
+
+    def test_copy_free_unless_filled(self):
+        """Unit: only rows with gaps are copied; inplace edits the input."""
+        filled = fill_missing_values(self.rows)
+        self.assertIs(filled[0], self.rows[0])
+        self.assertIsNone(self.rows[2]["cases"])
+
+        same = fill_missing_values(self.rows, inplace=True)
+        self.assertIs(same, self.rows)
+        self.assertEqual(self.rows[2]["cases"], 0)
+
+    def test_fields_and_absent_keys(self):
+        """Unit: fields limits the fill; absent keys count as missing."""
+        rows = [{"cases": 1, "age": None}, {"age": 40}]
+        filled = fill_missing_values(rows, fields=["cases"])
+        self.assertEqual(filled, [{"cases": 1, "age": None}, {"age": 40, "cases": 0}])
+        with self.assertRaises(ValueError):
+            fill_missing_values(rows, method="median")
+
+
+class TestLocationRegistry(unittest.TestCase):
+
+    def test_spellings_share_one_interned_id(self):
+        """Unit: raw spellings resolve once to the same canonical name and ID."""
+        registry = LocationRegistry()
+        self.assertEqual(registry.normalize(" new york"), "New York")
+        self.assertIs(registry.normalize("NEW YORK "), registry.normalize("new york"))
+        self.assertEqual(registry.id_of("new york"), registry.id_of("NEW YORK "))
+        self.assertEqual(list(registry.encode(["boston", "new york", "Boston"])), [1, 0, 1])
+        self.assertEqual(registry.decode([1, 0]), ["Boston", "New York"])
+
+        registry.normalize("new york")
+        self.assertEqual((registry.misses, len(registry)), (5, 2))
+
+    def test_validity_matches_helper(self):
+        """Unit: is_valid caches is_valid_location; gazetteer aliases count as valid."""
+        registry = LocationRegistry({"D.C.": "Washington"})
+        self.assertTrue(registry.is_valid("Boston"))
+        self.assertFalse(registry.is_valid("123 Main St"))
+        self.assertTrue(registry.is_valid("d.c."))
+        self.assertEqual(registry.normalize("d.c."), "Washington")
+
+    def test_cache_is_bounded(self):
+        """Unit: the spelling cache is capped; IDs survive a reset."""
+        registry = LocationRegistry(max_entries=2)
+        first = registry.id_of("a")
+        for name in ("b", "c", "d"):
+            registry.id_of(name)
+        self.assertLessEqual(len(registry._cache), 2)
+        self.assertEqual(registry.id_of("a"), first)
+
+    def test_gazetteer_files_and_pipeline_functions(self):
+        """Integration: CSV gazetteer aliases flow through clean/standardize."""
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "places.csv")
+            with open(path, "w") as f:
+                f.write("alias,canonical\nNYC,New York\nBig Apple,New York\n")
+            self.assertEqual(load_gazetteer(path)["NYC"], "New York")
+            registry = LocationRegistry(path)
+            rows = [{"date": "2025-01-01", "location": "nyc", "cases": "3"},
+                    {"date": "2025-01-01", "location": "big apple ", "cases": "4"}]
+            cleaned = clean_case_data(rows, ("date", "location", "cases"), locations=registry)
+            self.assertEqual({r["location"] for r in cleaned}, {"New York"})
+            self.assertEqual(standardize_case_fields(rows, registry)[1]["location"], "New York")
+            with self.assertRaises(FileNotFoundError):
+                load_gazetteer(os.path.join(tmp, "missing.csv"))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class TestAgeNormalization(unittest.TestCase):
+
+    AGES = ["20-29", "20-30", " 41 ", "7", 65, 0, None, "", "n/a", "65+", "a-b", "1-2-3", 3.5]
+
+    def test_batch_matches_per_record(self):
+        """Unit: normalize_ages agrees with normalize_age value by value."""
+        self.assertEqual(list(normalize_ages(self.AGES)), [normalize_age(a) for a in self.AGES])
+        self.assertEqual(list(normalize_ages(iter(self.AGES), sentinel=-999)),
+                         [-999 if normalize_age(a) == MISSING_AGE else normalize_age(a)
+                          for a in self.AGES])
+        self.assertEqual(normalize_ages(self.AGES).typecode, "i")
+
+    def test_standardize_uses_the_same_rules(self):
+        """Unit: standardize_case_fields agrees with normalize_age, None for unreadable."""
+        rows = [{"location": "x", "age": a} for a in self.AGES + [[30]]]
+        ages = [r["age"] for r in standardize_case_fields(rows)]
+        expected = [normalize_age(a) for a in self.AGES] + [MISSING_AGE]
+        self.assertEqual(ages, [None if a == MISSING_AGE else a for a in expected])
+
+
+class TestFusedClean(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = list(SyntheticCaseGenerator(seed=45, n_locations=50).rows(2000))
+        for row in self.rows[::7]:
+            row["date"] = "bad"
+        for row in self.rows[::11]:
+            row["cases"] = "NA"
+        self.required = ("date", "location", "age", "cases")
+
+    def chain(self):
+        return standardize_case_fields(clean_case_data(self.rows, self.required))
+
+    def test_matches_clean_then_standardize(self):
+        """Unit: the fused pass keeps the same records with the same values."""
+        fused = clean_records(self.rows, self.required)
+        chained = self.chain()
+        self.assertEqual(len(fused), len(chained))
+        self.assertEqual([(r.date, r.location, r.cases) for r in fused],
+                         [(r["date"], r["location"], r["cases"]) for r in chained])
+        # The chain drops age in the clean step; the fused pass keeps it.
+        self.assertTrue(all(isinstance(r.age, int) for r in fused))
+
+    def test_inplace_compacts_input(self):
+        """Unit: inplace rewrites the input dicts and removes invalid ones."""
+        expected = clean_records(self.rows, self.required)
+        first = self.rows[1]
+        result = clean_records(self.rows, self.required, inplace=True)
+        self.assertIs(result, self.rows)
+        self.assertIs(result[0], first)
+        self.assertEqual([(r["date"], r["location"], r["age"], r["cases"]) for r in result],
+                         [tuple(r) for r in expected])
+
+    def test_allocates_less_than_chain(self):
+        """Benchmark: tracemalloc peak of the fused pass is well under the chain's."""
+        chain_peak = _peak_allocated(self.chain)
+        fused_peak = _peak_allocated(lambda: clean_records(self.rows, self.required))
+        self.assertLess(fused_peak, chain_peak / 2)
+
+
+class TestBatchValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"date": "2025-01-01", "location": "A", "age": 30, "cases": 5},
+            {"date": "2025-01-02", "location": "", "age": 30, "cases": 5},
+            {"date": "2025-01-03", "location": "A", "cases": 5},
+            {"date": "NA", "location": None, "age": None, "cases": 1},
+            {"date": "2025-01-04", "location": "B", "age": [30], "cases": "7"},
+        ]
+
+    def test_matches_per_record_validation(self):
+        """Unit: the bitmask accepts exactly the rows validate_case_entry accepts."""
+        rows = list(SyntheticCaseGenerator(seed=46, n_locations=50).rows(2000))
+        # Blank out or drop a field in every fifth row.
+        for i, row in enumerate(rows[::5]):
+            field = ("date", "location", "age", "cases")[i % 4]
+            if i % 3:
+                row[field] = (None, "", "NA")[i % 3]
+            else:
+                del row[field]
+        result = BatchValidator().validate(rows)
+        expected = [validate_case_entry(r) for r in rows]
+        self.assertEqual([result.is_accepted(i) for i in range(len(rows))], expected)
+        self.assertEqual(result.select(rows), [r for r, ok in zip(rows, expected) if ok])
+        self.assertEqual(result.rejected, sum(result.reasons.values()))
+
+    def test_mask_and_first_failing_reason(self):
+        """Unit: bit i is row i, and each reject counts once under its first rule."""
+        result = BatchValidator().validate(self.rows)
+        self.assertEqual(result.mask, bytes([0b10001]))
+        self.assertEqual(result.flags(), bytes([1, 0, 0, 0, 1]))
+        self.assertEqual(result.reasons, {"null:location": 1, "missing:age": 1, "null:date": 1})
+
+    def test_type_rules(self):
+        """Unit: typed fields reject wrong types; optional ones may be empty."""
+        validator = BatchValidator(("date", "cases"), types={"cases": int, "age": (int, float)})
+        result = validator.validate(self.rows)
+        self.assertEqual(result.flags(), bytes([1, 1, 1, 0, 0]))
+        self.assertEqual(result.reasons, {"null:date": 1, "type:cases": 1})
+        self.assertEqual(validator.reason(self.rows[4]), "type:cases")
+
+    def test_clean_case_data_rejects_non_dicts(self):
+        """Unit: the batched clean path still raises on non-dict entries."""
+        with self.assertRaises(TypeError):
+            clean_case_data([{"date": "2025-01-01", "location": "A", "cases": 1}, "row"],
+                            ("date", "location", "cases"))
+        self.assertEqual(BatchValidator().validate(["row"]).reasons, {"not_a_dict": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
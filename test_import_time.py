@@ -0,0 +1,88 @@
+import unittest
+import os
+import subprocess
+import sys
+
+from lazy_imports import LazyModule, lazy_import
+
+# Import-time budget (milliseconds) for the core pipeline modules.
+# Override with PIPELINE_IMPORT_BUDGET_MS on slow CI machines.
+IMPORT_BUDGET_MS = float(os.environ.get("PIPELINE_IMPORT_BUDGET_MS", "150"))
+
+HEAVY_MODULES = ["matplotlib", "pandas", "seaborn", "numpy"]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run_fresh(code: str) -> str:
+    """Run code in a fresh interpreter rooted at the repo and return stdout."""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+class TestImportBudget(unittest.TestCase):
+
+    def test_core_modules_import_within_budget(self):
+        """Benchmark: importing the manager and datasets stays under budget."""
+        code = (
+            "import time\n"
+            "t = time.perf_counter()\n"
+            "import pipeline_manager, case_data_manager\n"
+            "print((time.perf_counter() - t) * 1000)\n"
+        )
+        # Best of three runs to smooth out cold disk caches.
+        elapsed_ms = min(float(_run_fresh(code)) for _ in range(3))
+        self.assertLess(
+            elapsed_ms, IMPORT_BUDGET_MS,
+            f"Import took {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+        )
+
+    def test_core_modules_skip_heavy_dependencies(self):
+        """Importing the pipeline must not pull in plotting/dataframe libraries."""
+        code = (
+            "import sys\n"
+            "import pipeline_manager, case_data_manager\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+        )
+        self.assertEqual(_run_fresh(code), "")
+
+
+class TestLazyModule(unittest.TestCase):
+
+    def test_import_deferred_until_first_use(self):
+        """Unit: the real module loads only on attribute access."""
+        code = (
+            "import sys\n"
+            "from lazy_imports import lazy_import\n"
+            "mod = lazy_import('colorsys')\n"
+            "before = 'colorsys' in sys.modules\n"
+            "mod.rgb_to_hsv(0.1, 0.2, 0.3)\n"
+            "print(before, 'colorsys' in sys.modules, mod.is_loaded)\n"
+        )
+        self.assertEqual(_run_fresh(code), "False True True")
+
+    def test_proxies_are_shared(self):
+        """Unit: the same module name always returns the same proxy."""
+        self.assertIs(lazy_import("json"), lazy_import("json"))
+
+    def test_missing_dependency_raises_helpful_error(self):
+        """Unit: a missing optional module fails on use, not on import."""
+        mod = LazyModule("definitely_not_a_real_module")
+        self.assertFalse(mod.is_loaded)
+        with self.assertRaises(ImportError):
+            mod.anything
+
+    def test_dunder_lookup_does_not_import(self):
+        """Unit: probing for __dunder__ names raises AttributeError without importing."""
+        mod = LazyModule("definitely_not_a_real_module")
+        self.assertFalse(hasattr(mod, "__wrapped__"))
+        with self.assertRaises(AttributeError):
+            mod.__getstate_hook__
+        self.assertFalse(mod.is_loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
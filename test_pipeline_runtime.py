@@ -0,0 +1,481 @@
+import unittest
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from functools import partial
+
+from pipeline_cli import main, run_pipeline
+from case_data_manager import CSVDataset
+from analysis_modules import TrendAnalyzer
+from forecasting_analyzer import ForecastingAnalyzer
+from pipeline_manager import PipelineManager, _concat
+from stage_graph import _func_token
+from ingest_service import DropDirectoryIngestor
+from benchmark_suite import SyntheticCaseGenerator, compare_results, run_benchmarks
+from case_data_manager import CaseRecord
+from alert_report import AlertReport
+from sharded_pipeline import ShardedPipeline, partition, shard_of
+
+
+class TestBatchCLI(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small CSV + JSON feed in a temp directory."""
+        self.tmp = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp, "feed.csv")
+        self.json_file = os.path.join(self.tmp, "feed.json")
+        with open(self.csv_file, "w") as f:
+            f.write("date,location,cases\n")
+            f.write("01/01/25,boston,10\n")
+            f.write("01/02/25,boston,80\n")
+            f.write("01/03/25,boston,30\n")
+        with open(self.json_file, "w") as f:
+            json.dump([{"date": "2025-01-01", "location": "chicago", "cases": 5}], f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_run_pipeline_stages(self):
+        """Integration: records flow through every stage in small chunks."""
+        export = os.path.join(self.tmp, "out", "clean.json")
+        with redirect_stdout(io.StringIO()):
+            outcome = run_pipeline([self.csv_file, self.json_file], ["trend"],
+                                   threshold=50, export=export, workers=2, chunk_size=2)
+
+        self.assertEqual(outcome["records"], 4)
+        self.assertEqual(outcome["results"]["TrendAnalyzer"]["total_cases"], 125)
+        self.assertEqual(len(outcome["alerts"]), 1)
+        with open(export) as f:
+            exported = json.load(f)
+        self.assertEqual(exported[0], {"date": "2025-01-01", "location": "Boston", "cases": 10})
+
+        stats = outcome["stats"].as_dict()
+        for stage in ("ingest", "clean", "alert", "export"):
+            self.assertEqual(stats[stage]["records"], 4)
+
+    def test_main_prints_throughput(self):
+        """System: the CLI exits cleanly and reports per-stage throughput."""
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            code = main([self.csv_file, "--analyzers", "trend", "forecast",
+                         "--export", os.path.join(self.tmp, "clean.csv")])
+        self.assertEqual(code, 0)
+        self.assertIn("Records/sec", buf.getvalue())
+        self.assertIn("ForecastingAnalyzer", buf.getvalue())
+
+    def test_main_rejects_missing_input(self):
+        """System: missing input files give a non-zero exit code."""
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main([os.path.join(self.tmp, "nope.csv")]), 2)
+
+
+class TestStageProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp, "feed.csv")
+        with open(self.csv_file, "w") as f:
+            f.write("date,location,cases\n")
+            for day in range(1, 21):
+                f.write(f"2025-01-{day:02d},Boston,{day * 3}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_profiled_run_reports_every_stage(self):
+        """Integration: loads and analyzers each get wall/CPU/throughput/memory."""
+        manager = PipelineManager(profile=True)
+        manager.add_dataset(CSVDataset(self.csv_file))
+        manager.register_analyzer(TrendAnalyzer())
+        manager.register_analyzer(ForecastingAnalyzer())
+        manager.run_full_analysis()
+
+        report = manager.metrics_report()
+        names = [(s["kind"], s["name"]) for s in report["stages"]]
+        self.assertEqual(names, [("load", self.csv_file), ("analyze", "TrendAnalyzer"),
+                                 ("analyze", "ForecastingAnalyzer")])
+        for stage in report["stages"]:
+            self.assertEqual(stage["records"], 20)
+            self.assertGreaterEqual(stage["wall_seconds"], 0)
+            self.assertIsNotNone(stage["peak_memory_bytes"])
+        self.assertEqual(report["totals"]["records_loaded"], 20)
+
+        path = manager.dump_metrics(os.path.join(self.tmp, "metrics.json"))
+        with open(path) as f:
+            self.assertEqual(json.load(f)["stages"][0]["kind"], "load")
+
+    def test_profiling_off_by_default(self):
+        """Unit: an unprofiled manager records nothing."""
+        manager = PipelineManager()
+        manager.add_dataset(CSVDataset(self.csv_file))
+        self.assertFalse(manager.profiling)
+        self.assertEqual(manager.metrics_report(), {})
+        with self.assertRaises(RuntimeError):
+            manager.dump_metrics(os.path.join(self.tmp, "metrics.json"))
+
+
+class TestStageGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv_a = os.path.join(self.tmp, "a.csv")
+        self.csv_b = os.path.join(self.tmp, "b.csv")
+        for path, cases in [(self.csv_a, 60), (self.csv_b, 10)]:
+            with open(path, "w") as f:
+                f.write("date,location,cases\n")
+                f.write(f"01/01/25,boston,{cases}\n")
+                f.write(f"01/02/25,boston,{cases + 5}\n")
+
+        self.manager = PipelineManager()
+        self.manager.add_dataset(CSVDataset(self.csv_a))
+        self.manager.add_dataset(CSVDataset(self.csv_b))
+        self.trend = TrendAnalyzer()
+        self.forecast = ForecastingAnalyzer(days_ahead=2)
+        self.manager.register_analyzer(self.trend)
+        self.manager.register_analyzer(self.forecast)
+        self.manager.build_default_stages(threshold=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_second_run_is_fully_cached(self):
+        """Integration: nothing recomputes when nothing changed."""
+        first = self.manager.run_stages()
+        self.assertEqual(first["analyze:TrendAnalyzer"]["total_cases"], 150)
+        self.assertEqual(len(first["alerts"]), 2)
+
+        self.manager.run_stages()
+        self.assertEqual(self.manager.stages.last_run["computed"], [])
+
+    def test_analyzer_param_change_recomputes_only_that_stage(self):
+        """Integration: changing days_ahead reruns the forecast alone."""
+        self.manager.run_stages()
+        self.forecast.days_ahead = 4
+        results = self.manager.run_stages()
+        self.assertEqual(self.manager.stages.last_run["computed"], ["analyze:ForecastingAnalyzer"])
+        self.assertEqual(len(results["analyze:ForecastingAnalyzer"]["future_predictions"]), 4)
+
+    def test_stage_param_change_recomputes_downstream_only(self):
+        """Integration: a new alert threshold leaves cleaning and analyzers cached."""
+        self.manager.run_stages()
+        self.manager.stages.set_params("alerts", threshold=5)
+        results = self.manager.run_stages("alerts")
+        self.assertEqual(self.manager.stages.last_run["computed"], ["alerts"])
+        self.assertEqual(len(results["alerts"]), 4)
+
+    def test_changed_source_file_recomputes_its_dependents(self):
+        """Integration: editing one input re-reads it and reruns downstream stages."""
+        self.manager.run_stages()
+        with open(self.csv_b, "a") as f:
+            f.write("01/03/25,boston,100\n")
+        results = self.manager.run_stages()
+        computed = self.manager.stages.last_run["computed"]
+        self.assertIn(f"load:{self.csv_b}", computed)
+        self.assertNotIn(f"load:{self.csv_a}", computed)
+        self.assertIn("analyze:TrendAnalyzer", computed)
+        self.assertEqual(results["analyze:TrendAnalyzer"]["total_cases"], 250)
+
+    def test_cycles_are_rejected(self):
+        """Unit: a stage graph with a cycle cannot run."""
+        graph = PipelineManager().stages
+        graph.add_stage("a", _concat, ["b"])
+        graph.add_stage("b", _concat, ["a"])
+        with self.assertRaises(ValueError):
+            graph.run()
+
+    def test_function_fingerprints_see_code_args_and_closures(self):
+        """Unit: lambdas, partials and closures with different behaviour never share a token."""
+        def above(limit):
+            return lambda value: value > limit
+
+        self.assertNotEqual(_func_token(lambda x: x + 1), _func_token(lambda x: x + 2))
+        self.assertNotEqual(_func_token(partial(round, ndigits=1)),
+                            _func_token(partial(round, ndigits=2)))
+        self.assertNotEqual(_func_token(partial(_concat, [1])), _func_token(partial(_concat, [2])))
+        self.assertNotEqual(_func_token(above(5)), _func_token(above(6)))
+        self.assertEqual(_func_token(above(5)), _func_token(above(5)))
+
+    def test_changed_source_reload_keeps_schema_map_and_quarantine(self):
+        """Integration: a re-read source still uses its schema map and quarantine file."""
+        renamed = os.path.join(self.tmp, "renamed.csv")
+        quarantine = os.path.join(self.tmp, "renamed.quarantine.jsonl")
+        with open(renamed, "w") as f:
+            f.write("day,county,count\n01/01/25,boston,3\n")
+        manager = PipelineManager()
+        manager.add_dataset(CSVDataset(renamed, quarantine_path=quarantine,
+                                       schema_map={"day": "date", "county": "location",
+                                                   "count": "cases"}))
+        manager.build_default_stages(threshold=50)
+        manager.run_stages()
+        with open(renamed, "a") as f:
+            f.write("01/02/25,boston,4\n01/03/25,boston,many\n")
+        results = manager.run_stages("records")
+        self.assertEqual([r["cases"] for r in results["records"]], [3, 4])
+        with open(quarantine) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+
+class TestDropDirectoryIngestor(unittest.TestCase):
+
+    def setUp(self):
+        """A temp directory stands in for the upstream spool feed."""
+        self.spool = tempfile.mkdtemp()
+        self.done = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.spool, ignore_errors=True)
+        shutil.rmtree(self.done, ignore_errors=True)
+
+    def _drop(self, name, rows):
+        with open(os.path.join(self.spool, name), "w") as f:
+            f.write("date,location,cases\n")
+            for date, cases in rows:
+                f.write(f"{date},Boston,{cases}\n")
+
+    def test_drains_existing_files_with_small_queues(self):
+        """Integration: every dropped file is parsed, chunked and analyzed."""
+        for i in range(5):
+            self._drop(f"feed_{i}.csv", [(f"2025-01-{d:02d}", 10 * i + d) for d in range(1, 8)])
+        self._drop("ignored.csv.part", [("2025-01-01", 1)])
+
+        manager = PipelineManager()
+        manager.register_analyzer(TrendAnalyzer())
+        service = DropDirectoryIngestor(manager, self.spool, poll_interval=0.01, queue_size=1,
+                                        chunk_size=3, workers=2, processed_dir=self.done)
+        chunks, results = [], {}
+        service.on_records(lambda path, recs: chunks.append(len(recs)))
+        service.on_results(lambda path, res: results.__setitem__(os.path.basename(path), res))
+
+        asyncio.run(service.run(once=True))
+
+        self.assertEqual(service.files_ingested, 5)
+        self.assertEqual(service.records_ingested, 35)
+        self.assertTrue(max(chunks) <= 3)
+        self.assertEqual(len(manager._datasets), 5)
+        self.assertEqual(results["feed_0.csv"]["TrendAnalyzer"]["total_cases"], 28)
+        self.assertEqual(sorted(os.listdir(self.done)), [f"feed_{i}.csv" for i in range(5)])
+        self.assertEqual(os.listdir(self.spool), ["ignored.csv.part"])
+
+    def test_picks_up_files_dropped_while_running(self):
+        """Integration: a file arriving after start is ingested, then stop() returns."""
+        manager = PipelineManager()
+        service = DropDirectoryIngestor(manager, self.spool, poll_interval=0.01)
+        seen = []
+
+        async def scenario():
+            task = asyncio.create_task(service.run())
+            await asyncio.sleep(0.05)
+            self._drop("late.csv", [("2025-02-01", 5)])
+            for _ in range(200):
+                if seen:
+                    break
+                await asyncio.sleep(0.01)
+            service.stop()
+            await task
+
+        service.on_records(lambda path, recs: seen.extend(recs))
+        asyncio.run(scenario())
+        self.assertEqual([r.cases for r in seen], [5])
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_generator_is_seeded(self):
+        """Unit: the same seed always produces the same rows."""
+        a = list(SyntheticCaseGenerator(seed=7, n_locations=50).rows(200))
+        b = list(SyntheticCaseGenerator(seed=7, n_locations=50).rows(200))
+        c = list(SyntheticCaseGenerator(seed=8, n_locations=50).rows(200))
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertEqual(set(a[0]), {"date", "location", "age", "cases"})
+
+    def test_compare_flags_regressions(self):
+        """Unit: slowdowns beyond tolerance are flagged, others are not."""
+        old = {"results": [{"benchmark": "load_csv", "size": "10k", "seconds": 1.0},
+                           {"benchmark": "clean_case_data", "size": "10k", "seconds": 1.0}]}
+        new = {"results": [{"benchmark": "load_csv", "size": "10k", "seconds": 1.5},
+                           {"benchmark": "clean_case_data", "size": "10k", "seconds": 1.05}]}
+        flags = {r["benchmark"]: r["regression"] for r in compare_results(old, new, 0.10)}
+        self.assertEqual(flags, {"load_csv": True, "clean_case_data": False})
+
+    def test_smallest_run_times_every_stage(self):
+        """Integration: a 10k run covers loaders, cleaning, analyzers, alerts, export."""
+        names = {r["benchmark"] for r in run_benchmarks(["10k"], self.tmp)}
+        for expected in ("load_csv", "load_json", "load_xml", "clean_case_data",
+                         "analyze_TrendAnalyzer", "analyze_ForecastingAnalyzer",
+                         "AlertReport.generate_alerts", "export_dataset_csv",
+                         "normalize_age_per_record", "normalize_ages_batch",
+                         "clean_standardize_chain", "clean_records_fused",
+                         "validate_per_record", "validate_batch", "as_columns",
+                         "analyze_TrendAnalyzer_columns", "AlertReport.generate_alerts_columns"):
+            self.assertIn(expected, names)
+
+    def test_raw_row_stages_stream_in_chunks(self):
+        """Integration: chunked raw-row stages still report every record once."""
+        rows = {r["benchmark"]: r for r in run_benchmarks(["10k"], self.tmp, repeats=1,
+                                                          chunk_size=3000)}
+        self.assertEqual(rows["clean_case_data"]["records"], 10_000)
+        self.assertEqual(rows["normalize_ages_batch"]["records"], 10_000)
+        self.assertGreater(rows["clean_records_fused"]["peak_bytes"], 0)
+        with self.assertRaises(ValueError):
+            run_benchmarks(["10k"], self.tmp, repeats=0)
+
+
+class _CountingAnalyzer:
+    """Analyzer without partial/combine, to exercise the unsharded fallback."""
+
+    def analyze(self, records):
+        return {"records": len(records)}
+
+
+class TestShardedPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        rows = SyntheticCaseGenerator(seed=44, n_locations=40, days=60).rows(3000)
+        self.records = [CaseRecord(r["date"], r["location"], r["cases"]) for r in rows]
+        self.manager = PipelineManager()
+        for analyzer in (TrendAnalyzer(), ForecastingAnalyzer(), _CountingAnalyzer()):
+            self.manager.register_analyzer(analyzer)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_partition_keeps_locations_together(self):
+        """Unit: shard choice is stable and ignores location case."""
+        self.assertEqual(shard_of("Boston", 8), shard_of(" boston", 8))
+        parts = partition(self.records, 4)
+        self.assertEqual(sum(len(p) for p in parts), len(self.records))
+        for i, part in enumerate(parts):
+            self.assertTrue(all(shard_of(loc, 4) == i for _, _, loc, _ in part))
+
+    def test_sharded_results_match_single_process(self):
+        """Integration: merged shard output equals the unsharded run, in memory and spilled."""
+        expected = self.manager.analyze_records(self.records)
+        expected_alerts = AlertReport(self.records, threshold=30).generate_alerts()
+        for spill_dir in (None, os.path.join(self.tmp, "spill")):
+            outcome = ShardedPipeline(self.manager, shards=3, threshold=30,
+                                      spill_dir=spill_dir).run(self.records)
+            self.assertEqual(outcome["results"], expected)
+            self.assertEqual(outcome["alerts"], expected_alerts)
+            self.assertEqual(sum(s["records"] for s in outcome["shards"]), len(self.records))
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp, "spill"))), 3)
+
+    def test_manager_entry_point(self):
+        """Integration: run_sharded_analysis has run_full_analysis's shape."""
+        self.assertEqual(PipelineManager().run_sharded_analysis(shards=2),
+                         {"error": "No data loaded"})
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.paths = []
+        for seed in (49, 50):
+            path = os.path.join(self.tmp, f"feed-{seed}.csv")
+            SyntheticCaseGenerator(seed, n_locations=30, days=90).write(path, 1500)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _manager(self, **budget):
+        manager = PipelineManager()
+        if budget:
+            manager.set_memory_budget(**budget)
+        for path in self.paths:
+            manager.add_dataset(CSVDataset(path))
+        manager.register_analyzer(TrendAnalyzer())
+        manager.register_analyzer(ForecastingAnalyzer())
+        manager.register_analyzer(_CountingAnalyzer())
+        return manager
+
+    def test_spilled_results_match_in_memory(self):
+        """Integration: date and location partitions give the in-memory results."""
+        expected = self._manager().run_full_analysis()
+        for partition_by in ("date", "location"):
+            spill_dir = os.path.join(self.tmp, partition_by)
+            manager = self._manager(max_memory=40_000, spill_dir=spill_dir,
+                                    partition_by=partition_by)
+            self.assertTrue(manager._spill.spilled)
+            self.assertGreater(manager._spill.spills, 1)
+            self.assertEqual(manager.run_full_analysis(), expected)
+            # Each dataset still reads back its own records, in file order.
+            reread = CSVDataset(self.paths[1])
+            reread.load_data()
+            self.assertEqual([(r.date, r.location, r.cases)
+                              for r in manager._datasets[1].get_all_records()],
+                             [(r.date, r.location, r.cases) for r in reread.get_all_records()])
+
+    def test_external_sort_is_stable(self):
+        """Unit: sorted_rows is a stable date sort across many spilled runs."""
+        from spill_store import SpillStore
+        store = SpillStore(2_000, os.path.join(self.tmp, "runs"), partition_by="location",
+                           partitions=3)
+        records = [CaseRecord(f"2025-01-{d % 9 + 1:02d}", f"L{d % 5}", d) for d in range(400)]
+        store.extend(records)
+        self.assertEqual([row[3] for row in store.sorted_rows()],
+                         [r.cases for r in sorted(records, key=lambda r: r.date)])
+        self.assertEqual([r.cases for r in store], list(range(400)))
+        float_store = SpillStore(2_000, os.path.join(self.tmp, "floats"))
+        float_store.extend(CaseRecord("2025-01-01", "A", v) for v in (1.5, 2, "x", 7.25, 3))
+        float_store.spill()
+        self.assertEqual(ForecastingAnalyzer().analyze_stream(float_store),
+                         ForecastingAnalyzer().analyze({"cases": [1.5, 2, "x", 7.25, 3]}))
+        store.close()
+        self.assertEqual(os.listdir(os.path.join(self.tmp, "runs")), [])
+        with self.assertRaises(ValueError):
+            self._manager().set_memory_budget(1_000)
+
+
+class TestDateOrderedMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.manager = PipelineManager()
+        feeds = [[("2025-01-01", "A", 1), ("2025-01-03", "A", 2), ("2025-01-05", "A", 3)],
+                 [("2025-01-02", "B", 4), ("2025-01-03", "B", 5), ("2025-01-09", "B", 6)],
+                 [("2025-01-04", "C", 7), ("2025-01-01", "C", 8), ("2025-01-03", "C", 9)]]
+        for i, rows in enumerate(feeds):
+            path = os.path.join(self.tmp, f"feed-{i}.csv")
+            with open(path, "w") as f:
+                f.write("date,location,cases\n")
+                f.writelines(f"{d},{loc},{c}\n" for d, loc, c in rows)
+            self.manager.add_dataset(CSVDataset(path))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_datasets_record_their_order(self):
+        """Unit: sorted_by_date reflects the file order and follows appends."""
+        self.assertEqual([ds.sorted_by_date for ds in self.manager._datasets],
+                         [True, True, False])
+        first = self.manager._datasets[0]
+        first.get_all_records().append(CaseRecord("2024-12-31", "A", 0))
+        self.assertFalse(first.sorted_by_date)
+
+    def test_merge_matches_stable_sort(self):
+        """Unit: the lazy heap merge equals a stable sort of the combined records."""
+        stream = self.manager.date_ordered_records()
+        self.assertFalse(isinstance(stream, list))
+        merged = list(stream)
+        expected = sorted(self.manager.combined_records(), key=lambda r: r.date)
+        self.assertEqual([id(r) for r in merged], [id(r) for r in expected])
+        self.assertEqual([r.cases for r in merged], [1, 8, 4, 2, 5, 9, 7, 3, 6])
+        self.assertEqual(TrendAnalyzer().analyze(merged),
+                         TrendAnalyzer().analyze(self.manager.combined_records()))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
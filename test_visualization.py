@@ -0,0 +1,126 @@
+import unittest
+import importlib.util
+import os
+import shutil
+import tempfile
+
+from chart_rendering import (
+    lttb_indices, downsample_series, safe_filename, location_stems, render_location_charts,
+    build_case_matrix, bin_date_columns, tile_path
+)
+from case_data_manager import CaseRecord
+from pipeline_functions import generate_case_heatmap
+
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+
+
+class TestDownsampling(unittest.TestCase):
+
+    def test_short_series_untouched(self):
+        """Unit: series within budget keep every point."""
+        self.assertEqual(lttb_indices([1, 2, 3], 10), [0, 1, 2])
+
+    def test_keeps_endpoints_and_peak(self):
+        """Unit: LTTB keeps first/last points and a lone spike."""
+        values = [1] * 1000
+        values[437] = 500
+        keep = lttb_indices(values, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], 999)
+        self.assertIn(437, keep)
+        self.assertEqual(keep, sorted(keep))
+
+    def test_threshold_validation(self):
+        """Unit: fewer than 3 points cannot describe a shape."""
+        with self.assertRaises(ValueError):
+            lttb_indices([1, 2, 3, 4], 2)
+
+    def test_downsample_series_sorts_by_date(self):
+        """Unit: series are returned in date order, labels kept with values."""
+        dates, counts = downsample_series({"2025-01-02": 5, "2025-01-01": 3}, None)
+        self.assertEqual(dates, ["2025-01-01", "2025-01-02"])
+        self.assertEqual(counts, [3, 5])
+
+    def test_safe_filename(self):
+        """Unit: location names become safe file stems."""
+        self.assertEqual(safe_filename("St. Mary's County"), "St_Mary_s_County")
+        self.assertEqual(safe_filename("///"), "unknown")
+
+    def test_colliding_stems_are_made_unique(self):
+        """Unit: names that fold to the same stem (or differ only in case) get distinct files."""
+        stems = location_stems(["St. Louis", "St  Louis", "Boston", "boston", "Denver"])
+        self.assertEqual(len({s.lower() for s in stems.values()}), 5)
+        self.assertEqual(stems["Denver"], "Denver")
+        self.assertTrue(stems["St. Louis"].startswith("St_Louis-"))
+
+    def test_zero_workers_rejected(self):
+        """Unit: workers=0 is an error, not a request for the default."""
+        with self.assertRaises(ValueError):
+            render_location_charts({"A": {"2025-01-01": 1}}, tempfile.gettempdir(), workers=0)
+
+
+class TestHeatmapMatrix(unittest.TestCase):
+
+    def test_build_case_matrix_sums_duplicates(self):
+        """Unit: records aggregate into a sorted location x date grid."""
+        records = [
+            {"date": "2025-01-02", "location": "B", "cases": 4},
+            {"date": "2025-01-01", "location": "A", "cases": 1},
+            CaseRecord("2025-01-01", "A", 2),
+        ]
+        locations, dates, rows = build_case_matrix(records)
+        self.assertEqual(locations, ["A", "B"])
+        self.assertEqual(dates, ["2025-01-01", "2025-01-02"])
+        self.assertEqual([list(r) for r in rows], [[3, 0], [0, 4]])
+
+    def test_bin_date_columns(self):
+        """Unit: wide ranges are summed into at most max_columns bins."""
+        dates = [f"2025-01-{d:02d}" for d in range(1, 11)]
+        labels, rows = bin_date_columns(dates, [list(range(10))], max_columns=4)
+        self.assertEqual(labels, ["2025-01-01", "2025-01-04", "2025-01-07", "2025-01-10"])
+        self.assertEqual(list(rows[0]), [3, 12, 21, 9])
+
+    def test_tile_paths(self):
+        """Unit: single images keep their name, tiles get numbered."""
+        self.assertEqual(tile_path("out/heat.png", 1, 1), "out/heat.png")
+        self.assertEqual(tile_path("out/heat.png", 2, 3), "out/heat_part002.png")
+
+    def test_heatmap_without_data(self):
+        """Unit: empty input writes nothing."""
+        self.assertEqual(generate_case_heatmap([]), [])
+
+
+@unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib not installed")
+class TestHeadlessRendering(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_parallel_render_writes_one_file_per_location(self):
+        """Integration: every location gets an image, rendered off-screen."""
+        series = {
+            f"County {i}": {f"2025-01-{d:02d}": d * i for d in range(1, 29)}
+            for i in range(6)
+        }
+        written = render_location_charts(series, self.out_dir, max_points=10, workers=2)
+        self.assertEqual(set(written), set(series))
+        for path in written.values():
+            self.assertTrue(os.path.getsize(path) > 0)
+
+    def test_heatmap_tiles_large_location_sets(self):
+        """Integration: many locations are split across tiles."""
+        records = [{"date": f"2025-01-{d:02d}", "location": f"County {i}", "cases": i + d}
+                   for i in range(25) for d in range(1, 31)]
+        out = os.path.join(self.out_dir, "heatmap.png")
+        written = generate_case_heatmap(records, out, max_columns=10, tile_rows=10)
+        self.assertEqual(len(written), 3)
+        for path in written:
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
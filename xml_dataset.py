@@ -1,36 +1,41 @@
+import logging
 import xml.etree.ElementTree as ET
 from case_data_manager import AbstractDataset, CaseRecord
 
+logger = logging.getLogger(__name__)
+
 class XMLDataset(AbstractDataset):
     """
     Specialized dataset for XML files.
     """
 
+    # Element text is a string, so the missing-count default is too.
+    DEFAULTS = {'date': 'Unknown', 'location': 'Unknown', 'cases': '0'}
+
     def load_data(self) -> None:
         """
         Polymorphic implementation: Uses xml.etree to parse data.
         """
         try:
+            first_bad = len(self._rejected)
             tree = ET.parse(self.source_path)
             root = tree.getroot()
             
+            load = self.schema.mapping_loader()
+
             # Assuming XML structure: <root><record><date>...</date></record>...</root>
-            for child in root:
-                # Extract text safely
-                date = child.find('date').text if child.find('date') is not None else 'Unknown'
-                loc = child.find('location').text if child.find('location') is not None else 'Unknown'
-                cases_str = child.find('cases').text if child.find('cases') is not None else '0'
-                
-                # Create the shared CaseRecord object
-                record = CaseRecord(date, loc, int(cases_str))
-                self._data.append(record)
+            # Rows are keyed by 1-based record position for the quarantine file.
+            # Extract text safely
+            rows = ({field.tag: field.text for field in child} for child in root)
+            load(rows, self._data.append, self._reject)
                 
-            print(f"Successfully loaded {len(self._data)} records from XML.")
+            self._flush_quarantine(first_bad)
+            logger.info("Successfully loaded %d records from XML.", len(self._data))
             
         except ET.ParseError:
-            print(f"Failed to parse XML file: {self.source_path}")
+            logger.error("Failed to parse XML file: %s", self.source_path)
         except Exception as e:
-            print(f"Error loading XML: {e}")
+            logger.error("Error loading XML: %s", e)
 
     def validate_format(self) -> bool:
         """Checks if file ends with .xml."""